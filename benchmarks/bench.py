@@ -0,0 +1,229 @@
+"""
+Offline benchmark for the orchestrator: scrapes fixture pages from a local
+HTTP server, drafts against a stub chat completions server and sends into
+a local SMTP sink, so nothing touches Google Scholar, smu.ca, OpenAI or
+Gmail. For each roster size it reports end-to-end professors per minute
+and per-stage latency percentiles, and can compare against a saved
+baseline to catch regressions.
+
+    python benchmarks/bench.py                          # sizes 1, 100 and 1000
+    python benchmarks/bench.py --sizes 1 100 --llm-latency 0.2
+    python benchmarks/bench.py --no-browser             # without Chrome
+    python benchmarks/bench.py --save baseline.json
+    python benchmarks/bench.py --baseline baseline.json # exit 1 on a regression
+
+Scraping Scholar needs Chrome; point CHROMEDRIVER_PATH (or --chromedriver)
+at a chromedriver to run fully offline. With --no-browser, Scholar
+research is served from a pre-seeded research cache and only the SMU
+fetch, drafting and sending are exercised.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import phd_email_orchestrator as orchestrator  # noqa: E402
+import servers  # noqa: E402
+
+# Orchestrator methods timed as benchmark stages, and the span that measures each
+STAGES = {
+    'scrape_google_scholar': 'stage.scrape_google_scholar',
+    'scrape_smu_website': 'stage.scrape_smu_website',
+    'compose_email': 'draft',
+    'send_email': 'send',
+}
+
+
+class BenchOrchestrator(orchestrator.PhDEmailOrchestrator):
+    """Times each scrape as its own span and approves every draft without prompting"""
+
+    def scrape_google_scholar(self, scholar_url=None):
+        with self._span('stage.scrape_google_scholar'):
+            return super().scrape_google_scholar(scholar_url)
+
+    def scrape_smu_website(self, smu_url=None):
+        with self._span('stage.scrape_smu_website'):
+            return super().scrape_smu_website(smu_url)
+
+    def request_approval(self):
+        return True
+
+
+class BenchCampaignRunner(orchestrator.CampaignRunner):
+    orchestrator_class = BenchOrchestrator
+
+
+def build_roster(size, fixtures, search=False):
+    roster = []
+    for i in range(size):
+        user = f"u{size}x{i}"
+        roster.append({
+            'professor_name': f"Professor {user.upper()}",
+            'email': f"{user}@bench.invalid",
+            # Without a Scholar URL the scraper searches the fixture server first
+            'scholar_url': None if search else f"{fixtures.url}/citations?user={user}&hl=en",
+            'smu_url': f"{fixtures.url}/profiles/{user}",
+        })
+    return roster
+
+
+def run_size(size, args, fixtures, llm, sink, workdir):
+    """Run one campaign of `size` professors and return its measurements"""
+    os.makedirs(workdir, exist_ok=True)
+    config = orchestrator.Config(
+        db_path=os.path.join(workdir, f"bench-{size}.db"),
+        scholar_base_url=fixtures.url,
+        chromedriver_path=args.chromedriver or os.getenv('CHROMEDRIVER_PATH'),
+        browser_pool_size=args.workers,
+        draft_concurrency=args.draft_concurrency,
+        openai_api_key='bench', openai_base_url=llm.url,
+        smtp_host='127.0.0.1', smtp_port=sink.port, smtp_ssl=False,
+        send_rate_per_minute=1e9, send_daily_limit=10 ** 9,
+        http_timeout=30,
+    )
+    roster = build_roster(size, fixtures, search=args.search)
+    research_cache = None
+    if args.no_browser:
+        # Scholar needs a browser: serve its research from the cache instead
+        research_cache = orchestrator.ResearchCache(config)
+        for entry in roster:
+            user = entry['smu_url'].rsplit('/', 1)[-1]
+            research_cache.put('google_scholar', entry['scholar_url'],
+                               servers.scholar_research(user, entry['scholar_url']))
+
+    tracer = orchestrator.Tracer()
+    runner = BenchCampaignRunner(roster, os.path.join(workdir, f"results-{size}.jsonl"), config=config,
+                                 research_cache=research_cache, tracer=tracer)
+    sent_before = sink.messages
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        summary = runner.run('Benchmark Applicant', 'I study scalable machine learning.',
+                             'bench@bench.invalid', 'unused')
+    seconds = time.perf_counter() - start
+    if research_cache:
+        research_cache.close()
+
+    spans = tracer.summary()
+    stages = {}
+    for stage, span_name in STAGES.items():
+        records = sorted(s['seconds'] for s in tracer.spans if s['name'] == span_name)
+        if records:
+            stages[stage] = {
+                'count': len(records),
+                'p50': round(orchestrator._percentile(records, 50), 4),
+                'p95': round(orchestrator._percentile(records, 95), 4),
+                'p99': round(orchestrator._percentile(records, 99), 4),
+                'max': round(records[-1], 4),
+            }
+    return {
+        'size': size,
+        'seconds': round(seconds, 3),
+        'professors_per_minute': round(size / seconds * 60, 2),
+        'sent': sink.messages - sent_before,
+        'errors': summary['errors'],
+        'stages': stages,
+        'gpt_tokens': sum(stats.get('prompt_tokens', 0) + stats.get('completion_tokens', 0)
+                          for stats in spans.values()),
+    }
+
+
+def print_result(result):
+    print(f"\n Roster of {result['size']}: {result['seconds']}s, "
+          f"{result['professors_per_minute']} professors/min, {result['sent']} sent, {result['errors']} errors")
+    print(f"  {'stage':<24}{'count':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for stage, stats in result['stages'].items():
+        print(f"  {stage:<24}{stats['count']:>7}{stats['p50']:>9}{stats['p95']:>9}{stats['p99']:>9}{stats['max']:>9}")
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regressions against a saved baseline"""
+    regressions = []
+    previous = {result['size']: result for result in baseline['results']}
+    for result in results:
+        before = previous.get(result['size'])
+        if not before:
+            continue
+        floor = before['professors_per_minute'] * (1 - tolerance)
+        if result['professors_per_minute'] < floor:
+            regressions.append(f"size {result['size']}: {result['professors_per_minute']} professors/min, "
+                               f"baseline {before['professors_per_minute']}")
+        for stage, stats in result['stages'].items():
+            old = before['stages'].get(stage)
+            if old and stats['p95'] > old['p95'] * (1 + tolerance) and stats['p95'] - old['p95'] > 0.005:
+                regressions.append(f"size {result['size']}: {stage} p95 {stats['p95']}s, baseline {old['p95']}s")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline orchestrator benchmark")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 100, 1000],
+                        help="Roster sizes to run (default: 1 100 1000)")
+    parser.add_argument('--workers', type=int, default=4, help="Browser pool size (default: 4)")
+    parser.add_argument('--draft-concurrency', type=int, default=8,
+                        help="GPT requests in flight at once (default: 8)")
+    parser.add_argument('--llm-latency', type=float, default=0.5,
+                        help="Seconds the stub chat completions server takes per request (default: 0.5)")
+    parser.add_argument('--llm-jitter', type=float, default=0.0,
+                        help="Extra random latency per completion, up to this many seconds")
+    parser.add_argument('--page-latency', type=float, default=0.0,
+                        help="Seconds the fixture server takes per HTML page (default: 0)")
+    parser.add_argument('--smtp-latency', type=float, default=0.0,
+                        help="Seconds the SMTP sink takes to accept each message (default: 0)")
+    parser.add_argument('--search', action='store_true',
+                        help="Leave out Scholar URLs so profiles are found through the search fixture")
+    parser.add_argument('--no-browser', action='store_true',
+                        help="Run without Chrome: Scholar research comes from a pre-seeded cache")
+    parser.add_argument('--chromedriver', help="chromedriver to use (default: CHROMEDRIVER_PATH)")
+    parser.add_argument('--save', metavar='PATH', help="Write the results as JSON")
+    parser.add_argument('--baseline', metavar='PATH', help="Compare against results saved with --save")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Allowed slowdown against the baseline before failing (default: 0.2)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.no_browser and args.search:
+        sys.exit("--search needs a browser")
+
+    fixtures = servers.start(servers.FixtureServer(latency=args.page_latency))
+    llm = servers.start(servers.LLMServer(latency=args.llm_latency, jitter=args.llm_jitter))
+    sink = servers.start(servers.SMTPSink(latency=args.smtp_latency))
+    print(f" Fixtures at {fixtures.url}, LLM stub at {llm.url} ({args.llm_latency}s), "
+          f"SMTP sink on port {sink.port}")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='orchestrator-bench-') as workdir:
+        # Unreported warm-up so lazy imports and client set-up are not billed to the first size
+        run_size(1, args, fixtures, llm, sink, os.path.join(workdir, 'warmup'))
+        for size in args.sizes:
+            result = run_size(size, args, fixtures, llm, sink, workdir)
+            results.append(result)
+            print_result(result)
+    print(f"\n Stub LLM peak concurrency: {llm.max_in_flight}, SMTP connections: {sink.connections}")
+
+    report = {'created_at': time.time(), 'options': vars(args), 'results': results}
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f" Results written to {args.save}")
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\n REGRESSIONS:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(" No regressions against the baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,331 @@
+"""
+Local stand-ins for Google Scholar, smu.ca, the OpenAI API and Gmail.
+Each server runs on 127.0.0.1 in a background thread, so benchmarks
+exercise the real scraping, drafting and sending code paths without
+touching the network.
+"""
+
+import gzip
+import json
+import os
+import random
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Template
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+INTERESTS = [
+    'Machine Learning', 'Natural Language Processing', 'Computer Vision', 'Data Mining',
+    'Reinforcement Learning', 'Bioinformatics', 'Distributed Systems', 'Computational Geometry',
+    'Information Retrieval', 'Human-Computer Interaction', 'Graph Algorithms', 'Optimization',
+    'Computer Security', 'Quantum Computing', 'Signal Processing', 'Robotics',
+]
+TOPICS = ['learning', 'networks', 'graphs', 'retrieval', 'inference', 'embeddings', 'streams', 'privacy']
+VENUES = ['NeurIPS', 'ICML', 'ACL', 'KDD', 'CVPR', 'SIGIR', 'VLDB', 'IEEE Transactions on Computers']
+
+
+def _load(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return Template(f.read())
+
+
+def professor(user):
+    """Deterministic synthetic research record for a fixture user id"""
+    rng = random.Random(user)
+    publications = []
+    for i in range(20):
+        topic = rng.sample(TOPICS, 2)
+        year = rng.randint(2008, 2024)
+        publications.append({
+            'title': f"Scalable {topic[0]} for {topic[1]}: study {i + 1}",
+            'authors': f"{user.upper()} Author, B Coauthor, C Coauthor",
+            'venue': f"{rng.choice(VENUES)}, {year}",
+            'year': year,
+            'citations': rng.randint(0, 500),
+        })
+    publications.sort(key=lambda pub: -pub['year'])
+    citations = sum(pub['citations'] for pub in publications)
+    return {
+        'user': user,
+        'name': f"Professor {user.upper()}",
+        'interests': rng.sample(INTERESTS, 4),
+        'publications': publications,
+        'citations': citations,
+    }
+
+
+def scholar_research(user, profile_url):
+    """The research_data['google_scholar'] section the scraper extracts from a fixture profile"""
+    record = professor(user)
+    return {
+        'interests': record['interests'],
+        'recent_publications': [pub['title'] for pub in record['publications'][:5]],
+        'publications': [dict(pub, url=None) for pub in record['publications']],
+        'citations': str(record['citations']),
+        'citation_table': {},
+        'profile_url': profile_url,
+    }
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """
+    Serves Scholar profile and search pages at /citations and SMU profile
+    pages at /profiles/<user>, rendered from the HTML fixtures. Responses
+    are gzip-compressed when the client asks for it and connections are
+    kept alive, like the real sites. Static assets (images, fonts,
+    scripts) are answered with small bodies so blocked or loaded assets
+    behave realistically. `latency` seconds are added to every page.
+    Setting `drop_next` makes the next that many requests hang up without
+    a response, like a server closing a kept-alive connection.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency=0.0):
+        super().__init__(('127.0.0.1', 0), FixtureHandler)
+        self.latency = latency
+        self.templates = {name: _load(f"{name}.html")
+                          for name in ('scholar_profile', 'scholar_search', 'smu_profile')}
+        self.requests = 0
+        self.drop_next = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def render(self, path, query):
+        """Return (content type, body) for a request path, or None for a 404"""
+        if path == '/citations' and query.get('view_op') == ['search_authors']:
+            name = query.get('mauthors', [''])[0].split(' Saint Mary')[0]
+            user = name.split()[-1].lower() if name else 'unknown'
+            record = professor(user)
+            return 'text/html', self.templates['scholar_search'].substitute(
+                user=user, name=record['name'], citations=record['citations'])
+        if path == '/citations' and 'user' in query:
+            record = professor(query['user'][0])
+            interests = '\n'.join(f'<a class="gsc_prf_inta gs_ibl" href="/citations?label={i}">{interest}</a>'
+                                  for i, interest in enumerate(record['interests']))
+            rows = '\n'.join(
+                f'<tr class="gsc_a_tr"><td class="gsc_a_t">'
+                f'<a href="/citations?view_op=view_citation&amp;citation_for_view={record["user"]}:{i}" '
+                f'class="gsc_a_at">{pub["title"]}</a>'
+                f'<div class="gs_gray">{pub["authors"]}</div><div class="gs_gray">{pub["venue"]}</div></td>'
+                f'<td class="gsc_a_c"><a class="gsc_a_ac gs_ibl">{pub["citations"]}</a></td>'
+                f'<td class="gsc_a_y"><span class="gsc_a_h gsc_a_hc gs_ibl">{pub["year"]}</span></td></tr>'
+                for i, pub in enumerate(record['publications']))
+            citations = record['citations']
+            return 'text/html', self.templates['scholar_profile'].substitute(
+                name=record['name'], interests=interests, rows=rows,
+                citations=citations, recent_citations=citations // 2,
+                h_index=12, recent_h_index=9, i10_index=15, recent_i10_index=11)
+        if path.startswith('/profiles/'):
+            user = path.rsplit('/', 1)[-1]
+            record = professor(user)
+            publications = '\n'.join(f"    <li>{pub['title']}. {pub['venue']}.</li>"
+                                     for pub in record['publications'][:5])
+            return 'text/html', self.templates['smu_profile'].substitute(
+                name=record['name'], email=f"{user}@smu.example", interests=', '.join(record['interests']),
+                publications=publications, scholar_url=f"{self.url}/citations?user={user}")
+        if path.startswith('/static/'):
+            content_type = 'text/css' if path.endswith('.css') else 'application/octet-stream'
+            return content_type, ' ' * 2048
+        return None
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        with self.server._lock:
+            self.server.requests += 1
+            if self.server.drop_next:
+                self.server.drop_next -= 1
+                self.close_connection = True
+                return
+        rendered = self.server.render(parts.path, parse_qs(parts.query))
+        if rendered is None:
+            self.send_error(404)
+            return
+        content_type, text = rendered
+        if content_type == 'text/html' and self.server.latency:
+            time.sleep(self.server.latency)
+        body = text.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', f"{content_type}; charset=utf-8")
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LLMServer(ThreadingHTTPServer):
+    """
+    Minimal OpenAI-compatible chat completions endpoint at
+    /v1/chat/completions. Each request sleeps `latency` seconds (plus up
+    to `jitter`) and returns a fixed email body with token usage, so
+    drafting cost and concurrency can be measured without API credits.
+    Setting `fail_next` makes the next that many requests fail with
+    `fail_status` (429 by default), sending `retry_after` seconds as
+    Retry-After when it is set.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency=0.5, jitter=0.0):
+        super().__init__(('127.0.0.1', 0), LLMHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_next = 0
+        self.fail_status = 429
+        self.retry_after = None
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+class LLMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server = self.server
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        with server._lock:
+            server.requests += 1
+            fail = server.fail_next > 0
+            if fail:
+                server.fail_next -= 1
+            else:
+                server.in_flight += 1
+                server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        if fail:
+            body = json.dumps({'error': {'message': f"Injected failure ({server.fail_status})",
+                                         'type': 'server_error', 'code': None}}).encode('utf-8')
+            self.send_response(server.fail_status)
+            self.send_header('Content-Type', 'application/json')
+            if server.retry_after is not None:
+                self.send_header('Retry-After', str(server.retry_after))
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        try:
+            time.sleep(server.latency + random.uniform(0, server.jitter))
+        finally:
+            with server._lock:
+                server.in_flight -= 1
+
+        prompt = ' '.join(message.get('content', '') for message in request.get('messages', []))
+        content = ("Dear Professor,\n\nI have been reading your recent work and would love to discuss "
+                   "PhD opportunities in your group.\n\nBest regards,\nBenchmark Applicant")
+        body = json.dumps({
+            'id': f"chatcmpl-bench-{server.requests}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'bench'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content},
+                         'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': len(prompt.split()), 'completion_tokens': len(content.split()),
+                      'total_tokens': len(prompt.split()) + len(content.split())},
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """
+    Plain-text SMTP server that accepts every message and throws it away.
+    It does not offer AUTH, so the sender skips login. `latency` seconds
+    are added before each message is acknowledged. Setting `drop_next`
+    makes the next that many messages hang up instead of being accepted,
+    like a server dropping an idle connection. Setting `refuse_next` makes
+    the next that many connections greet with `refuse_code` (421 by
+    default) and hang up.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, latency=0.0):
+        super().__init__(('127.0.0.1', 0), SMTPSinkHandler)
+        self.latency = latency
+        self.messages = 0
+        self.connections = 0
+        self.drop_next = 0
+        self.refuse_next = 0
+        self.refuse_code = 421
+        self._lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        with self.server._lock:
+            self.server.connections += 1
+            refuse = self.server.refuse_next > 0
+            if refuse:
+                self.server.refuse_next -= 1
+        if refuse:
+            self.reply(f"{self.server.refuse_code} sink not accepting connections")
+            return
+        self.reply('220 sink ESMTP ready')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip().split(' ', 1)[0].upper()
+            if command == 'EHLO':
+                self.wfile.write(b'250-sink\r\n250-8BITMIME\r\n250 SIZE 35882577\r\n')
+            elif command in ('HELO', 'MAIL', 'RCPT', 'RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b'.\n', b''):
+                    pass
+                if self.server.latency:
+                    time.sleep(self.server.latency)
+                with self.server._lock:
+                    if self.server.drop_next:
+                        self.server.drop_next -= 1
+                        return
+                    self.server.messages += 1
+                self.reply('250 OK: queued')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+def start(server):
+    """Serve `server` from a daemon thread and return it"""
+    threading.Thread(target=server.serve_forever, name=type(server).__name__, daemon=True).start()
+    return server
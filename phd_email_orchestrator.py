@@ -5,46 +5,2345 @@ This is the BEST PRACTICE way to handle secrets!
 """
 
 import os
-import ssl
-import smtplib
-from email.message import EmailMessage
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
+import sys
+import array
+import mmap
+import csv
+import argparse
+import queue
+import random
+import hashlib
+import zlib
+import sqlite3
+import codecs
+import heapq
+import math
+import re
+import threading
+import contextlib
+from collections import Counter
+from itertools import filterfalse
+from operator import add, mul
+from html.parser import HTMLParser
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
 import time
 import json
-from dotenv import load_dotenv
-from openai import OpenAI
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Get configuration from environment variables
-SENDER_EMAIL = os.getenv('SENDER_EMAIL')
-GMAIL_APP_PASSWORD = os.getenv('GMAIL_APP_PASSWORD')
-YOUR_NAME = os.getenv('YOUR_NAME')
-YOUR_BACKGROUND = os.getenv('YOUR_BACKGROUND')
-GOOGLE_SCHOLAR_URL = os.getenv('GOOGLE_SCHOLAR_URL')
-SMU_PROFILE_URL = os.getenv('SMU_PROFILE_URL')
-TARGET_EMAIL = os.getenv('TARGET_EMAIL')
-PROFESSOR_NAME = os.getenv('PROFESSOR_NAME')
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-
-# Initialize OpenAI client
-openai_client = None
-if OPENAI_API_KEY:
-    openai_client = OpenAI(api_key=OPENAI_API_KEY)
-    print("OpenAI API initialized")
-
-# Validate required variables
-if not all([SENDER_EMAIL, GMAIL_APP_PASSWORD, YOUR_NAME, TARGET_EMAIL]):
-    print("ERROR: Missing required environment variables in .env file!")
-    print("Required: SENDER_EMAIL, GMAIL_APP_PASSWORD, YOUR_NAME, TARGET_EMAIL")
-    exit(1)
-
-print("Loaded configuration from .env file")
+
+# Selenium, webdriver_manager, openai and python-dotenv are imported where they
+# are first needed, so importing this module (e.g. in a worker process or for
+# --help) stays fast and has no side effects. So are the slower standard
+# library modules (asyncio, ssl, smtplib, http.client, multiprocessing, ...)
+# that only some commands use.
+
+# GPT drafting settings that are not configurable
+GPT_TEMPERATURE = 0.7
+GPT_MAX_TOKENS = 500
+EMAIL_SUBJECT = "PhD Opportunity - Interest in Your Research"
+
+
+def _flag(value):
+    return value.lower() in ('1', 'true', 'yes')
+
+
+class Config:
+    """
+    Every setting the orchestrator reads, with its default. Components are
+    handed a Config instead of reading module globals; Config.from_env()
+    builds one from the environment and the .env file.
+    """
+    
+    # Credentials and the single-professor target (normally from .env)
+    sender_email = None
+    gmail_app_password = None
+    your_name = None
+    your_background = ''
+    google_scholar_url = None
+    smu_profile_url = None
+    target_email = None
+    professor_name = None
+    openai_api_key = None
+    openai_base_url = None
+    
+    browser_pool_size = 4
+    # Browser startup: a pinned chromedriver skips webdriver_manager entirely. 'eager'
+    # returns from driver.get() at DOMContentLoaded; the readiness checks do the rest.
+    chromedriver_path = None
+    page_load_strategy = 'eager'
+    # Block images, media, fonts and trackers (see BLOCKED_URL_PATTERNS)
+    block_resources = True
+    # Items allowed to wait between two pipeline stages before the earlier stage blocks
+    pipeline_queue_size = 8
+    
+    # GPT drafting
+    gpt_model = 'gpt-4'
+    # Batch drafting: requests in flight at once, retries on 429/5xx/timeouts, per-request timeout (s)
+    draft_concurrency = 8
+    draft_max_retries = 5
+    draft_timeout = 60.0
+    draft_max_backoff = 60.0
+    
+    # Page readiness polling (seconds): start at page_ready_poll and back off
+    # by page_ready_backoff per attempt, never waiting more than page_ready_max_poll
+    page_ready_timeout = 15.0
+    page_ready_poll = 0.1
+    page_ready_backoff = 1.5
+    page_ready_max_poll = 1.0
+    
+    # Outgoing mail. Gmail allows roughly 20 messages/minute and 500/day from one account.
+    smtp_host = 'smtp.gmail.com'
+    smtp_port = 465
+    smtp_ssl = True
+    send_rate_per_minute = 20.0
+    send_daily_limit = 500
+    send_max_attempts = 3
+    # Don't email anyone contacted within this many days (0 = never contact anyone twice)
+    recontact_cooldown_days = 0.0
+    
+    # Local state (caches, review queue, run journal, ...) lives in one SQLite file
+    db_path = 'orchestrator.db'
+    # Columnar store of every professor's researched interests and publications (a directory)
+    research_store_path = 'research_store'
+    # Research cache: how long results stay fresh per source, and the cache's size cap
+    scholar_cache_ttl_hours = 168.0
+    smu_cache_ttl_hours = 720.0
+    research_cache_max_mb = 200.0
+    # Draft cache: GPT drafts kept beyond this many are evicted, least recently used first
+    draft_cache_max_entries = 5000
+    
+    # Browserless fetching of static profile pages
+    http_timeout = 15.0
+    http_user_agent = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+                       'AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36')
+    # A fetched page with less visible text than this is assumed to need JavaScript
+    smu_min_text_length = 300
+    
+    # Where Scholar author searches go (a local fixture server in benchmarks)
+    scholar_base_url = 'https://scholar.google.com'
+    # Scholar "Show more" pagination: at most this many extra pages per profile
+    scholar_max_pages = 50
+    scholar_pagination_timeout = 120.0
+    
+    # Relevance ranking: keep only this many best-matching candidates (None keeps everyone)
+    rank_top_k = None
+    
+    # Faculty directory crawler: fetch threads, politeness per host, and how far to go
+    crawl_workers = 8
+    crawl_host_concurrency = 2
+    crawl_delay = 1.0
+    crawl_max_pages = 2000
+    crawl_max_depth = 3
+    
+    # Job queue for `work` processes: lease length (renewed by heartbeats), tries per job, processes per host
+    job_lease_seconds = 120.0
+    job_max_attempts = 3
+    worker_processes = 2
+    
+    # Environment variable -> (setting, type)
+    ENV_VARS = {
+        'SENDER_EMAIL': ('sender_email', str),
+        'GMAIL_APP_PASSWORD': ('gmail_app_password', str),
+        'YOUR_NAME': ('your_name', str),
+        'YOUR_BACKGROUND': ('your_background', str),
+        'GOOGLE_SCHOLAR_URL': ('google_scholar_url', str),
+        'SMU_PROFILE_URL': ('smu_profile_url', str),
+        'TARGET_EMAIL': ('target_email', str),
+        'PROFESSOR_NAME': ('professor_name', str),
+        'OPENAI_API_KEY': ('openai_api_key', str),
+        'OPENAI_BASE_URL': ('openai_base_url', str),
+        'BROWSER_POOL_SIZE': ('browser_pool_size', int),
+        'CHROMEDRIVER_PATH': ('chromedriver_path', str),
+        'PAGE_LOAD_STRATEGY': ('page_load_strategy', str),
+        'BROWSER_BLOCK_RESOURCES': ('block_resources', _flag),
+        'PIPELINE_QUEUE_SIZE': ('pipeline_queue_size', int),
+        'GPT_MODEL': ('gpt_model', str),
+        'DRAFT_CONCURRENCY': ('draft_concurrency', int),
+        'DRAFT_MAX_RETRIES': ('draft_max_retries', int),
+        'DRAFT_TIMEOUT': ('draft_timeout', float),
+        'DRAFT_MAX_BACKOFF': ('draft_max_backoff', float),
+        'PAGE_READY_TIMEOUT': ('page_ready_timeout', float),
+        'PAGE_READY_POLL': ('page_ready_poll', float),
+        'PAGE_READY_BACKOFF': ('page_ready_backoff', float),
+        'PAGE_READY_MAX_POLL': ('page_ready_max_poll', float),
+        'SMTP_HOST': ('smtp_host', str),
+        'SMTP_PORT': ('smtp_port', int),
+        'SMTP_SSL': ('smtp_ssl', _flag),
+        'SEND_RATE_PER_MINUTE': ('send_rate_per_minute', float),
+        'SEND_DAILY_LIMIT': ('send_daily_limit', int),
+        'SEND_MAX_ATTEMPTS': ('send_max_attempts', int),
+        'RECONTACT_COOLDOWN_DAYS': ('recontact_cooldown_days', float),
+        'ORCHESTRATOR_DB': ('db_path', str),
+        'RESEARCH_STORE': ('research_store_path', str),
+        'SCHOLAR_CACHE_TTL_HOURS': ('scholar_cache_ttl_hours', float),
+        'SMU_CACHE_TTL_HOURS': ('smu_cache_ttl_hours', float),
+        'RESEARCH_CACHE_MAX_MB': ('research_cache_max_mb', float),
+        'DRAFT_CACHE_MAX_ENTRIES': ('draft_cache_max_entries', int),
+        'HTTP_TIMEOUT': ('http_timeout', float),
+        'HTTP_USER_AGENT': ('http_user_agent', str),
+        'SMU_MIN_TEXT_LENGTH': ('smu_min_text_length', int),
+        'SCHOLAR_BASE_URL': ('scholar_base_url', str),
+        'SCHOLAR_MAX_PAGES': ('scholar_max_pages', int),
+        'SCHOLAR_PAGINATION_TIMEOUT': ('scholar_pagination_timeout', float),
+        'RANK_TOP_K': ('rank_top_k', int),
+        'CRAWL_WORKERS': ('crawl_workers', int),
+        'CRAWL_HOST_CONCURRENCY': ('crawl_host_concurrency', int),
+        'CRAWL_DELAY': ('crawl_delay', float),
+        'CRAWL_MAX_PAGES': ('crawl_max_pages', int),
+        'CRAWL_MAX_DEPTH': ('crawl_max_depth', int),
+        'JOB_LEASE_SECONDS': ('job_lease_seconds', float),
+        'JOB_MAX_ATTEMPTS': ('job_max_attempts', int),
+        'WORKER_PROCESSES': ('worker_processes', int),
+    }
+    
+    def __init__(self, **settings):
+        # Per page kind readiness timeouts, overriding page_ready_timeout
+        self.page_ready_timeouts = {}
+        for name, value in settings.items():
+            if not hasattr(self, name):
+                raise TypeError(f"Unknown setting: {name}")
+            setattr(self, name, value)
+        self._openai_client = None
+        self._lock = threading.Lock()
+    
+    def __getstate__(self):
+        # Picklable for worker processes; each process builds its own client
+        state = dict(self.__dict__)
+        del state['_openai_client'], state['_lock']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._openai_client = None
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_env(cls, environ=None, dotenv=True):
+        """Build a Config from environment variables, loading .env first unless `dotenv` is False"""
+        if dotenv:
+            from dotenv import load_dotenv
+            load_dotenv()
+        environ = os.environ if environ is None else environ
+        settings = {attr: cast(environ[name]) for name, (attr, cast) in cls.ENV_VARS.items()
+                    if environ.get(name)}
+        prefix = 'PAGE_READY_TIMEOUT_'
+        settings['page_ready_timeouts'] = {name[len(prefix):].lower(): float(value)
+                                           for name, value in environ.items()
+                                           if name.startswith(prefix) and value}
+        return cls(**settings)
+    
+    def ready_timeout(self, kind):
+        """Timeout for a page kind; PAGE_READY_TIMEOUT_<KIND> overrides the default"""
+        return self.page_ready_timeouts.get(kind, self.page_ready_timeout)
+    
+    def missing(self, *names):
+        """Environment variable names of required settings that are not set"""
+        env_names = {attr: name for name, (attr, _) in self.ENV_VARS.items()}
+        return [env_names[name] for name in names if not getattr(self, name)]
+    
+    def openai_client(self):
+        """The shared synchronous OpenAI client, created on first use; None without an API key"""
+        if not self.openai_api_key:
+            return None
+        with self._lock:
+            if self._openai_client is None:
+                from openai import OpenAI
+                self._openai_client = OpenAI(api_key=self.openai_api_key, base_url=self.openai_base_url,
+                                             timeout=self.draft_timeout, max_retries=self.draft_max_retries)
+        return self._openai_client
+
+
+# Requests the browser never makes: nothing we extract needs images, media,
+# fonts or third-party analytics
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.bmp',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.mp3', '*.ogg', '*.wav',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*googlesyndication.com*', '*facebook.net*', '*hotjar.com*', '*siteimproveanalytics.com*',
+]
+
+
+def _chromedriver_version(path):
+    import subprocess
+    try:
+        output = subprocess.run([path, '--version'], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    # "ChromeDriver 120.0.6099.109 (...)"
+    parts = output.split()
+    return parts[1] if len(parts) > 1 else None
+
+
+class DriverCache:
+    """
+    The chromedriver resolved by webdriver_manager, remembered in the
+    driver_cache table of orchestrator.db. webdriver_manager checks online
+    for the right driver version on every install(); with the resolved
+    path cached, later starts skip it and work offline. A cached driver
+    that was deleted, or that no longer matches an updated Chrome, is
+    resolved again.
+    """
+    
+    def __init__(self, config=None):
+        config = config or Config()
+        self._conn = open_db(config.db_path)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS driver_cache (
+                    name TEXT PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    version TEXT,
+                    resolved_at REAL NOT NULL
+                )""")
+    
+    def get(self):
+        """Return the cached {'path', 'version'}, or None if there is no usable driver"""
+        row = self._conn.execute(
+            "SELECT path, version FROM driver_cache WHERE name = 'chromedriver'").fetchone()
+        if row is None or not os.access(row['path'], os.X_OK):
+            return None
+        return {'path': row['path'], 'version': row['version'], 'cached': True}
+    
+    def resolve(self, refresh=False):
+        """Return the cached driver, asking webdriver_manager only if there is none (or `refresh`)"""
+        if not refresh:
+            cached = self.get()
+            if cached:
+                return cached
+        from webdriver_manager.chrome import ChromeDriverManager
+        path = ChromeDriverManager().install()
+        version = _chromedriver_version(path)
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO driver_cache VALUES ('chromedriver', ?, ?, ?)",
+                               (path, version, time.time()))
+        print(f"  Resolved chromedriver {version or ''} at {path}")
+        return {'path': path, 'version': version, 'cached': False}
+    
+    def close(self):
+        self._conn.close()
+
+
+# Pool workers starting at the same time resolve the driver once between them
+_driver_lock = threading.Lock()
+
+
+def chrome_options(config):
+    """Headless Chrome options for the lean page-loading profile"""
+    from selenium.webdriver.chrome.options import Options
+    
+    options = Options()
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+    options.page_load_strategy = config.page_load_strategy
+    if config.block_resources:
+        options.add_argument('--blink-settings=imagesEnabled=false')
+        options.add_argument('--mute-audio')
+        options.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2,
+            'profile.default_content_setting_values.notifications': 2,
+        })
+    return options
+
+
+def create_driver(config=None):
+    """Start a headless Chrome WebDriver
+    
+    The driver's start-up time in seconds is stored on it as `startup_seconds`.
+    """
+    from selenium import webdriver
+    from selenium.common.exceptions import SessionNotCreatedException
+    from selenium.webdriver.chrome.service import Service
+    
+    config = config or Config()
+    start = time.perf_counter()
+    options = chrome_options(config)
+    
+    if config.chromedriver_path:
+        driver = webdriver.Chrome(service=Service(config.chromedriver_path), options=options)
+    else:
+        with _driver_lock:
+            cache = DriverCache(config)
+            try:
+                resolved = cache.resolve()
+            finally:
+                cache.close()
+        try:
+            driver = webdriver.Chrome(service=Service(resolved['path']), options=options)
+        except SessionNotCreatedException:
+            if not resolved['cached']:
+                raise
+            # Chrome was probably updated past the cached driver
+            with _driver_lock:
+                cache = DriverCache(config)
+                try:
+                    resolved = cache.resolve(refresh=True)
+                finally:
+                    cache.close()
+            driver = webdriver.Chrome(service=Service(resolved['path']), options=options)
+    
+    if config.block_resources:
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+        except Exception as e:
+            print(f"  Could not block page resources: {str(e)[:100]}")
+    
+    driver.startup_seconds = round(time.perf_counter() - start, 3)
+    return driver
+
+
+# Per-site readiness checks. A page is 'ready' once the `ready` selector matches.
+# If the document has finished loading and only the `settled` selector matches
+# (empty result list, CAPTCHA, ...), it is 'empty' and there is nothing to wait for.
+PAGE_READY_CHECKS = {
+    'scholar_search': {'ready': '.gs_ai_name', 'settled': '#gsc_sa_ccl, #gs_captcha_ccl'},
+    'scholar_profile': {'ready': '.gsc_a_t', 'settled': '#gsc_a_b, #gs_captcha_ccl'},
+    'google_search': {'ready': 'a[href*="smu.ca"]', 'settled': '#search, #captcha-form'},
+    'smu_profile': {'ready': None, 'settled': 'body'},
+}
+
+PAGE_READY_SCRIPT = """
+var spec = arguments[0];
+if (spec.ready && document.querySelector(spec.ready)) return 'ready';
+if (document.readyState === 'complete' && document.querySelector(spec.settled)) {
+    return spec.ready ? 'empty' : 'ready';
+}
+return null;
+"""
+
+
+# Clicks "Show more" until it is disabled (or the page cap is hit), waiting for
+# new rows after each click, all inside the browser in a single async call.
+SCHOLAR_EXPAND_SCRIPT = """
+var maxPages = arguments[0];
+var done = arguments[arguments.length - 1];
+var pages = 0;
+function rowCount() { return document.querySelectorAll('#gsc_a_b .gsc_a_tr').length; }
+function step() {
+    var button = document.getElementById('gsc_bpf_more');
+    if (!button || button.disabled || pages >= maxPages) { done(rowCount()); return; }
+    var before = rowCount();
+    pages++;
+    button.click();
+    var waited = 0;
+    var timer = setInterval(function () {
+        waited += 100;
+        if (rowCount() > before) { clearInterval(timer); step(); }
+        else if (waited >= 10000) { clearInterval(timer); done(rowCount()); }
+    }, 100);
+}
+step();
+"""
+
+# Extracts interests, every publication row and the citation table in one round trip
+SCHOLAR_EXTRACT_SCRIPT = """
+function text(el) { return el ? el.textContent.trim() : ''; }
+function toInt(value) { var n = parseInt(value.replace(/[^0-9]/g, ''), 10); return isNaN(n) ? null : n; }
+
+var interests = Array.prototype.map.call(
+    document.querySelectorAll('.gsc_prf_inta'), text).filter(Boolean);
+
+var publications = Array.prototype.map.call(
+    document.querySelectorAll('#gsc_a_b .gsc_a_tr'), function (row) {
+        var link = row.querySelector('.gsc_a_at');
+        var gray = row.querySelectorAll('.gs_gray');
+        return {
+            title: text(link),
+            url: link ? link.href : null,
+            authors: text(gray[0]),
+            venue: text(gray[1]),
+            year: toInt(text(row.querySelector('.gsc_a_y'))),
+            citations: toInt(text(row.querySelector('.gsc_a_c'))) || 0
+        };
+    }).filter(function (pub) { return pub.title; });
+
+var table = document.getElementById('gsc_rsb_st');
+var citationTable = {columns: [], metrics: {}};
+if (table) {
+    citationTable.columns = Array.prototype.map.call(
+        table.querySelectorAll('thead th.gsc_rsb_sth'), text).filter(Boolean);
+    Array.prototype.forEach.call(table.querySelectorAll('tbody tr'), function (row) {
+        var values = Array.prototype.map.call(row.querySelectorAll('.gsc_rsb_std'), function (cell) {
+            return toInt(text(cell));
+        });
+        citationTable.metrics[text(row.querySelector('.gsc_rsb_f'))] = values;
+    });
+}
+var firstStat = document.querySelector('.gsc_rsb_std');
+
+return {
+    interests: interests,
+    publications: publications,
+    citation_table: citationTable,
+    citations: text(firstStat) || null
+};
+"""
+
+# Bytes transferred for the current document and everything it has loaded since,
+# as reported by the Navigation and Resource Timing APIs (cross-origin resources
+# without Timing-Allow-Origin report 0)
+PAGE_BYTES_SCRIPT = """
+var entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+var total = 0;
+for (var i = 0; i < entries.length; i++) { total += entries[i].transferSize || 0; }
+return total;
+"""
+
+
+def page_bytes(driver):
+    """Bytes the browser has transferred for the current page, or None if unknown"""
+    try:
+        return driver.execute_script(PAGE_BYTES_SCRIPT)
+    except Exception:
+        return None
+
+
+def wait_for_page(driver, kind, timeout=None, config=None):
+    """Poll the readiness check for `kind` with backoff until it passes or times out
+    
+    Returns 'ready', 'empty' or 'timeout'. A timeout is not an error: the
+    caller extracts whatever has rendered, as it did with the old fixed sleeps.
+    """
+    config = config or Config()
+    spec = PAGE_READY_CHECKS[kind]
+    if timeout is None:
+        timeout = config.ready_timeout(kind)
+    deadline = time.perf_counter() + timeout
+    interval = config.page_ready_poll
+    while True:
+        try:
+            status = driver.execute_script(PAGE_READY_SCRIPT, spec)
+        except Exception:
+            status = None
+        if status:
+            return status
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return 'timeout'
+        time.sleep(min(interval, remaining))
+        interval = min(interval * config.page_ready_backoff, config.page_ready_max_poll)
+
+
+def _percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize_page_timings(timings):
+    """Aggregate page timing records into per-kind latency statistics"""
+    by_kind = {}
+    for timing in timings:
+        by_kind.setdefault(timing['page'], []).append(timing)
+    
+    summary = {}
+    for kind, records in sorted(by_kind.items()):
+        seconds = sorted(r['seconds'] for r in records)
+        sizes = [r['bytes'] for r in records if r.get('bytes') is not None]
+        summary[kind] = {
+            'count': len(seconds),
+            'timeouts': sum(1 for r in records if r['status'] == 'timeout'),
+            'mean': round(sum(seconds) / len(seconds), 3),
+            'p50': round(_percentile(seconds, 50), 3),
+            'p95': round(_percentile(seconds, 95), 3),
+            'max': round(seconds[-1], 3),
+            'kb': round(sum(sizes) / len(sizes) / 1024, 1) if sizes else None,
+        }
+    return summary
+
+
+def print_page_timings(timings):
+    """Print a per-kind page readiness latency table"""
+    summary = summarize_page_timings(timings)
+    if not summary:
+        return
+    print("\n PAGE READINESS (seconds):")
+    print(f"  {'page':<16}{'count':>7}{'timeouts':>10}{'mean':>8}{'p50':>8}{'p95':>8}{'max':>8}{'KB':>9}")
+    for kind, stats in summary.items():
+        kb = '-' if stats['kb'] is None else stats['kb']
+        print(f"  {kind:<16}{stats['count']:>7}{stats['timeouts']:>10}{stats['mean']:>8}"
+              f"{stats['p50']:>8}{stats['p95']:>8}{stats['max']:>8}{kb:>9}")
+
+
+def print_browser_startups(startup_seconds):
+    """Print how long browsers took to start"""
+    if not startup_seconds:
+        return
+    ordered = sorted(startup_seconds)
+    print(f"\n BROWSER STARTUP: {len(ordered)} started, mean {sum(ordered) / len(ordered):.2f}s, "
+          f"p50 {_percentile(ordered, 50):.2f}s, max {ordered[-1]:.2f}s")
+
+
+class Tracer:
+    """
+    Structured timing spans for a run. Wrap a phase in
+    `with tracer.span('name', key=value):`; the block's duration, thread
+    and attributes are recorded, and an exception is recorded as `error`
+    before it propagates. The yielded dict can be updated inside the
+    block to attach results (status, token counts, ...). Spans can be
+    exported as JSON lines or as a Chrome trace (chrome://tracing,
+    Perfetto) and summarized per span name and site.
+    """
+    
+    def __init__(self):
+        self.spans = []
+        self._origin = time.perf_counter()
+        self._started_at = time.time()
+        self._lock = threading.Lock()
+    
+    @contextlib.contextmanager
+    def span(self, name, **attrs):
+        start = time.perf_counter()
+        try:
+            yield attrs
+        except BaseException as e:
+            attrs['error'] = f"{type(e).__name__}: {e}"[:200]
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            record = {'name': name, 'start': round(start - self._origin, 6), 'seconds': round(seconds, 6),
+                      'thread': threading.current_thread().name}
+            record.update(attrs)
+            with self._lock:
+                self.spans.append(record)
+    
+    def summary(self):
+        """Per (span name, site) duration statistics, in seconds"""
+        groups = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            groups.setdefault((span['name'], span.get('site') or ''), []).append(span)
+        
+        summary = {}
+        for key, records in sorted(groups.items()):
+            seconds = sorted(r['seconds'] for r in records)
+            summary[key] = {
+                'count': len(seconds),
+                'errors': sum(1 for r in records if 'error' in r),
+                'total': round(sum(seconds), 3),
+                'mean': round(sum(seconds) / len(seconds), 3),
+                'p50': round(_percentile(seconds, 50), 3),
+                'p95': round(_percentile(seconds, 95), 3),
+                'max': round(seconds[-1], 3),
+            }
+            tokens = [r for r in records if 'prompt_tokens' in r]
+            if tokens:
+                summary[key]['prompt_tokens'] = sum(r['prompt_tokens'] or 0 for r in tokens)
+                summary[key]['completion_tokens'] = sum(r['completion_tokens'] or 0 for r in tokens)
+        return summary
+    
+    def print_summary(self):
+        """Print a per-phase timing table, slowest total first"""
+        summary = self.summary()
+        if not summary:
+            return
+        print("\n PHASE TIMINGS (seconds):")
+        print(f"  {'span':<18}{'site':<24}{'count':>7}{'errors':>8}{'total':>10}{'mean':>8}"
+              f"{'p50':>8}{'p95':>8}{'max':>8}")
+        for (name, site), stats in sorted(summary.items(), key=lambda item: -item[1]['total']):
+            print(f"  {name:<18}{site[:23]:<24}{stats['count']:>7}{stats['errors']:>8}{stats['total']:>10}"
+                  f"{stats['mean']:>8}{stats['p50']:>8}{stats['p95']:>8}{stats['max']:>8}")
+        tokens = {name: stats for (name, _), stats in summary.items() if 'prompt_tokens' in stats}
+        for name, stats in tokens.items():
+            print(f"  {name}: {stats['prompt_tokens']} prompt + {stats['completion_tokens']} completion tokens")
+    
+    def export_jsonl(self, path):
+        """Write one JSON object per span"""
+        with self._lock:
+            spans = list(self.spans)
+        with open(path, 'w', encoding='utf-8') as f:
+            for span in spans:
+                f.write(json.dumps(span) + "\n")
+    
+    def export_chrome_trace(self, path):
+        """Write spans as complete ('X') events in the Chrome trace event format"""
+        with self._lock:
+            spans = list(self.spans)
+        pid = os.getpid()
+        thread_ids = {}
+        events = []
+        for span in spans:
+            tid = thread_ids.setdefault(span['thread'], len(thread_ids) + 1)
+            args = {k: v for k, v in span.items() if k not in ('name', 'start', 'seconds', 'thread')}
+            events.append({'name': span['name'], 'cat': span['name'].split('.')[0], 'ph': 'X',
+                           'ts': round(span['start'] * 1e6), 'dur': round(span['seconds'] * 1e6),
+                           'pid': pid, 'tid': tid, 'args': args})
+        for thread, tid in thread_ids.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread}})
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms',
+                       'otherData': {'started_at': self._started_at}}, f)
+    
+    def export(self, path):
+        """Export to `path`: JSON lines for .jsonl files, a Chrome trace otherwise"""
+        if path.lower().endswith('.jsonl'):
+            self.export_jsonl(path)
+        else:
+            self.export_chrome_trace(path)
+
+
+def driver_is_alive(driver):
+    """Return False if the browser behind `driver` has crashed or gone away"""
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+class BrowserPool:
+    """
+    Bounded pool of headless Chrome drivers for parallel research.
+    Drivers are started lazily up to `size`; a crashed driver is discarded
+    and a fresh one takes its place on the next acquire().
+    """
+    
+    def __init__(self, size=None, config=None, tracer=None):
+        self.config = config or Config()
+        self.tracer = tracer or Tracer()
+        self.size = max(1, size or self.config.browser_pool_size)
+        self._idle = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+        # Start-up time of every browser this pool has started, in seconds
+        self.startup_times = []
+    
+    def acquire(self):
+        """Take an idle driver, starting a new one if the pool is not full"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            start_new = self._created < self.size
+            if start_new:
+                self._created += 1
+        if not start_new:
+            return self._idle.get()
+        try:
+            with self.tracer.span('browser.start'):
+                driver = create_driver(self.config)
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+        self.startup_times.append(driver.startup_seconds)
+        return driver
+    
+    def release(self, driver, broken=False):
+        """Return a driver to the pool, or discard it if it is broken"""
+        if not broken:
+            self._idle.put(driver)
+            return
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        with self._lock:
+            self._created -= 1
+    
+    def close(self):
+        """Quit every idle driver"""
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            with self._lock:
+                self._created -= 1
+    
+    def scrape(self, orchestrator, attempts=2):
+        """Scrape Scholar and SMU for one orchestrator, borrowing a driver only if needed"""
+        for attempt in range(1, attempts + 1):
+            orchestrator.research_data = {}
+            orchestrator.browser_pool = self
+            try:
+                orchestrator.scrape_google_scholar()
+                orchestrator.scrape_smu_website()
+            finally:
+                driver = orchestrator.driver
+                orchestrator.driver = None
+                orchestrator.browser_pool = None
+                alive = driver is None or driver_is_alive(driver)
+                if driver:
+                    self.release(driver, broken=not alive)
+            if alive:
+                return
+            print(f"  Browser crashed while researching {orchestrator.professor_name}, "
+                  f"recycling (attempt {attempt}/{attempts})")
+
+
+class ProfilePageParser(HTMLParser):
+    """
+    Streaming HTML parser for faculty profile pages. Can be fed the page in
+    chunks as it downloads; keeps the visible text, text grouped under each
+    heading, and the page's links.
+    """
+    
+    SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg'}
+    HEADING_TAGS = {'h1', 'h2', 'h3', 'h4'}
+    
+    def __init__(self, base_url):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.title = ''
+        self.text_parts = []
+        self.sections = []
+        self.headings = []
+        self.links = []
+        self._skip_depth = 0
+        self._in_title = False
+        self._heading_parts = None
+        self._heading_tag = None
+        self._link = None
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == 'title':
+            self._in_title = True
+        elif tag in self.HEADING_TAGS:
+            self._heading_parts = []
+            self._heading_tag = tag
+        elif tag == 'a':
+            href = dict(attrs).get('href')
+            if href and not href.startswith(('#', 'javascript:', 'tel:')):
+                self._link = {'url': urljoin(self.base_url, href), 'text': []}
+    
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == 'title':
+            self._in_title = False
+        elif tag in self.HEADING_TAGS and self._heading_parts is not None:
+            heading = ' '.join(self._heading_parts)
+            if heading:
+                self.sections.append((heading, []))
+                self.headings.append((self._heading_tag, heading))
+            self._heading_parts = None
+        elif tag == 'a' and self._link:
+            self.links.append({'url': self._link['url'], 'text': ' '.join(self._link['text'])})
+            self._link = None
+    
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        data = ' '.join(data.split())
+        if not data:
+            return
+        if self._in_title:
+            self.title += data
+            return
+        self.text_parts.append(data)
+        if self._link:
+            self._link['text'].append(data)
+        if self._heading_parts is not None:
+            self._heading_parts.append(data)
+        elif self.sections:
+            self.sections[-1][1].append(data)
+    
+    @property
+    def text(self):
+        return ' '.join(self.text_parts)
+    
+    def section_texts(self):
+        """Map each heading to the text under it (first occurrence wins)"""
+        result = {}
+        for heading, parts in self.sections:
+            if parts and heading not in result:
+                result[heading] = ' '.join(parts)
+        return result
+
+
+class HTTPFetcher:
+    """
+    Minimal keep-alive HTTP(S) client on http.client. Reuses one connection
+    per host, asks for gzip, and streams the decoded body into a parser so
+    pages never have to be held whole in memory.
+    """
+    
+    REDIRECT_CODES = {301, 302, 303, 307, 308}
+    
+    def __init__(self, config=None):
+        config = config or Config()
+        self.timeout = config.http_timeout
+        self.user_agent = config.http_user_agent
+        self._connections = {}
+    
+    def _request(self, url, headers):
+        import http.client
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        request_headers = {
+            'User-Agent': self.user_agent,
+            'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.8',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+        }
+        request_headers.update(headers or {})
+        
+        # A kept-alive connection may have been closed by the server; retry once on a fresh one
+        for attempt in range(2):
+            conn = self._connections.get(key)
+            if conn is None:
+                if parts.scheme == 'https':
+                    conn = http.client.HTTPSConnection(parts.netloc, timeout=self.timeout)
+                else:
+                    conn = http.client.HTTPConnection(parts.netloc, timeout=self.timeout)
+                self._connections[key] = conn
+            try:
+                conn.request('GET', path, headers=request_headers)
+                response = conn.getresponse()
+                if response.will_close:
+                    self._connections.pop(key, None)
+                return response
+            except (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                    http.client.ResponseNotReady, ConnectionResetError, BrokenPipeError):
+                self._discard(key)
+                if attempt:
+                    raise
+            except Exception:
+                # Timeouts, TLS and DNS errors: not worth a retry, but the connection must not be reused
+                self._discard(key)
+                raise
+    
+    def _discard(self, key):
+        conn = self._connections.pop(key, None)
+        if conn:
+            conn.close()
+    
+    def fetch(self, url, parser=None, headers=None, max_redirects=5):
+        """GET `url`, following redirects
+        
+        The decoded body is fed to `parser` if one is given, otherwise it is
+        returned as 'body'. Returns a dict with status, final url, headers and body.
+        """
+        import http.client
+        for _ in range(max_redirects + 1):
+            response = self._request(url, headers)
+            if response.status not in self.REDIRECT_CODES:
+                break
+            response.read()
+            url = urljoin(url, response.getheader('Location', ''))
+        else:
+            raise http.client.HTTPException(f"Too many redirects for {url}")
+        
+        content_encoding = (response.getheader('Content-Encoding') or '').lower()
+        if content_encoding == 'gzip':
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif content_encoding == 'deflate':
+            decompressor = zlib.decompressobj()
+        else:
+            decompressor = None
+        
+        charset = response.headers.get_content_charset() or 'utf-8'
+        try:
+            decoder = codecs.getincrementaldecoder(charset)(errors='replace')
+        except LookupError:
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        
+        body_parts = []
+        
+        def consume(text):
+            if not text:
+                return
+            if parser:
+                parser.feed(text)
+            else:
+                body_parts.append(text)
+        
+        try:
+            while True:
+                chunk = response.read(64 * 1024)
+                if not chunk:
+                    break
+                if decompressor:
+                    chunk = decompressor.decompress(chunk)
+                consume(decoder.decode(chunk))
+            consume(decoder.decode(decompressor.flush() if decompressor else b'', final=True))
+        except Exception:
+            # A half-read response leaves the connection unusable
+            parts = urlsplit(url)
+            self._discard((parts.scheme, parts.netloc))
+            raise
+        if parser:
+            parser.close()
+        
+        return {
+            'status': response.status,
+            'url': url,
+            'headers': {name.lower(): value for name, value in response.getheaders()},
+            'body': None if parser else ''.join(body_parts)
+        }
+    
+    def close(self):
+        for conn in self._connections.values():
+            conn.close()
+        self._connections.clear()
+
+
+_thread_local = threading.local()
+
+
+def get_fetcher(config=None):
+    """Return this thread's HTTPFetcher, so pool workers never share a connection"""
+    fetcher = getattr(_thread_local, 'fetcher', None)
+    if fetcher is None:
+        fetcher = _thread_local.fetcher = HTTPFetcher(config)
+    return fetcher
+
+
+BIO_HEADINGS = ('research', 'biography', 'about')
+RESEARCH_HEADINGS = ('research', 'interest', 'expertise', 'publication', 'teaching')
+
+
+def fetch_profile_page(url, headers=None, config=None):
+    """Fetch and parse a static profile page without a browser
+    
+    Returns (profile, response). `profile` is the SMU research dict, or None
+    if the page has to be rendered with JavaScript (or could not be fetched)
+    and the browser should be used. Pass validator `headers` for a
+    conditional request; a 304 response means a cached copy is still valid.
+    """
+    config = config or Config()
+    parser = ProfilePageParser(url)
+    response = get_fetcher(config).fetch(url, parser=parser, headers=headers)
+    if response['status'] == 304:
+        return None, response
+    if response['status'] != 200:
+        print(f"  Direct fetch returned HTTP {response['status']}")
+        return None, response
+    
+    text = parser.text
+    if len(text) < config.smu_min_text_length:
+        return None, response
+    
+    sections = parser.section_texts()
+    research_sections = {
+        heading: body[:2000] for heading, body in sections.items()
+        if any(word in heading.lower() for word in RESEARCH_HEADINGS)
+    }
+    
+    bio = next((f"{heading} {body}"[:500] for heading, body in sections.items()
+                if any(word in heading.lower() for word in BIO_HEADINGS)), "")
+    if not bio:
+        lowered = text.lower()
+        positions = [lowered.find(word) for word in BIO_HEADINGS if word in lowered]
+        if positions:
+            bio = text[min(positions):min(positions) + 500]
+    
+    seen = set()
+    links = []
+    for link in parser.links:
+        if link['url'] not in seen:
+            seen.add(link['url'])
+            links.append(link)
+    
+    return {
+        'profile_url': response['url'],
+        'title': parser.title,
+        'bio_snippet': bio,
+        'research_sections': research_sections,
+        'links': links[:200],
+        'full_text_length': len(text),
+        'fetched_via': 'http'
+    }, response
+
+
+# Directory crawling: which links lead towards faculty profiles, and what is never a page
+CRAWL_LINK_KEYWORDS = ('faculty', 'people', 'staff', 'directory', 'profile', 'researcher',
+                       'department', 'members', 'team', 'expert')
+CRAWL_SKIP_EXTENSIONS = ('.pdf', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.ico', '.css', '.js',
+                         '.doc', '.docx', '.ppt', '.pptx', '.xls', '.xlsx', '.zip', '.mp3', '.mp4', '.ics')
+TRACKING_PARAMS = ('utm_', 'fbclid', 'gclid', 'mc_cid', 'mc_eid')
+# Shared mailboxes that are never a professor's own address
+GENERIC_MAILBOXES = {'info', 'admin', 'office', 'webmaster', 'reception', 'help', 'support', 'contact',
+                     'enquiries', 'inquiries', 'noreply', 'no-reply', 'web', 'communications'}
+_EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}")
+
+
+def normalize_url(url):
+    """Canonical form of a URL for deduplication: no fragment, no tracking parameters"""
+    parts = urlsplit(url)
+    query = '&'.join(sorted(param for param in parts.query.split('&')
+                            if param and not param.lower().startswith(TRACKING_PARAMS)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', query, ''))
+
+
+def extract_faculty_profile(parser, url):
+    """Return a roster entry if a parsed page is one person's profile, otherwise None
+    
+    A profile has a name heading and one or two personal email addresses;
+    directory listings with many addresses are crawled through, not emitted.
+    """
+    emails = []
+    for link in parser.links:
+        if link['url'].lower().startswith('mailto:'):
+            emails.append(link['url'][7:].split('?')[0].strip())
+    if not emails:
+        emails = _EMAIL_RE.findall(parser.text)
+    personal = list(dict.fromkeys(email.lower() for email in emails
+                                  if email.split('@')[0].lower() not in GENERIC_MAILBOXES))
+    if not personal or len(personal) > 2:
+        return None
+    
+    candidates = [text for tag, text in parser.headings if tag == 'h1']
+    candidates.append(re.split(r"\s+[|–—-]\s+", parser.title)[0])
+    name = next((text for text in candidates
+                 if 1 < len(text.split()) <= 6 and not set(text.lower().split()) & set(CRAWL_LINK_KEYWORDS)),
+                None)
+    if not name:
+        return None
+    
+    scholar_url = next((link['url'] for link in parser.links
+                        if 'scholar.google.' in urlsplit(link['url']).netloc and 'user=' in link['url']), None)
+    interests = next((body[:300] for heading, body in parser.section_texts().items()
+                      if any(word in heading.lower() for word in ('interest', 'expertise', 'research'))), None)
+    return {
+        'professor_name': name,
+        'email': personal[0],
+        'scholar_url': scholar_url,
+        'smu_url': url,
+        'interests': interests,
+    }
+
+
+class CrawlFrontier:
+    """
+    Deduplicated URL frontier with a politeness schedule. URLs are queued
+    per host; next() hands out a URL only when its host has fewer than
+    `host_concurrency` requests in flight and its delay since the last
+    request has passed, so fetch threads spread across hosts instead of
+    hammering one.
+    """
+    
+    def __init__(self, host_concurrency=2, delay=1.0):
+        self.host_concurrency = max(1, host_concurrency)
+        self.delay = delay
+        self._ready = threading.Condition()
+        self._queues = {}
+        self._seen = set()
+        self._active = Counter()
+        self._next_at = {}
+        self._delays = {}
+        self._pending = 0
+        self._closed = False
+    
+    def add(self, url, depth):
+        """Queue `url` unless it was seen before; returns whether it was added"""
+        url = normalize_url(url)
+        with self._ready:
+            if self._closed or url in self._seen:
+                return False
+            self._seen.add(url)
+            self._queues.setdefault(urlsplit(url).netloc, []).append((url, depth))
+            self._pending += 1
+            self._ready.notify()
+        return True
+    
+    def mark_seen(self, url):
+        """Record a URL reached another way (e.g. a redirect target) so it is not queued"""
+        with self._ready:
+            self._seen.add(normalize_url(url))
+    
+    def set_delay(self, host, delay):
+        """Space this host's requests `delay` seconds apart, counting from now"""
+        with self._ready:
+            self._delays[host] = delay
+            self._next_at[host] = time.monotonic() + delay
+    
+    def next(self):
+        """Block until some host may be fetched and return (url, depth); None once the crawl is over"""
+        with self._ready:
+            while True:
+                if self._closed or not self._pending:
+                    return None
+                now = time.monotonic()
+                wake_at = None
+                for host, urls in self._queues.items():
+                    if not urls or self._active[host] >= self.host_concurrency:
+                        continue
+                    ready_at = self._next_at.get(host, 0)
+                    if ready_at <= now:
+                        self._active[host] += 1
+                        self._next_at[host] = now + self._delays.get(host, self.delay)
+                        # Breadth-first within a host: listing pages before the profiles they link to
+                        return urls.pop(0)
+                    wake_at = ready_at if wake_at is None else min(wake_at, ready_at)
+                # Nothing ready: sleep until a host's delay passes or a fetch finishes
+                self._ready.wait(None if wake_at is None else wake_at - now)
+    
+    def done(self, url):
+        """Mark a URL returned by next() as finished"""
+        with self._ready:
+            self._active[urlsplit(url).netloc] -= 1
+            self._pending -= 1
+            self._ready.notify_all()
+    
+    def close(self):
+        """Stop handing out URLs; threads waiting in next() return None"""
+        with self._ready:
+            self._closed = True
+            self._ready.notify_all()
+
+
+class DirectoryCrawler:
+    """
+    Crawls department and faculty listing pages, starting from `seeds`, to
+    discover profile pages without a search engine. Only the seeds' hosts
+    are crawled, only links that look like they lead to people are
+    followed, and robots.txt (including Crawl-delay) is honoured. Each
+    profile found becomes a roster entry: name, email, profile URL,
+    Scholar link and, when the page lists them, research interests.
+    """
+    
+    def __init__(self, seeds, config=None, tracer=None, max_pages=None, max_depth=None):
+        self.config = config or Config()
+        self.tracer = tracer or Tracer()
+        self.seeds = list(seeds)
+        self.max_pages = max_pages or self.config.crawl_max_pages
+        self.max_depth = self.config.crawl_max_depth if max_depth is None else max_depth
+        self.hosts = {urlsplit(normalize_url(seed)).netloc for seed in self.seeds}
+        self.frontier = CrawlFrontier(self.config.crawl_host_concurrency, self.config.crawl_delay)
+        self.profiles = []
+        self.pages = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._robots = {}
+        self._emails = set()
+    
+    def _robots_for(self, url):
+        """This host's robots.txt rules, fetched once; a missing robots.txt allows everything"""
+        parts = urlsplit(url)
+        host = parts.netloc
+        with self._lock:
+            entry = self._robots.setdefault(host, {'lock': threading.Lock(), 'rules': None})
+        with entry['lock']:
+            if entry['rules'] is None:
+                from urllib.robotparser import RobotFileParser
+                rules = RobotFileParser()
+                try:
+                    response = get_fetcher(self.config).fetch(f"{parts.scheme}://{host}/robots.txt")
+                    if response['status'] in (401, 403):
+                        rules.disallow_all = True
+                    elif response['status'] == 200:
+                        rules.parse(response['body'].splitlines())
+                    else:
+                        rules.allow_all = True
+                except Exception:
+                    rules.allow_all = True
+                crawl_delay = rules.crawl_delay(self.config.http_user_agent)
+                if crawl_delay and float(crawl_delay) > self.config.crawl_delay:
+                    self.frontier.set_delay(host, float(crawl_delay))
+                entry['rules'] = rules
+        return entry['rules']
+    
+    def _follow(self, link, depth):
+        url = link['url']
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or parts.netloc.lower() not in self.hosts:
+            return
+        if parts.path.lower().endswith(CRAWL_SKIP_EXTENSIONS):
+            return
+        hint = f"{parts.path} {link['text']}".lower()
+        if any(word in hint for word in CRAWL_LINK_KEYWORDS):
+            self.frontier.add(url, depth)
+    
+    def _visit(self, url, depth):
+        if not self._robots_for(url).can_fetch(self.config.http_user_agent, url):
+            return
+        parser = ProfilePageParser(url)
+        with self.tracer.span('crawl.fetch', site=urlsplit(url).netloc) as span:
+            response = get_fetcher(self.config).fetch(url, parser=parser)
+            span['status'] = response['status']
+        with self._lock:
+            self.pages += 1
+            if self.pages >= self.max_pages:
+                self.frontier.close()
+        if response['status'] != 200 or 'html' not in response['headers'].get('content-type', 'text/html'):
+            return
+        if response['url'] != url:
+            self.frontier.mark_seen(response['url'])
+        
+        profile = extract_faculty_profile(parser, response['url'])
+        if profile:
+            with self._lock:
+                if profile['email'] not in self._emails:
+                    self._emails.add(profile['email'])
+                    self.profiles.append(profile)
+                    print(f"  Found {profile['professor_name']} <{profile['email']}>")
+        if depth < self.max_depth:
+            for link in parser.links:
+                self._follow(link, depth + 1)
+    
+    def _worker(self):
+        while True:
+            item = self.frontier.next()
+            if item is None:
+                return
+            url, depth = item
+            try:
+                self._visit(url, depth)
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                print(f"  Could not crawl {url}: {str(e)[:100]}")
+            finally:
+                self.frontier.done(url)
+    
+    def crawl(self):
+        """Crawl from the seeds and return the roster entries found"""
+        start = time.perf_counter()
+        with self.tracer.span('crawl', seeds=len(self.seeds)):
+            for seed in self.seeds:
+                self.frontier.add(seed, 0)
+            threads = [threading.Thread(target=self._worker, name=f"crawl-{i}", daemon=True)
+                       for i in range(max(1, self.config.crawl_workers))]
+            for thread in threads:
+                thread.start()
+            try:
+                for thread in threads:
+                    while thread.is_alive():
+                        thread.join(0.5)
+            except KeyboardInterrupt:
+                print("\n  Stopping the crawl after the pages in flight...")
+                self.frontier.close()
+                for thread in threads:
+                    thread.join()
+        print(f" Crawled {self.pages} pages on {len(self.hosts)} host(s) in {time.perf_counter() - start:.1f}s: "
+              f"{len(self.profiles)} profiles, {self.errors} errors")
+        return self.profiles
+
+
+def gpt_messages(prompt):
+    """Chat messages for an email drafting request"""
+    return [
+        {"role": "system", "content": "You are an expert at writing professional academic emails."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def record_usage(span, response):
+    """Copy a chat completion's token counts into a tracer span"""
+    usage = getattr(response, 'usage', None)
+    span['prompt_tokens'] = getattr(usage, 'prompt_tokens', None)
+    span['completion_tokens'] = getattr(usage, 'completion_tokens', None)
+
+
+def draft_cache_key(prompt, model):
+    """Content address of a drafting request: everything that shapes GPT's output"""
+    request = {
+        'model': model,
+        'temperature': GPT_TEMPERATURE,
+        'max_tokens': GPT_MAX_TOKENS,
+        'messages': gpt_messages(prompt),
+    }
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def applicant_hash(your_name, your_background, model):
+    """Fingerprint of everything about the applicant that shapes a draft"""
+    return hashlib.sha256(json.dumps([your_name, your_background.strip(), model]).encode('utf-8')).hexdigest()
+
+
+def scholar_newest_first_url(url):
+    """A Scholar profile URL that lists publications newest first"""
+    parts = urlsplit(url)
+    query = [(key, value) for key, value in parse_qsl(parts.query) if key != 'sortby'] + [('sortby', 'pubdate')]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def open_db(path=None):
+    """Open the orchestrator's SQLite database, shareable across threads and processes"""
+    conn = sqlite3.connect(path or Config.db_path, timeout=30, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class ResearchCache:
+    """
+    On-disk cache of scraped research_data sections, keyed by source and
+    profile URL. Entries are fresh for a per-source TTL; stale entries keep
+    their ETag/Last-Modified so static pages can be revalidated with a
+    conditional request. The least recently used entries are evicted once
+    the cache grows past research_cache_max_mb.
+    """
+    
+    # The cache's size is tracked in memory between puts and re-counted every this many,
+    # so writes from other processes are picked up without summing the table on every put
+    RECOUNT_EVERY = 100
+    
+    def __init__(self, config=None):
+        config = config or Config()
+        self.max_bytes = int(config.research_cache_max_mb * 1024 * 1024)
+        self.ttl_seconds = {
+            'google_scholar': config.scholar_cache_ttl_hours * 3600,
+            'smu': config.smu_cache_ttl_hours * 3600,
+        }
+        self._lock = threading.Lock()
+        self._total = None
+        self._puts = 0
+        self._conn = open_db(config.db_path)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS research_cache (
+                    source TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    size INTEGER NOT NULL,
+                    PRIMARY KEY (source, url)
+                )""")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS research_cache_accessed ON research_cache (accessed_at)")
+    
+    def get(self, source, url):
+        """Return {'data', 'fresh', 'etag', 'last_modified'} for a cached entry, or None"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT data, etag, last_modified, fetched_at FROM research_cache WHERE source = ? AND url = ?",
+                (source, url)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE research_cache SET accessed_at = ? WHERE source = ? AND url = ?", (now, source, url))
+        return {
+            'data': json.loads(row['data']),
+            'fresh': now - row['fetched_at'] < self.ttl_seconds.get(source, 0),
+            'etag': row['etag'],
+            'last_modified': row['last_modified'],
+        }
+    
+    def put(self, source, url, data, etag=None, last_modified=None):
+        """Store a research section, then evict old entries if over the size cap"""
+        payload = json.dumps(data)
+        now = time.time()
+        with self._lock, self._conn:
+            replaced = self._conn.execute(
+                "SELECT size FROM research_cache WHERE source = ? AND url = ?", (source, url)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO research_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (source, url, payload, etag, last_modified, now, now, len(payload)))
+            self._puts += 1
+            if self._total is None or self._puts % self.RECOUNT_EVERY == 0:
+                self._total = self._size()
+            else:
+                self._total += len(payload) - (replaced['size'] if replaced else 0)
+            if self._total > self.max_bytes:
+                self._evict()
+    
+    def peek_many(self, source, urls):
+        """Return {url: data} for whichever of `urls` are cached, fresh or not
+        
+        A bulk read for ranking: access times are left alone, so peeking at a
+        large roster does not protect every entry from eviction.
+        """
+        urls = list(dict.fromkeys(url for url in urls if url))
+        found = {}
+        with self._lock:
+            # Stay under SQLite's limit on bound parameters
+            for start in range(0, len(urls), 500):
+                chunk = urls[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT url, data FROM research_cache WHERE source = ? AND url IN ({','.join('?' * len(chunk))})",
+                    (source, *chunk)).fetchall()
+                found.update((row['url'], json.loads(row['data'])) for row in rows)
+        return found
+    
+    def touch(self, source, url):
+        """Mark an entry as freshly revalidated (e.g. after a 304 response)"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE research_cache SET fetched_at = ?, accessed_at = ? WHERE source = ? AND url = ?",
+                (now, now, source, url))
+    
+    def _size(self):
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM research_cache").fetchone()[0]
+    
+    def _evict(self):
+        # Count exactly before deleting anything: other processes may have written or evicted
+        total = self._size()
+        self._total = total
+        if total <= self.max_bytes:
+            return
+        # Free a tenth of the cap at once, so a full cache is not evicted from on every put
+        target = self.max_bytes * 0.9
+        while total > target:
+            rows = self._conn.execute(
+                "SELECT source, url, size FROM research_cache ORDER BY accessed_at LIMIT 100").fetchall()
+            if not rows:
+                break
+            for row in rows:
+                if total <= target:
+                    break
+                self._conn.execute(
+                    "DELETE FROM research_cache WHERE source = ? AND url = ?", (row['source'], row['url']))
+                total -= row['size']
+        self._total = total
+    
+    def close(self):
+        self._conn.close()
+
+
+class DraftCache:
+    """
+    Content-addressed store of GPT drafts. The key is a hash of the full
+    request (prompt, model, temperature, max_tokens), so a rerun with the
+    same professor, background and research reuses the earlier draft.
+    Least recently used drafts are evicted past draft_cache_max_entries.
+    """
+    
+    def __init__(self, config=None):
+        config = config or Config()
+        self.model = config.gpt_model
+        self.max_entries = config.draft_cache_max_entries
+        self._lock = threading.Lock()
+        self._conn = open_db(config.db_path)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS draft_cache (
+                    key TEXT PRIMARY KEY,
+                    body TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )""")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS draft_cache_accessed ON draft_cache (accessed_at)")
+    
+    def get(self, prompt):
+        """Return the cached draft body for `prompt`, or None"""
+        key = draft_cache_key(prompt, self.model)
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT body FROM draft_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE draft_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return row['body']
+    
+    def put(self, prompt, body):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO draft_cache VALUES (?, ?, ?, ?, ?)",
+                (draft_cache_key(prompt, self.model), body, self.model, now, now))
+            self._conn.execute("""
+                DELETE FROM draft_cache WHERE key IN (
+                    SELECT key FROM draft_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )""", (self.max_entries,))
+    
+    def close(self):
+        self._conn.close()
+
+
+def normalize_title(title):
+    return ' '.join((title or '').lower().split())
+
+
+def research_snapshot(research_data):
+    """The parts of a professor's research that matter for a draft, in canonical form
+    
+    Interests, publications (with their citation counts) and total citations
+    from Scholar. Returns None when there is nothing to compare, e.g. after a
+    failed or skipped scrape, so a bad run never looks like everything vanished.
+    """
+    scholar = research_data.get('google_scholar') or {}
+    interests = sorted({' '.join(interest.lower().split()) for interest in scholar.get('interests') or []})
+    publications = {}
+    for pub in scholar.get('publications') or []:
+        publications[normalize_title(pub.get('title'))] = pub.get('citations') or 0
+    if not publications:
+        publications = {normalize_title(title): 0 for title in scholar.get('recent_publications') or []}
+    publications.pop('', None)
+    if not interests and not publications:
+        return None
+    return {'interests': interests, 'publications': publications, 'citations': scholar.get('citations')}
+
+
+def snapshot_hash(snapshot):
+    return hashlib.sha256(json.dumps(snapshot, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def diff_snapshots(old, new):
+    """What changed between two research snapshots
+    
+    New publications and any change of interests are material (worth a new
+    draft); citation counts moving and publications disappearing are not.
+    """
+    old_interests, new_interests = set(old['interests']), set(new['interests'])
+    diff = {
+        'interests_added': sorted(new_interests - old_interests),
+        'interests_removed': sorted(old_interests - new_interests),
+        'publications_added': sorted(set(new['publications']) - set(old['publications'])),
+        'publications_removed': sorted(set(old['publications']) - set(new['publications'])),
+        'citations': [old['citations'], new['citations']] if old['citations'] != new['citations'] else None,
+    }
+    diff['material'] = bool(diff['interests_added'] or diff['interests_removed'] or diff['publications_added'])
+    return diff
+
+
+def describe_diff(diff):
+    """One-line summary of a snapshot diff"""
+    parts = []
+    for key, label in (('publications_added', 'new publication'), ('interests_added', 'new interest'),
+                       ('interests_removed', 'dropped interest'), ('publications_removed', 'removed publication')):
+        if diff[key]:
+            parts.append(f"{len(diff[key])} {label}{'s' if len(diff[key]) > 1 else ''}")
+    if diff['citations']:
+        parts.append(f"citations {diff['citations'][0]} -> {diff['citations'][1]}")
+    return ', '.join(parts) or 'no change'
+
+
+class ResearchSnapshots:
+    """
+    History of each professor's research, keyed by email: a content hash
+    and canonical snapshot per change, with the diff against the snapshot
+    before it. The GPT draft written for a professor is kept with the
+    snapshot it was based on, so a re-run reuses it until the research
+    changes materially (see diff_snapshots) or the applicant's details
+    change. Template fallbacks are never kept.
+    """
+    
+    def __init__(self, config=None):
+        config = config or Config()
+        self._lock = threading.Lock()
+        self._conn = open_db(config.db_path)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS research_snapshots (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    email TEXT NOT NULL,
+                    taken_at REAL NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    snapshot TEXT NOT NULL,
+                    diff TEXT,
+                    material INTEGER NOT NULL
+                )""")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS research_snapshots_email ON research_snapshots (email, id)")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS snapshot_drafts (
+                    email TEXT PRIMARY KEY,
+                    applicant_hash TEXT NOT NULL,
+                    snapshot TEXT NOT NULL,
+                    drafted_email TEXT NOT NULL,
+                    drafted_at REAL NOT NULL
+                )""")
+    
+    def latest(self, email):
+        """The most recent snapshot for `email`, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT snapshot FROM research_snapshots WHERE email = ? ORDER BY id DESC LIMIT 1",
+                (email.lower(),)).fetchone()
+        return json.loads(row['snapshot']) if row else None
+    
+    def record(self, email, research_data):
+        """Snapshot freshly scraped research and return its diff against the previous one
+        
+        Returns None when the research has nothing to snapshot, a diff with
+        'first' set for a professor seen for the first time, and otherwise
+        the diff (with 'changed' False when the content hash is unchanged).
+        Unchanged research adds no row, so history grows only with changes.
+        """
+        snapshot = research_snapshot(research_data)
+        if snapshot is None:
+            return None
+        email = email.lower()
+        content_hash = snapshot_hash(snapshot)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT content_hash, snapshot FROM research_snapshots WHERE email = ? ORDER BY id DESC LIMIT 1",
+                (email,)).fetchone()
+            if row and row['content_hash'] == content_hash:
+                return {'changed': False, 'material': False}
+            if row:
+                diff = dict(diff_snapshots(json.loads(row['snapshot']), snapshot), changed=True)
+            else:
+                diff = {'first': True, 'changed': True, 'material': True}
+            self._conn.execute(
+                "INSERT INTO research_snapshots (email, taken_at, content_hash, snapshot, diff, material) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (email, time.time(), content_hash, json.dumps(snapshot), json.dumps(diff), int(diff['material'])))
+        return diff
+    
+    def reusable_draft(self, email, applicant_hash, research_data):
+        """The last draft for `email` if neither the research nor the applicant changed materially since"""
+        snapshot = research_snapshot(research_data)
+        if snapshot is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT applicant_hash, snapshot, drafted_email FROM snapshot_drafts WHERE email = ?",
+                (email.lower(),)).fetchone()
+        if row is None or row['applicant_hash'] != applicant_hash:
+            return None
+        if diff_snapshots(json.loads(row['snapshot']), snapshot)['material']:
+            return None
+        return json.loads(row['drafted_email'])
+    
+    def store_draft(self, email, applicant_hash, research_data, drafted_email):
+        snapshot = research_snapshot(research_data)
+        if snapshot is None or not drafted_email:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshot_drafts VALUES (?, ?, ?, ?, ?)",
+                (email.lower(), applicant_hash, json.dumps(snapshot), json.dumps(drafted_email), time.time()))
+    
+    def history(self, email):
+        """Every recorded change for `email`, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT taken_at, content_hash, diff FROM research_snapshots WHERE email = ? ORDER BY id",
+                (email.lower(),)).fetchall()
+        return [{'taken_at': row['taken_at'], 'content_hash': row['content_hash'],
+                 'diff': json.loads(row['diff']) if row['diff'] else None} for row in rows]
+    
+    def close(self):
+        self._conn.close()
+
+
+class Publication:
+    """One publication: title (str), year (int or None) and citation count (int)"""
+    
+    __slots__ = ('title', 'year', 'citations')
+    
+    def __init__(self, title, year=None, citations=0):
+        self.title = title
+        self.year = int(year) if year else None
+        self.citations = int(citations or 0)
+    
+    def __eq__(self, other):
+        return isinstance(other, Publication) and \
+            (self.title, self.year, self.citations) == (other.title, other.year, other.citations)
+    
+    def __repr__(self):
+        return f"Publication({self.title!r}, {self.year!r}, {self.citations!r})"
+
+
+class ProfessorRecord:
+    """
+    A professor's research as a compact record: name, email, profile URLs,
+    interests (interned strings), publications (Publication records) and
+    total citations (int or None). recorded_at is when it was researched.
+    """
+    
+    __slots__ = ('name', 'email', 'scholar_url', 'smu_url', 'interests', 'publications', 'citations',
+                 'recorded_at')
+    
+    def __init__(self, name, email, scholar_url=None, smu_url=None, interests=(), publications=(),
+                 citations=None, recorded_at=None):
+        self.name = name
+        self.email = email.lower()
+        self.scholar_url = scholar_url
+        self.smu_url = smu_url
+        # The same few thousand interests recur across a faculty: share one string object for each
+        self.interests = tuple(sys.intern(' '.join(interest.split())) for interest in interests)
+        self.publications = tuple(publications)
+        self.citations = _citation_count(citations)
+        self.recorded_at = recorded_at or time.time()
+    
+    @classmethod
+    def from_research(cls, name, email, research_data):
+        """Build a record from an orchestrator's research_data, or None if Scholar found nothing"""
+        scholar = research_data.get('google_scholar') or {}
+        publications = [Publication(pub.get('title'), pub.get('year'), pub.get('citations'))
+                        for pub in scholar.get('publications') or [] if pub.get('title')]
+        if not publications:
+            publications = [Publication(title) for title in scholar.get('recent_publications') or [] if title]
+        interests = scholar.get('interests') or []
+        if not interests and not publications:
+            return None
+        return cls(name, email, scholar_url=scholar.get('profile_url'),
+                   smu_url=(research_data.get('smu') or {}).get('profile_url'),
+                   interests=interests, publications=publications, citations=scholar.get('citations'))
+    
+    def same_research(self, other):
+        """Whether two records hold the same research, whenever each was recorded"""
+        return other is not None and (self.interests, self.publications, self.citations) == \
+            (other.interests, other.publications, other.citations)
+    
+    def research_text(self):
+        """Interests and publication titles as one string, for ranking"""
+        titles = [pub.title for pub in self.publications[:RANK_MAX_TITLES]]
+        return '\n'.join(list(self.interests) + titles)
+    
+    def __repr__(self):
+        return (f"ProfessorRecord({self.name!r}, {self.email!r}, {len(self.interests)} interests, "
+                f"{len(self.publications)} publications)")
+
+
+def _citation_count(value):
+    if value is None or value == '':
+        return None
+    try:
+        return int(str(value).replace(',', ''))
+    except ValueError:
+        return None
+
+
+def _email_key(email):
+    """Signed 64-bit hash of an address, so rows can be matched without reading strings"""
+    return int.from_bytes(hashlib.blake2b(email.lower().encode('utf-8'), digest_size=8).digest(), 'little',
+                          signed=True)
+
+
+class Column:
+    """
+    One append-only column of fixed-width values (an array typecode) in its
+    own file. Reads go through a read-only memory map that is remapped after
+    the column grows, so a column is never loaded into memory whole. The
+    length is tracked in memory; refresh() re-reads it after another
+    process appended.
+    """
+    
+    def __init__(self, path, typecode):
+        self.path = path
+        self.typecode = typecode
+        self.itemsize = array.array(typecode).itemsize
+        open(path, 'ab').close()
+        self._length = os.path.getsize(path) // self.itemsize
+        self._view = None
+    
+    def __len__(self):
+        return self._length
+    
+    def refresh(self):
+        self._length = os.path.getsize(self.path) // self.itemsize
+    
+    def append(self, values):
+        """Append values and return the number of values in the column afterwards"""
+        data = array.array(self.typecode, values)
+        if data:
+            with open(self.path, 'ab') as f:
+                f.write(data.tobytes())
+            self._length += len(data)
+        return self._length
+    
+    def close(self):
+        """Drop the memory map; view() maps the file again if the column is used after this"""
+        self._view = None
+    
+    def truncate(self, length):
+        with open(self.path, 'r+b') as f:
+            f.truncate(length * self.itemsize)
+        self._length = length
+        self._view = None
+    
+    def view(self):
+        """A memoryview of every value in the column"""
+        if self._view is None or len(self._view) != self._length:
+            if self._length:
+                with open(self.path, 'rb') as f:
+                    mapped = mmap.mmap(f.fileno(), self._length * self.itemsize, access=mmap.ACCESS_READ)
+                self._view = memoryview(mapped).cast(self.typecode)
+            else:
+                self._view = memoryview(array.array(self.typecode))
+        return self._view
+
+
+class StringColumn:
+    """Append-only strings: UTF-8 bytes in one file, end offsets in a Column beside it"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.ends = Column(f"{path}.end", 'Q')
+        open(path, 'ab').close()
+        self._data = None
+        self._mapped_size = -1
+    
+    def __len__(self):
+        return len(self.ends)
+    
+    def refresh(self):
+        self.ends.refresh()
+    
+    def append(self, strings):
+        """Append strings and return the id of the first one"""
+        first = len(self.ends)
+        encoded = [string.encode('utf-8') for string in strings]
+        if not encoded:
+            return first
+        with open(self.path, 'ab') as f:
+            offset = f.tell()
+            f.write(b''.join(encoded))
+        ends = []
+        for data in encoded:
+            offset += len(data)
+            ends.append(offset)
+        self.ends.append(ends)
+        return first
+    
+    def close(self):
+        self.ends.close()
+        self._data = None
+        self._mapped_size = -1
+    
+    def recover(self):
+        """Drop bytes an interrupted append wrote past the last recorded string"""
+        ends = self.ends.view()
+        with open(self.path, 'r+b') as f:
+            f.truncate(ends[-1] if len(ends) else 0)
+    
+    def __getitem__(self, index):
+        ends = self.ends.view()
+        start, end = ends[index - 1] if index else 0, ends[index]
+        if start == end:
+            return ''
+        if end > self._mapped_size:
+            with open(self.path, 'rb') as f:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_size = len(self._data)
+        return self._data[start:end].decode('utf-8')
+
+
+class ResearchStore:
+    """
+    Append-only, columnar store of ProfessorRecords for large rosters.
+    
+    Each field is its own file under `research_store_path`: one row per
+    recorded professor (email hash, name, email, URLs, citations, time and
+    the end offsets of its interests and publications), one row per
+    interest entry (interned vocabulary id, professor row) and one per
+    publication (title, year, citations). Columns are memory-mapped, so
+    queries such as professors_with_interest() scan fixed-width numbers
+    and only decode the rows they return. Re-recording a professor appends
+    a new row; the latest row per email wins. Appends are written
+    children-first and the professor columns are trimmed to a common
+    length on open, so a crash mid-append never exposes a partial row.
+    Writers in any number of processes take turns under an exclusive lock
+    on the store's lock file and catch up with each other's rows first.
+    Readers see the rows that existed when they opened (or last wrote).
+    """
+    
+    PROFESSOR_COLUMNS = {
+        'key': 'q', 'name': 'q', 'email': 'q', 'scholar_url': 'q', 'smu_url': 'q',
+        'citations': 'q', 'interests_end': 'Q', 'publications_end': 'Q', 'recorded_at': 'd',
+    }
+    # Stored for a missing URL or citation count
+    NONE = -1
+    
+    def __init__(self, config=None):
+        config = config or Config()
+        self.path = config.research_store_path
+        os.makedirs(self.path, exist_ok=True)
+        self._lock = threading.Lock()
+        column = lambda name, typecode: Column(os.path.join(self.path, f"{name}.col"), typecode)
+        self.professors = {name: column(f"professor.{name}", typecode)
+                           for name, typecode in self.PROFESSOR_COLUMNS.items()}
+        self.interest_ids = column('interest.id', 'I')
+        self.interest_rows = column('interest.professor', 'I')
+        self.publication_titles = column('publication.title', 'Q')
+        self.publication_years = column('publication.year', 'i')
+        self.publication_citations = column('publication.citations', 'i')
+        self.strings = StringColumn(os.path.join(self.path, 'strings.dat'))
+        self.vocabulary = StringColumn(os.path.join(self.path, 'interests.dat'))
+        # The interest vocabulary is small enough to keep decoded (and interned) in memory
+        self._interest_names = []
+        self._interest_ids = {}
+        self._latest = {}
+        self._rows = 0
+        with self._writer_lock():
+            self._recover()
+            self._refresh()
+    
+    @contextlib.contextmanager
+    def _writer_lock(self):
+        """Hold the store's exclusive write lock, shared by every process using this directory"""
+        import fcntl
+        with self._lock, open(os.path.join(self.path, 'lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _refresh(self):
+        """Catch up with rows and interests other writers appended (call with the write lock held)"""
+        for column in self._columns():
+            column.refresh()
+        for i in range(len(self._interest_names), len(self.vocabulary)):
+            name = sys.intern(self.vocabulary[i])
+            self._interest_names.append(name)
+            self._interest_ids[name.lower()] = i
+        keys = self.professors['key'].view()
+        for row in range(self._rows, len(keys)):
+            self._latest[keys[row]] = row
+        self._rows = len(keys)
+    
+    def _columns(self):
+        return [*self.professors.values(), self.interest_ids, self.interest_rows, self.publication_titles,
+                self.publication_years, self.publication_citations, self.strings, self.vocabulary]
+    
+    def _recover(self):
+        """Drop whatever an interrupted append left past the last complete professor row"""
+        # Lengths from before the write lock was taken may be stale: never truncate by them
+        for column in self._columns():
+            column.refresh()
+        rows = min(len(column) for column in self.professors.values())
+        for column in self.professors.values():
+            if len(column) > rows:
+                column.truncate(rows)
+        interests = self.professors['interests_end'].view()[rows - 1] if rows else 0
+        publications = self.professors['publications_end'].view()[rows - 1] if rows else 0
+        for column, length in ((self.interest_ids, interests), (self.interest_rows, interests),
+                               (self.publication_titles, publications), (self.publication_years, publications),
+                               (self.publication_citations, publications)):
+            if len(column) > length:
+                column.truncate(length)
+        self.strings.recover()
+        self.vocabulary.recover()
+    
+    def __len__(self):
+        """Number of distinct professors"""
+        return len(self._latest)
+    
+    def close(self):
+        """Release the columns' memory maps"""
+        with self._lock:
+            for column in self._columns():
+                column.close()
+    
+    def _interest_id(self, interest):
+        key = interest.lower()
+        if key not in self._interest_ids:
+            self._interest_ids[key] = self.vocabulary.append([interest])
+            self._interest_names.append(interest)
+        return self._interest_ids[key]
+    
+    def append(self, record):
+        """Store a record unless it matches the professor's latest one; returns its row"""
+        return self.extend([record])[0]
+    
+    def extend(self, records):
+        """Store records, skipping any that match their professor's latest one; returns their rows
+        
+        Each column file is written once per call, so bulk loads should pass
+        many records at a time.
+        """
+        with self._writer_lock():
+            self._refresh()
+            base = len(self.professors['key'])
+            first_string = len(self.strings)
+            strings = []
+            
+            def string_id(value):
+                if value is None:
+                    return self.NONE
+                strings.append(value)
+                return first_string + len(strings) - 1
+            
+            values = {name: [] for name in self.PROFESSOR_COLUMNS}
+            titles, years, citations, interest_ids, interest_rows = [], [], [], [], []
+            publications_end = len(self.publication_citations)
+            interests_end = len(self.interest_ids)
+            rows, batch = [], {}
+            for record in records:
+                key = _email_key(record.email)
+                if key in batch:
+                    previous_row, previous = batch[key]
+                elif key in self._latest:
+                    previous_row = self._latest[key]
+                    previous = self._read(previous_row)
+                else:
+                    previous_row = previous = None
+                if record.same_research(previous):
+                    rows.append(previous_row)
+                    continue
+                row = base + len(values['key'])
+                for pub in record.publications:
+                    titles.append(string_id(pub.title))
+                    years.append(pub.year or 0)
+                    citations.append(pub.citations)
+                for interest in record.interests:
+                    interest_ids.append(self._interest_id(interest))
+                    interest_rows.append(row)
+                publications_end += len(record.publications)
+                interests_end += len(record.interests)
+                for name, value in (('key', key), ('name', string_id(record.name)),
+                                    ('email', string_id(record.email)),
+                                    ('scholar_url', string_id(record.scholar_url)),
+                                    ('smu_url', string_id(record.smu_url)),
+                                    ('citations', self.NONE if record.citations is None else record.citations),
+                                    ('interests_end', interests_end), ('publications_end', publications_end),
+                                    ('recorded_at', record.recorded_at)):
+                    values[name].append(value)
+                batch[key] = (row, record)
+                rows.append(row)
+            
+            # Children first: the professor columns make the new rows visible
+            self.strings.append(strings)
+            self.publication_titles.append(titles)
+            self.publication_years.append(years)
+            self.publication_citations.append(citations)
+            self.interest_rows.append(interest_rows)
+            self.interest_ids.append(interest_ids)
+            for name, column in self.professors.items():
+                column.append(values[name])
+            self._latest.update((key, row) for key, (row, _) in batch.items())
+            self._rows = len(self.professors['key'])
+            return rows
+    
+    def _read(self, row, max_publications=None):
+        columns = {name: column.view() for name, column in self.professors.items()}
+        string = lambda value: None if value == self.NONE else self.strings[value]
+        interests_start = columns['interests_end'][row - 1] if row else 0
+        publications_start = columns['publications_end'][row - 1] if row else 0
+        interest_ids = self.interest_ids.view()[interests_start:columns['interests_end'][row]]
+        titles = self.publication_titles.view()
+        years = self.publication_years.view()
+        citations = self.publication_citations.view()
+        publications_end = columns['publications_end'][row]
+        if max_publications is not None:
+            publications_end = min(publications_end, publications_start + max_publications)
+        publications = [Publication(self.strings[titles[i]], years[i], citations[i])
+                        for i in range(publications_start, publications_end)]
+        return ProfessorRecord(
+            string(columns['name'][row]), string(columns['email'][row]),
+            scholar_url=string(columns['scholar_url'][row]), smu_url=string(columns['smu_url'][row]),
+            interests=[self._interest_names[i] for i in interest_ids], publications=publications,
+            citations=None if columns['citations'][row] == self.NONE else columns['citations'][row],
+            recorded_at=columns['recorded_at'][row])
+    
+    def get(self, email, max_publications=None):
+        """The latest record for `email` (with at most `max_publications` publications), or None"""
+        row = self._latest.get(_email_key(email))
+        return None if row is None else self._read(row, max_publications)
+    
+    def professors_with_interest(self, *interests):
+        """Latest records of professors listing every one of `interests` (case-insensitive)"""
+        wanted = {self._interest_ids.get(' '.join(interest.split()).lower()) for interest in interests}
+        if None in wanted or not wanted:
+            return []
+        latest = set(self._latest.values())
+        matches = {}
+        for interest_id, row in zip(self.interest_ids.view(), self.interest_rows.view()):
+            if interest_id in wanted and row in latest:
+                matches.setdefault(row, set()).add(interest_id)
+        return [self._read(row) for row in sorted(matches) if len(matches[row]) == len(wanted)]
+    
+    def interests(self):
+        """Every interest in the store with the number of professors listing it, most common first"""
+        latest = set(self._latest.values())
+        counts = Counter(interest_id for interest_id, row in zip(self.interest_ids.view(), self.interest_rows.view())
+                         if row in latest)
+        return [(self._interest_names[interest_id], count) for interest_id, count in counts.most_common()]
+
+
+def smtp_connect(sender_email, app_password, host='smtp.gmail.com', port=465, use_ssl=True, tracer=None):
+    """Open an authenticated SMTP connection (Gmail over SSL by default)"""
+    import smtplib
+    import ssl
+    tracer = tracer or Tracer()
+    with tracer.span('smtp.connect', site=host):
+        if use_ssl:
+            context = ssl._create_unverified_context()
+            server = smtplib.SMTP_SSL(host, port, context=context)
+        else:
+            server = smtplib.SMTP(host, port)
+            server.ehlo()
+    # Local test relays usually don't offer AUTH
+    if use_ssl or server.has_extn('auth'):
+        with tracer.span('smtp.login', site=host):
+            server.login(sender_email, app_password)
+    return server
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate_per_minute` tokens refill continuously up to `capacity`"""
+    
+    def __init__(self, rate_per_minute, capacity=1):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Take one token, sleeping until one is available. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class SMTPSender:
+    """
+    Sends a queue of messages over one authenticated SMTP connection.
+    Reconnects transparently when the server drops the connection, paces
+    sends with a token bucket (send_rate_per_minute) and stops at
+    send_daily_limit. With a SentIndex, the limit counts every message
+    sent today by any run; without one, only this sender's. Messages that
+    could not be sent are recorded in `failures` with their error, and
+    with the SentIndex's `skip_reason` if they were refused rather than
+    failing to send.
+    """
+    
+    def __init__(self, sender_email, app_password, config=None, sent_index=None, tracer=None):
+        config = config or Config()
+        self.tracer = tracer or Tracer()
+        self.sender_email = sender_email
+        self.app_password = app_password
+        self.host = config.smtp_host
+        self.port = config.smtp_port
+        self.use_ssl = config.smtp_ssl
+        self.daily_limit = config.send_daily_limit
+        self.max_attempts = config.send_max_attempts
+        # Optional SentIndex: checked before each send and updated after it
+        self.sent_index = sent_index
+        self.bucket = TokenBucket(config.send_rate_per_minute)
+        self.server = None
+        self.failures = []
+        self.sent_count = 0
+        self.connects = 0
+        self._day = time.strftime('%Y-%m-%d')
+        self._sent_today = 0
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def _connection(self):
+        if self.server is None:
+            self.server = smtp_connect(self.sender_email, self.app_password, host=self.host,
+                                       port=self.port, use_ssl=self.use_ssl, tracer=self.tracer)
+            self.connects += 1
+        return self.server
+    
+    def close(self):
+        if self.server:
+            try:
+                self.server.quit()
+            except Exception:
+                pass
+            self.server = None
+    
+    def _quota_left(self):
+        if self.sent_index:
+            midnight = time.mktime(time.localtime()[:3] + (0, 0, 0, 0, 0, -1))
+            return self.daily_limit - self.sent_index.sent_since(midnight)
+        today = time.strftime('%Y-%m-%d')
+        if today != self._day:
+            self._day = today
+            self._sent_today = 0
+        return self.daily_limit - self._sent_today
+    
+    def _record_failure(self, msg, error, skip_reason=None):
+        self.failures.append({'to': msg['To'], 'subject': msg['Subject'], 'error': str(error),
+                              'skip_reason': skip_reason, 'message': msg})
+    
+    def send(self, msg, professor_name=None):
+        """Send one message, reconnecting and retrying on dropped connections
+        
+        Returns True on success. On failure the message is recorded in
+        `failures` and False is returned.
+        """
+        import smtplib
+        import ssl
+        # Errors after which a fresh connection is worth another try. A refused
+        # greeting (SMTPConnectError) is a reply like any other: 4xx retries, 5xx does not
+        reconnect_errors = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError, ssl.SSLError)
+        reason = self.sent_index.skip_reason(msg['To']) if self.sent_index else None
+        if reason:
+            self._record_failure(msg, f"not sent: {reason}", skip_reason=reason)
+            return False
+        if self._quota_left() <= 0:
+            self._record_failure(msg, f"daily send limit of {self.daily_limit} reached")
+            return False
+        with self.tracer.span('smtp.throttle', site=self.host):
+            self.bucket.acquire()
+        
+        error = None
+        for attempt in range(self.max_attempts):
+            try:
+                server = self._connection()
+                with self.tracer.span('smtp.send', site=self.host, professor=professor_name, attempt=attempt):
+                    server.send_message(msg)
+                self.sent_count += 1
+                self._sent_today += 1
+                if self.sent_index:
+                    self.sent_index.record(msg, professor_name)
+                return True
+            except smtplib.SMTPResponseException as e:
+                # 4xx replies are temporary: reconnect and retry; 5xx are permanent
+                error = e
+                self.close()
+                if e.smtp_code >= 500:
+                    break
+            except reconnect_errors as e:
+                error = e
+                self.close()
+            except smtplib.SMTPException as e:
+                error = e
+                break
+            # Reconnect at once the first time, then back off; never wait after the last attempt
+            if 0 < attempt < self.max_attempts - 1:
+                time.sleep(min(2 ** attempt, 10))
+        
+        self._record_failure(msg, error)
+        return False
+
+
+def show_draft(research_summary, drafted_email, recipient):
+    """Print a draft with its research summary for human review"""
+    print("\n" + "="*80)
+    print(" DRAFTED EMAIL FOR YOUR APPROVAL")
+    print("="*80)
+    
+    print(f"\n RESEARCH SUMMARY:")
+    print(json.dumps(research_summary, indent=2))
+    
+    print(f"\n" + "-"*80)
+    print(f"SUBJECT: {drafted_email['subject']}")
+    print(f"-"*80)
+    print(drafted_email['body'])
+    print("-"*80)
+    
+    print(f"\n This email will be sent to: {recipient}")
+
+
+def read_edited_body():
+    """Read a replacement email body from the terminal, ending at a line 'END'"""
+    print("\n  Enter your edited email body (type 'END' on a new line when done):")
+    lines = []
+    while True:
+        line = input()
+        if line == 'END':
+            break
+        lines.append(line)
+    body = '\n'.join(lines)
+    
+    print("\n" + "-"*80)
+    print("UPDATED EMAIL:")
+    print(body)
+    print("-"*80)
+    return body
 
 
 class PhDEmailOrchestrator:
@@ -56,46 +2355,150 @@ class PhDEmailOrchestrator:
     4. Email sending
     """
     
-    def __init__(self, professor_name=PROFESSOR_NAME, test_email=TARGET_EMAIL):
+    def __init__(self, professor_name=None, test_email=None, scholar_url=None, smu_url=None, driver=None,
+                 research_cache=None, refresh_research=False, draft_cache=None, regenerate_draft=False,
+                 config=None, tracer=None):
+        self.config = config or Config()
+        # Timing spans for every phase; a campaign shares one Tracer between orchestrators
+        self.tracer = tracer or Tracer()
         self.professor_name = professor_name
         self.test_email = test_email
+        self.scholar_url = scholar_url
+        self.smu_url = smu_url
         self.research_data = {}
         self.drafted_email = None
-        self.driver = None
+        # 'gpt' or 'template': only GPT drafts are kept for reuse across runs
+        self.drafted_by = None
+        self.approved = False
+        self.sent = False
+        self.page_timings = []
+        self.driver = driver
+        # Parallel workers cannot prompt, so they skip anything needing manual input
+        self.interactive = True
+        # A driver passed in is shared (e.g. by a campaign) and must not be closed here
+        self.owns_driver = driver is None
+        # Pool to borrow a driver from when a page needs a browser (set by BrowserPool.scrape)
+        self.browser_pool = None
+        # Optional ResearchCache; refresh_research re-scrapes but still updates the cache
+        self.research_cache = research_cache
+        self.refresh_research = refresh_research
+        # Optional DraftCache; regenerate_draft always calls GPT (and replaces the cached draft)
+        self.draft_cache = draft_cache
+        self.regenerate_draft = regenerate_draft
+        # Optional RunJournal: completed phases are checkpointed and skipped on resume
+        self.journal = None
+        # Optional SentIndex used by one-off sends (campaigns pass it via their SMTPSender)
+        self.sent_index = None
+        # Optional ResearchSnapshots: research changes are recorded and drafts reused until one is material
+        self.snapshots = None
+        self.research_changes = None
+        # Optional ResearchStore: each professor's research is kept as a compact record for ranking and queries
+        self.research_store = None
         
     def setup_browser(self):
         """Initialize Selenium WebDriver with Chrome"""
+        if self.driver:
+            return
         print(" Setting up browser...")
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
-        print(" Browser ready!")
+        with self._span('browser.start'):
+            self.driver = create_driver(self.config)
+        self.owns_driver = True
+        print(f" Browser ready in {self.driver.startup_seconds:.1f}s!")
         
+    def _ensure_browser(self):
+        """Start (or borrow from the pool) a browser the first time a page needs one"""
+        if self.driver:
+            return
+        if self.browser_pool:
+            with self._span('browser.acquire'):
+                self.driver = self.browser_pool.acquire()
+            self.owns_driver = False
+        else:
+            self.setup_browser()
+    
+    def _load_page(self, url, kind):
+        """Navigate to `url` and wait until the page kind's readiness check passes"""
+        self._ensure_browser()
+        site = urlsplit(url).netloc
+        start = time.perf_counter()
+        with self._span('page.get', site=site, page=kind):
+            self.driver.get(url)
+        with self._span('page.ready', site=site, page=kind) as span:
+            status = span['status'] = wait_for_page(self.driver, kind, config=self.config)
+        seconds = time.perf_counter() - start
+        self.page_timings.append({'page': kind, 'url': url, 'seconds': round(seconds, 3), 'status': status,
+                                  'bytes': page_bytes(self.driver)})
+        if status == 'timeout':
+            print(f"  Page not ready after {seconds:.1f}s, continuing with what has loaded")
+        return status
+    
+    def _span(self, name, **attrs):
+        """A tracer span tagged with this professor"""
+        return self.tracer.span(name, professor=self.professor_name, **attrs)
+    
+    def _cache_lookup(self, source, url):
+        """Return the cache entry for `url`, or None if caching is off or bypassed"""
+        if not self.research_cache or self.refresh_research:
+            return None
+        try:
+            return self.research_cache.get(source, url)
+        except sqlite3.Error as e:
+            print(f"  Research cache unavailable: {e}")
+            return None
+    
+    def _cache_store(self, source, url, data, etag=None, last_modified=None):
+        if not self.research_cache:
+            return
+        try:
+            self.research_cache.put(source, url, data, etag=etag, last_modified=last_modified)
+        except sqlite3.Error as e:
+            print(f"  Could not update research cache: {e}")
+    
+    def _cache_touch(self, source, url):
+        """Mark a cache entry as just revalidated"""
+        if not self.research_cache:
+            return
+        try:
+            self.research_cache.touch(source, url)
+        except sqlite3.Error as e:
+            print(f"  Could not update research cache: {e}")
+    
+    def _cached_draft(self, prompt):
+        """Return a cached GPT draft for this exact prompt, unless regeneration is forced"""
+        if not self.draft_cache or self.regenerate_draft:
+            return None
+        try:
+            return self.draft_cache.get(prompt)
+        except sqlite3.Error as e:
+            print(f"  Draft cache unavailable: {e}")
+            return None
+    
+    def _store_draft(self, prompt, body):
+        if not self.draft_cache:
+            return
+        try:
+            self.draft_cache.put(prompt, body)
+        except sqlite3.Error as e:
+            print(f"  Could not update draft cache: {e}")
+    
     def scrape_google_scholar(self, scholar_url=None):
         """Scrape Google Scholar for professor's research interests and publications"""
         print(f"\n Researching {self.professor_name} on Google Scholar...")
         
-        # Use provided URL from .env if available
-        if not scholar_url and GOOGLE_SCHOLAR_URL:
-            scholar_url = GOOGLE_SCHOLAR_URL
-            print(f"  Using URL from .env file")
+        # Use configured URL (.env or roster) if available
+        if not scholar_url and self.scholar_url:
+            scholar_url = self.scholar_url
+            print(f"  Using configured profile URL")
         
         try:
             if not scholar_url:
                 print("  Attempting automatic search...")
                 
                 search_query = f"{self.professor_name} Saint Mary's University"
-                profiles_url = f"https://scholar.google.com/citations?view_op=search_authors&mauthors={search_query.replace(' ', '+')}&hl=en"
+                profiles_url = f"{self.config.scholar_base_url}/citations?view_op=search_authors&mauthors={search_query.replace(' ', '+')}&hl=en"
                 
-                self.driver.get(profiles_url)
-                time.sleep(3)
+                self._load_page(profiles_url, 'scholar_search')
+                from selenium.webdriver.common.by import By
                 
                 found_profile = False
                 try:
@@ -110,6 +2513,8 @@ class PhDEmailOrchestrator:
                             profile_name = profile_results[0].text
                             print(f"  Auto-selected: {profile_name}")
                             found_profile = True
+                        elif not self.interactive:
+                            print("  Multiple profiles found, cannot choose without input")
                         else:
                             print("\n  Multiple profiles found. Please select:")
                             for i, result in enumerate(profile_results[:5], 1):
@@ -138,6 +2543,11 @@ class PhDEmailOrchestrator:
                 except Exception as e:
                     print(f"  Search attempt failed: {str(e)[:100]}")
                 
+                if not found_profile and not self.interactive:
+                    print("  Skipping Google Scholar")
+                    self.research_data['google_scholar'] = {'skipped': True}
+                    return
+                
                 if not found_profile:
                     print("\n  Could not find profile automatically")
                     scholar_url = input("  Please enter the Google Scholar PROFILE URL (or 'skip' to skip): ")
@@ -147,385 +2557,1979 @@ class PhDEmailOrchestrator:
                         self.research_data['google_scholar'] = {'skipped': True}
                         return
             
+            cached = self._cache_lookup('google_scholar', scholar_url)
+            if cached and cached['fresh']:
+                self.research_data['google_scholar'] = cached['data']
+                print(" Using cached Google Scholar research")
+                return
+            
+            # A stale entry is checked against the newest publications instead of loading every one again
+            if cached and cached['data'].get('publications'):
+                refreshed = self._revalidate_scholar(scholar_url, cached['data'])
+                if refreshed:
+                    self.research_data['google_scholar'] = refreshed
+                    self._cache_store('google_scholar', scholar_url, refreshed)
+                    print(f" No new Google Scholar publications; kept {len(refreshed['publications'])} cached ones")
+                    return
+                print("  Google Scholar profile changed, loading every publication")
+            
             # Visit the scholar profile
-            self.driver.get(scholar_url)
-            time.sleep(3)
+            self._load_page(scholar_url, 'scholar_profile')
+            
+            # Load every publication, then pull the whole profile in one call
+            site = urlsplit(scholar_url).netloc
+            try:
+                with self._span('scholar.expand', site=site) as span:
+                    self.driver.set_script_timeout(self.config.scholar_pagination_timeout)
+                    span['rows'] = self.driver.execute_async_script(SCHOLAR_EXPAND_SCRIPT,
+                                                                    self.config.scholar_max_pages)
+            except Exception as e:
+                print(f"  Could not load all publications: {str(e)[:100]}")
+            
+            with self._span('scholar.extract', site=site):
+                profile = self.driver.execute_script(SCHOLAR_EXTRACT_SCRIPT) or {}
+            # Count the publication pages fetched by "Show more" too
+            self.page_timings[-1]['bytes'] = page_bytes(self.driver)
+            interests = profile.get('interests', [])
+            all_publications = profile.get('publications', [])
+            publications = [pub['title'] for pub in all_publications[:5]]
+            
+            self.research_data['google_scholar'] = {
+                'interests': interests,
+                'recent_publications': publications,
+                'publications': all_publications,
+                'citations': profile.get('citations'),
+                'citation_table': profile.get('citation_table', {}),
+                'profile_url': scholar_url
+            }
+            
+            # Empty results are usually a CAPTCHA or a failed load, so don't cache them
+            if interests or all_publications:
+                self._cache_store('google_scholar', scholar_url, self.research_data['google_scholar'])
+            
+            print(f" Found {len(interests)} research interests and {len(all_publications)} publications")
+            
+        except Exception as e:
+            print(f" Error scraping Google Scholar: {e}")
+            self.research_data['google_scholar'] = {'error': str(e)}
+    
+    def _revalidate_scholar(self, scholar_url, cached):
+        """Check cached Scholar research against one page of the profile sorted by date
+        
+        Returns the cached research with current citation counts if the
+        interests are the same and every listed publication is already known,
+        otherwise None (a full scrape is needed).
+        """
+        self._load_page(scholar_newest_first_url(scholar_url), 'scholar_profile')
+        with self._span('scholar.revalidate', site=urlsplit(scholar_url).netloc) as span:
+            profile = self.driver.execute_script(SCHOLAR_EXTRACT_SCRIPT) or {}
+            newest = profile.get('publications', [])
+            known = {normalize_title(pub['title']) for pub in cached['publications']}
+            span['unchanged'] = bool(newest) and all(normalize_title(pub['title']) in known for pub in newest) \
+                and sorted(profile.get('interests', [])) == sorted(cached.get('interests', []))
+        if not span['unchanged']:
+            return None
+        citations = {normalize_title(pub['title']): pub['citations'] for pub in newest}
+        publications = [dict(pub, citations=citations.get(normalize_title(pub['title']), pub.get('citations')))
+                        for pub in cached['publications']]
+        return dict(cached, publications=publications, citations=profile.get('citations'),
+                    citation_table=profile.get('citation_table', {}))
+    
+    def scrape_smu_website(self, smu_url=None):
+        """Scrape SMU website for professor's profile and additional info"""
+        print(f"\n Researching {self.professor_name} on SMU website...")
+        
+        # Use configured URL (.env or roster) if available
+        if not smu_url and self.smu_url:
+            smu_url = self.smu_url
+            print(f"  Using configured profile URL")
+        
+        try:
+            if not smu_url:
+                print("  Attempting automatic search...")
+                
+                search_query = f"{self.professor_name} Saint Mary's University Halifax faculty profile"
+                google_search_url = f"https://www.google.com/search?q={search_query.replace(' ', '+')}"
+                self._load_page(google_search_url, 'google_search')
+                from selenium.webdriver.common.by import By
+                
+                found_smu = False
+                try:
+                    smu_links = self.driver.find_elements(By.XPATH, "//a[contains(@href, 'smu.ca')]")
+                    
+                    if smu_links:
+                        profile_links = []
+                        for link in smu_links[:10]:
+                            href = link.get_attribute('href')
+                            if any(keyword in href.lower() for keyword in ['profile', 'faculty', 'researcher', 'staff']):
+                                try:
+                                    link_text = link.text
+                                    profile_links.append((href, link_text))
+                                except:
+                                    profile_links.append((href, ""))
+                        
+                        if profile_links:
+                            if len(profile_links) == 1:
+                                smu_url = profile_links[0][0]
+                                print(f"  Auto-selected: {profile_links[0][1] if profile_links[0][1] else 'SMU profile'}")
+                                found_smu = True
+                            elif not self.interactive:
+                                print("  Multiple SMU pages found, cannot choose without input")
+                            else:
+                                print("\n  Multiple SMU pages found. Please select:")
+                                for i, (url, text) in enumerate(profile_links[:5], 1):
+                                    display_text = text[:60] if text else url[:60]
+                                    print(f"  {i}. {display_text}")
+                                print(f"  {len(profile_links[:5]) + 1}. None of these / Enter URL manually")
+                                print(f"  {len(profile_links[:5]) + 2}. Skip SMU scraping")
+                                
+                                choice = input("\n  Enter choice number: ").strip()
+                                
+                                try:
+                                    choice_num = int(choice)
+                                    if 1 <= choice_num <= len(profile_links[:5]):
+                                        smu_url = profile_links[choice_num - 1][0]
+                                        found_smu = True
+                                        print(f"  Selected option {choice_num}")
+                                    elif choice_num == len(profile_links[:5]) + 2:
+                                        print("  Skipping SMU website")
+                                        self.research_data['smu'] = {'skipped': True}
+                                        return
+                                except:
+                                    pass
+                
+                except Exception as e:
+                    print(f"  Search attempt failed: {str(e)[:100]}")
+                
+                if not found_smu and not self.interactive:
+                    print("  Skipping SMU website")
+                    self.research_data['smu'] = {'skipped': True}
+                    return
+                
+                if not found_smu:
+                    print("\n  Could not find SMU profile automatically")
+                    smu_url = input("  Please enter the SMU profile URL (or 'skip' to skip): ")
+                    if not smu_url or smu_url.lower() == 'skip':
+                        print("  Skipping SMU website")
+                        self.research_data['smu'] = {'skipped': True}
+                        return
+            
+            cached = self._cache_lookup('smu', smu_url)
+            if cached and cached['fresh']:
+                self.research_data['smu'] = cached['data']
+                print(" Using cached SMU profile information")
+                return
+            
+            # A stale entry can be revalidated instead of downloaded again
+            validators = {}
+            if cached and cached['etag']:
+                validators['If-None-Match'] = cached['etag']
+            if cached and cached['last_modified']:
+                validators['If-Modified-Since'] = cached['last_modified']
             
-            # Extract research interests
-            interests = []
+            # Static pages are fetched directly; the browser is only used if the page needs JavaScript
             try:
-                interest_elements = self.driver.find_elements(By.CLASS_NAME, "gsc_prf_inta")
-                interests = [elem.text for elem in interest_elements if elem.text]
+                with self._span('http.fetch', site=urlsplit(smu_url).netloc) as span:
+                    profile, response = fetch_profile_page(smu_url, headers=validators, config=self.config)
+                    span['status'] = response['status']
             except Exception as e:
-                print(f"  Could not extract interests: {e}")
+                print(f"  Direct fetch failed: {str(e)[:100]}")
+                profile, response = None, None
+            if cached and response and response['status'] == 304:
+                self._cache_touch('smu', smu_url)
+                self.research_data['smu'] = cached['data']
+                print(" SMU profile unchanged, using cached information")
+                return
+            if profile:
+                self.research_data['smu'] = profile
+                self._cache_store('smu', smu_url, profile,
+                                  etag=response['headers'].get('etag'),
+                                  last_modified=response['headers'].get('last-modified'))
+                print(f" Retrieved SMU profile information (no browser needed)")
+                return
+            print("  Falling back to browser rendering")
+            
+            # Visit the SMU profile
+            self._load_page(smu_url, 'smu_profile')
+            from selenium.webdriver.common.by import By
             
-            # Extract recent publications
-            publications = []
+            # Extract profile information
+            with self._span('smu.extract', site=urlsplit(smu_url).netloc):
+                profile_text = self.driver.find_element(By.TAG_NAME, "body").text
+                
+                bio = ""
+                try:
+                    bio_section = self.driver.find_element(By.XPATH, "//*[contains(text(), 'Research') or contains(text(), 'Biography') or contains(text(), 'About')]")
+                    bio = bio_section.text[:500]
+                except:
+                    pass
+            
+            self.research_data['smu'] = {
+                'profile_url': smu_url,
+                'bio_snippet': bio,
+                'full_text_length': len(profile_text),
+                'fetched_via': 'browser'
+            }
+            self._cache_store('smu', smu_url, self.research_data['smu'])
+            
+            print(f" Retrieved SMU profile information")
+            
+        except Exception as e:
+            print(f" Error scraping SMU website: {e}")
+            self.research_data['smu'] = {'error': str(e)}
+    
+    def research_findings(self):
+        """Return (interests, recent publication titles) used to personalize the email"""
+        scholar = self.research_data.get('google_scholar', {})
+        return scholar.get('interests', []), scholar.get('recent_publications', [])
+    
+    def compose_email(self, your_name, your_background):
+        """Compose a personalized email based on research findings"""
+        print("\n  Composing personalized email...")
+        
+        your_background = your_background.strip()
+        
+        interests, publications = self.research_findings()
+        
+        # If OpenAI is available, use GPT to write the email
+        if self.config.openai_api_key and (interests or publications):
+            print("  Using GPT to generate personalized email...")
             try:
-                pub_elements = self.driver.find_elements(By.CLASS_NAME, "gsc_a_t")[:5]
-                publications = [elem.text for elem in pub_elements if elem.text]
+                email_body = self._generate_email_with_gpt(your_name, your_background, interests, publications)
+                subject = EMAIL_SUBJECT
+                
+                self.drafted_email = {
+                    'subject': subject,
+                    'body': email_body
+                }
+                self.drafted_by = 'gpt'
+                print(" GPT-generated email drafted!")
+                return
             except Exception as e:
-                print(f"  Could not extract publications: {e}")
+                print(f"  GPT generation failed: {e}")
+                print("  Falling back to template-based email...")
+        
+        self._compose_template_email(your_name, your_background, interests, publications)
+    
+    def _compose_template_email(self, your_name, your_background, interests, publications):
+        """Fallback: Template-based email composition"""
+        personalization = []
+        
+        # Filter out invalid publications (placeholders, too short, etc.)
+        valid_publications = [
+            pub for pub in publications 
+            if pub and len(pub) > 10 and pub.lower() not in ['title', 'publication', 'paper', 'article']
+        ]
+        
+        if interests:
+            interest_text = f"I am particularly drawn to your work in {', '.join(interests[:2])}"
+            if len(interests) > 2:
+                interest_text += f", and {interests[2]}"
+            interest_text += "."
+            personalization.append(interest_text)
+        
+        if valid_publications:
+            pub_text = f"Your recent publication \"{valid_publications[0]}\" especially resonates with my research interests."
+            personalization.append(pub_text)
+        
+        personalization_paragraph = "\n\n".join(personalization) if personalization else ""
+        
+        subject = EMAIL_SUBJECT
+        
+        body_parts = [
+            f"Dear Professor {self.professor_name},",
+            "",
+            f"I hope this email finds you well. My name is {your_name}, and I am writing to express my strong interest in pursuing a PhD under your supervision.",
+            "",
+            your_background
+        ]
+        
+        if personalization_paragraph:
+            body_parts.extend(["", personalization_paragraph])
+        
+        body_parts.extend([
+            "",
+            "I am excited about the possibility of contributing to your research and would greatly appreciate the opportunity to discuss potential PhD projects with you. I believe my background and research interests align well with your work, and I am eager to learn from your expertise.",
+            "",
+            "Would you be available for a brief meeting to discuss this opportunity further? I am happy to work around your schedule.",
+            "",
+            "Thank you for considering my interest. I look forward to hearing from you.",
+            "",
+            "Best regards,",
+            your_name
+        ])
+        
+        body = "\n".join(body_parts)
+
+        self.drafted_email = {
+            'subject': subject,
+            'body': body
+        }
+        self.drafted_by = 'template'
+        
+        print(" Email drafted!")
+    
+    def _build_gpt_prompt(self, your_name, your_background, interests, publications):
+        """Build the drafting prompt sent to GPT"""
+        
+        # Build context for GPT
+        research_context = f"Professor {self.professor_name}'s research interests: {', '.join(interests) if interests else 'Not available'}.\n"
+        if publications:
+            research_context += f"Recent publications include: {publications[0]}"
+        
+        prompt = f"""You are helping a PhD applicant write a professional, personalized email to a professor.
+
+Applicant Information:
+- Name: {your_name}
+- Background: {your_background}
+
+Professor Information:
+- Name: Professor {self.professor_name}
+- {research_context}
+
+Write a professional PhD inquiry email that:
+1. Is warm but formal
+2. References specific research interests or publications
+3. Explains why the applicant is a good fit
+4. Requests a meeting to discuss PhD opportunities
+5. Is concise (250-300 words)
+6. Shows genuine interest in the professor's work
+
+Do not include a subject line. Start with "Dear Professor {self.professor_name}," and end with "Best regards,\n{your_name}"
+"""
+        return prompt
+    
+    def _generate_email_with_gpt(self, your_name, your_background, interests, publications):
+        """Use GPT to generate a personalized email"""
+        prompt = self._build_gpt_prompt(your_name, your_background, interests, publications)
+        
+        cached = self._cached_draft(prompt)
+        if cached:
+            print("  Reusing cached GPT draft for identical request")
+            return cached
+        
+        with self._span('gpt.complete', site=self.config.gpt_model) as span:
+            response = self.config.openai_client().chat.completions.create(
+                model=self.config.gpt_model,
+                messages=gpt_messages(prompt),
+                temperature=GPT_TEMPERATURE,
+                max_tokens=GPT_MAX_TOKENS
+            )
+            record_usage(span, response)
+        
+        body = response.choices[0].message.content.strip()
+        self._store_draft(prompt, body)
+        return body
+        
+    def research_summary(self):
+        """research_data with the full publication list collapsed to a count, for display"""
+        summary = dict(self.research_data)
+        scholar = summary.get('google_scholar')
+        if scholar and 'publications' in scholar:
+            scholar = dict(scholar)
+            scholar['publication_count'] = len(scholar.pop('publications'))
+            summary['google_scholar'] = scholar
+        return summary
+    
+    def request_approval(self):
+        """Display email and request human approval (HITL)"""
+        show_draft(self.research_summary(), self.drafted_email, self.test_email)
+        
+        while True:
+            approval = input("\n Do you approve sending this email? (yes/no/edit): ").lower().strip()
             
-            # Extract citation count
-            citations = None
-            try:
-                citation_elem = self.driver.find_element(By.CLASS_NAME, "gsc_rsb_std")
-                citations = citation_elem.text
-            except Exception as e:
-                print(f"  Could not extract citations: {e}")
+            if approval == 'yes':
+                print(" Email approved for sending!")
+                return True
+            elif approval == 'no':
+                print(" Email sending cancelled.")
+                return False
+            elif approval == 'edit':
+                self.drafted_email['body'] = read_edited_body()
+            else:
+                print("  Please enter 'yes', 'no', or 'edit'")
+    
+    def build_message(self, sender_email):
+        """Build the EmailMessage for the drafted email"""
+        from email.message import EmailMessage
+        from email.utils import make_msgid
+        msg = EmailMessage()
+        msg['Subject'] = self.drafted_email['subject']
+        msg['From'] = sender_email
+        msg['To'] = self.test_email
+        msg['Message-ID'] = make_msgid(domain=sender_email.rsplit('@', 1)[-1])
+        msg.set_content(self.drafted_email['body'])
+        return msg
+    
+    def send_email(self, sender_email, app_password, sender=None):
+        """Send the approved email via Gmail SMTP
+        
+        Pass an SMTPSender to reuse its connection and rate limits across sends.
+        """
+        print("\n Sending email...")
+        
+        try:
+            msg = self.build_message(sender_email)
             
-            self.research_data['google_scholar'] = {
-                'interests': interests,
-                'recent_publications': publications,
-                'citations': citations,
-                'profile_url': scholar_url
-            }
+            if sender:
+                sent = sender.send(msg, self.professor_name)
+                error = sender.failures[-1]['error'] if not sent else None
+            else:
+                with SMTPSender(sender_email, app_password, config=self.config,
+                                sent_index=self.sent_index, tracer=self.tracer) as one_off:
+                    sent = one_off.send(msg, self.professor_name)
+                    error = one_off.failures[-1]['error'] if not sent else None
             
-            print(f" Found {len(interests)} research interests and {len(publications)} publications")
+            if sent:
+                print(" Email sent successfully!")
+            else:
+                print(f" SMTP Error: {error}")
+            return sent
             
         except Exception as e:
-            print(f" Error scraping Google Scholar: {e}")
-            self.research_data['google_scholar'] = {'error': str(e)}
+            print(f" Error sending email: {e}")
+            return False
     
-    def scrape_smu_website(self, smu_url=None):
-        """Scrape SMU website for professor's profile and additional info"""
-        print(f"\n Researching {self.professor_name} on SMU website...")
+    def cleanup(self):
+        """Close browser and cleanup resources"""
+        if self.driver and self.owns_driver:
+            self.driver.quit()
+            print("\n Browser closed")
+        self.driver = None
+    
+    def _checkpoint(self, phase):
+        """Return this professor's journal entry for `phase`, or None"""
+        if not self.journal:
+            return None
+        return self.journal.checkpoint(self.test_email.lower(), phase)
+    
+    def _record(self, phase, data=None):
+        if self.journal:
+            self.journal.record(self.test_email.lower(), phase, data)
+    
+    def research(self, pool=None):
+        """Research phase: Google Scholar, then the SMU profile
+        
+        With a BrowserPool, pages that need a browser borrow one from the pool.
+        """
+        done = self._checkpoint('researched')
+        if done:
+            self.research_data = done['data']
+            print(f" Resuming {self.professor_name}: research already done")
+            return
+        with self._span('research'):
+            if pool:
+                pool.scrape(self)
+            else:
+                self.scrape_google_scholar()
+                self.scrape_smu_website()
+        if self.snapshots:
+            try:
+                self.research_changes = self.snapshots.record(self.test_email, self.research_data)
+            except sqlite3.Error as e:
+                print(f"  Could not snapshot research: {e}")
+            if self.research_changes and not self.research_changes.get('first'):
+                if self.research_changes['changed']:
+                    print(f" Research for {self.professor_name} since last time: {describe_diff(self.research_changes)}")
+                else:
+                    print(f" Research for {self.professor_name} unchanged since last time")
+        if self.research_store is not None:
+            record = ProfessorRecord.from_research(self.professor_name, self.test_email, self.research_data)
+            try:
+                if record:
+                    self.research_store.append(record)
+            except (OSError, ValueError) as e:
+                print(f"  Could not store research: {e}")
+        self._record('researched', self.research_data)
+    
+    def draft(self, your_name, your_background, drafter=None):
+        """Composition phase, drafted by `drafter` (an AsyncDrafter) if given"""
+        done = self._checkpoint('drafted')
+        if done:
+            self.drafted_email = done['data']
+            print(f" Resuming {self.professor_name}: draft already written")
+            return
+        interests, publications = self.research_findings()
+        applicant = applicant_hash(your_name, your_background, self.config.gpt_model)
+        with self._span('draft', interests=len(interests), publications=len(publications)) as span:
+            reused = self._reusable_draft(applicant)
+            span['reused'] = bool(reused)
+            if reused:
+                self.drafted_email = reused
+                self.drafted_by = 'gpt'
+                print(f" No material research change for {self.professor_name}; reusing the last draft")
+            elif drafter:
+                drafter.draft(self, your_name, your_background)
+            else:
+                self.compose_email(your_name, your_background)
+        # A template stands in for a failed or unconfigured GPT call: draft again next run rather than reuse it
+        if self.snapshots and not reused and self.drafted_by == 'gpt':
+            try:
+                self.snapshots.store_draft(self.test_email, applicant, self.research_data, self.drafted_email)
+            except sqlite3.Error as e:
+                print(f"  Could not record the draft's research snapshot: {e}")
+        self._record('drafted', self.drafted_email)
+    
+    def _reusable_draft(self, applicant):
+        """The last draft for this professor, unless research changed materially or a new draft was asked for"""
+        if not self.snapshots or self.regenerate_draft:
+            return None
+        try:
+            return self.snapshots.reusable_draft(self.test_email, applicant, self.research_data)
+        except sqlite3.Error as e:
+            print(f"  Research snapshots unavailable: {e}")
+            return None
+    
+    def approve(self, review_queue=None):
+        """Approval phase: ask now, or queue the draft for later review"""
+        done = self._checkpoint('approved')
+        if done:
+            self.approved = done['data']['approved']
+            self.drafted_email = done['data']['drafted_email']
+            return
+        if review_queue:
+            item_id = review_queue.add(self)
+            print(f"\n Draft #{item_id} for {self.professor_name} queued for review")
+            self.approved = False
+        else:
+            with self._span('approval.wait') as span:
+                self.approved = span['approved'] = self.request_approval()
+        self._record('approved', {'approved': self.approved, 'drafted_email': self.drafted_email})
+    
+    def deliver(self, sender_email, app_password, sender=None):
+        """Send phase: send the email if it was approved, at most once per run"""
+        if not self.approved:
+            return
+        sent = self._checkpoint('sent')
+        if sent:
+            self.sent = True
+            return
+        sending = self._checkpoint('sending')
+        failed = self._checkpoint('send_failed')
+        if sending and (not failed or failed['seq'] < sending['seq']):
+            raise RuntimeError("an earlier send attempt was interrupted; not resending "
+                               "(check your Sent folder)")
         
-        # Use provided URL from .env if available
-        if not smu_url and SMU_PROFILE_URL:
-            smu_url = SMU_PROFILE_URL
-            print(f"  Using URL from .env file")
+        self._record('sending')
+        with self._span('send') as span:
+            self.sent = span['sent'] = self.send_email(sender_email, app_password, sender=sender)
+        self._record('sent' if self.sent else 'send_failed')
+    
+    def run(self, your_name, your_background, sender_email, app_password, review_queue=None, journal=None):
+        """Main orchestration method
         
+        Runs the research -> compose -> approve -> send pipeline for this
+        professor. With a `review_queue`, the draft is queued for later
+        review instead of waiting for approval here, and nothing is sent.
+        With a `journal`, each phase is checkpointed so the run can be resumed.
+        """
+        self.journal = journal
         try:
-            if not smu_url:
-                print("  Attempting automatic search...")
-                
-                search_query = f"{self.professor_name} Saint Mary's University Halifax faculty profile"
-                google_search_url = f"https://www.google.com/search?q={search_query.replace(' ', '+')}"
-                self.driver.get(google_search_url)
-                time.sleep(3)
-                
-                found_smu = False
+            print(" Starting PhD Email Orchestrator Agent")
+            if journal:
+                print(f" Run ID: {journal.run_id} (continue it with: resume {journal.run_id})")
+            print("="*80)
+            
+            # Run on this thread, so Ctrl+C (e.g. at the approval prompt) cancels the run
+            phases = [
+                # Phase 1: Research (the browser starts on the first page that needs one)
+                ('research', self.research),
+                # Phase 2: Composition
+                ('compose', lambda: self.draft(your_name, your_background)),
+                # Phase 3: Human Approval (HITL)
+                ('approve', lambda: self.approve(review_queue)),
+                # Phase 4: Send Email
+                ('send', lambda: self.deliver(sender_email, app_password)),
+            ]
+            for stage, phase in phases:
                 try:
-                    smu_links = self.driver.find_elements(By.XPATH, "//a[contains(@href, 'smu.ca')]")
-                    
-                    if smu_links:
-                        profile_links = []
-                        for link in smu_links[:10]:
-                            href = link.get_attribute('href')
-                            if any(keyword in href.lower() for keyword in ['profile', 'faculty', 'researcher', 'staff']):
-                                try:
-                                    link_text = link.text
-                                    profile_links.append((href, link_text))
-                                except:
-                                    profile_links.append((href, ""))
-                        
-                        if profile_links:
-                            if len(profile_links) == 1:
-                                smu_url = profile_links[0][0]
-                                print(f"  Auto-selected: {profile_links[0][1] if profile_links[0][1] else 'SMU profile'}")
-                                found_smu = True
-                            else:
-                                print("\n  Multiple SMU pages found. Please select:")
-                                for i, (url, text) in enumerate(profile_links[:5], 1):
-                                    display_text = text[:60] if text else url[:60]
-                                    print(f"  {i}. {display_text}")
-                                print(f"  {len(profile_links[:5]) + 1}. None of these / Enter URL manually")
-                                print(f"  {len(profile_links[:5]) + 2}. Skip SMU scraping")
-                                
-                                choice = input("\n  Enter choice number: ").strip()
-                                
-                                try:
-                                    choice_num = int(choice)
-                                    if 1 <= choice_num <= len(profile_links[:5]):
-                                        smu_url = profile_links[choice_num - 1][0]
-                                        found_smu = True
-                                        print(f"  Selected option {choice_num}")
-                                    elif choice_num == len(profile_links[:5]) + 2:
-                                        print("  Skipping SMU website")
-                                        self.research_data['smu'] = {'skipped': True}
-                                        return
-                                except:
-                                    pass
-                
+                    phase()
                 except Exception as e:
-                    print(f"  Search attempt failed: {str(e)[:100]}")
-                
-                if not found_smu:
-                    print("\n  Could not find SMU profile automatically")
-                    smu_url = input("  Please enter the SMU profile URL (or 'skip' to skip): ")
-                    if not smu_url or smu_url.lower() == 'skip':
-                        print("  Skipping SMU website")
-                        self.research_data['smu'] = {'skipped': True}
-                        return
-            
-            # Visit the SMU profile
-            self.driver.get(smu_url)
-            time.sleep(3)
-            
-            # Extract profile information
-            profile_text = self.driver.find_element(By.TAG_NAME, "body").text
+                    print(f"\n Workflow error during {stage}: {str(e) or type(e).__name__}")
+                    return
             
-            bio = ""
-            try:
-                bio_section = self.driver.find_element(By.XPATH, "//*[contains(text(), 'Research') or contains(text(), 'Biography') or contains(text(), 'About')]")
-                bio = bio_section.text[:500]
-            except:
-                pass
+            print_page_timings(self.page_timings)
+            print("\n" + "="*80)
+            print(" Workflow completed!")
+            print("="*80)
             
-            self.research_data['smu'] = {
-                'profile_url': smu_url,
-                'bio_snippet': bio,
-                'full_text_length': len(profile_text)
-            }
+        finally:
+            self.cleanup()
+
+
+class AsyncDrafter:
+    """
+    Drafts emails for many professors concurrently with AsyncOpenAI.
+    At most `concurrency` requests are in flight. 429s, 5xx errors and
+    timeouts are retried with exponential backoff and jitter. A 429 pauses
+    every worker until the server's Retry-After has passed. Drafts that
+    still fail fall back to the template email.
+    """
+    
+    RETRY_STATUS = {408, 409, 429}
+    
+    def __init__(self, config=None, tracer=None):
+        self.config = config or Config()
+        self.tracer = tracer or Tracer()
+        self.concurrency = max(1, self.config.draft_concurrency)
+        self.max_retries = self.config.draft_max_retries
+        self.timeout = self.config.draft_timeout
+        self._paused_until = 0.0
+    
+    def _retry_delay(self, attempt, error):
+        """Seconds to wait before the next attempt, honoring Retry-After if sent"""
+        response = getattr(error, 'response', None)
+        headers = response.headers if response is not None else {}
+        try:
+            if headers.get('retry-after-ms'):
+                return float(headers['retry-after-ms']) / 1000
+            if headers.get('retry-after'):
+                return float(headers['retry-after'])
+        except ValueError:
+            pass
+        delay = min(self.config.draft_max_backoff, 2 ** attempt)
+        return random.uniform(delay / 2, delay)
+    
+    async def _complete(self, client, semaphore, prompt, professor=None):
+        """Run one chat completion with retries, returning the email body"""
+        import asyncio
+        import openai
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_retries + 1):
+            # Everyone waits out a rate limit instead of piling more requests on
+            pause = self._paused_until - loop.time()
+            if pause > 0:
+                await asyncio.sleep(pause)
             
-            print(f" Retrieved SMU profile information")
+            async with semaphore:
+                try:
+                    with self.tracer.span('gpt.complete', site=self.config.gpt_model, professor=professor,
+                                          attempt=attempt) as span:
+                        response = await client.chat.completions.create(
+                            model=self.config.gpt_model,
+                            messages=gpt_messages(prompt),
+                            temperature=GPT_TEMPERATURE,
+                            max_tokens=GPT_MAX_TOKENS,
+                            timeout=self.timeout
+                        )
+                        record_usage(span, response)
+                    return response.choices[0].message.content.strip()
+                except openai.APIConnectionError as e:
+                    error = e
+                except openai.APIStatusError as e:
+                    if e.status_code < 500 and e.status_code not in self.RETRY_STATUS:
+                        raise
+                    error = e
             
-        except Exception as e:
-            print(f" Error scraping SMU website: {e}")
-            self.research_data['smu'] = {'error': str(e)}
+            if attempt == self.max_retries:
+                raise error
+            delay = self._retry_delay(attempt, error)
+            if getattr(error, 'status_code', None) == 429:
+                self._paused_until = max(self._paused_until, loop.time() + delay)
+            await asyncio.sleep(delay)
+    
+    async def _draft_one(self, client, semaphore, orchestrator, your_name, your_background):
+        interests, publications = orchestrator.research_findings()
+        if client and (interests or publications):
+            prompt = orchestrator._build_gpt_prompt(your_name, your_background, interests, publications)
+            cached = orchestrator._cached_draft(prompt)
+            if cached:
+                orchestrator.drafted_email = {'subject': EMAIL_SUBJECT, 'body': cached}
+                orchestrator.drafted_by = 'gpt'
+                print(f" Reused cached GPT draft for {orchestrator.professor_name}")
+                return
+            try:
+                body = await self._complete(client, semaphore, prompt, orchestrator.professor_name)
+                orchestrator._store_draft(prompt, body)
+                orchestrator.drafted_email = {'subject': EMAIL_SUBJECT, 'body': body}
+                orchestrator.drafted_by = 'gpt'
+                print(f" GPT-generated email drafted for {orchestrator.professor_name}")
+                return
+            except Exception as e:
+                print(f"  GPT generation failed for {orchestrator.professor_name}: {e}")
+        orchestrator._compose_template_email(your_name, your_background, interests, publications)
+    
+    def _new_client(self):
+        """An AsyncOpenAI client (retries are handled here, not by the SDK), or None without a key"""
+        if not self.config.openai_api_key:
+            return None
+        from openai import AsyncOpenAI
+        return AsyncOpenAI(api_key=self.config.openai_api_key, base_url=self.config.openai_base_url,
+                           timeout=self.timeout, max_retries=0)
+    
+    def start(self):
+        """Start a background event loop so threads can submit drafts one at a time"""
+        import asyncio
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='drafter-loop', daemon=True)
+        self._thread.start()
+        self._client = self._new_client()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+    
+    def draft(self, orchestrator, your_name, your_background):
+        """Draft one email on the background loop, blocking the calling thread until done"""
+        import asyncio
+        future = asyncio.run_coroutine_threadsafe(
+            self._draft_one(self._client, self._semaphore, orchestrator, your_name, your_background.strip()),
+            self._loop)
+        future.result()
+    
+    def stop(self):
+        import asyncio
+        if self._client:
+            asyncio.run_coroutine_threadsafe(self._client.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+class SentIndex:
+    """
+    Indexed record of every message sent, stored in the sent_messages table
+    of orchestrator.db (recipient, professor, subject hash, timestamp,
+    Message-ID). It is checked before research starts and again right
+    before sending, so an already-contacted professor is never scraped,
+    drafted or emailed again. Lookups go through the recipient index, not
+    a scan of the log.
+    
+    A recipient is skipped if they were contacted within `cooldown_days`
+    (0 means ever) or were suppressed by hand. `overrides` lists
+    recipients allowed through anyway; `force` disables the check for a run.
+    """
+    
+    def __init__(self, config=None, cooldown_days=None, overrides=(), force=False):
+        config = config or Config()
+        self.cooldown_days = config.recontact_cooldown_days if cooldown_days is None else cooldown_days
+        self.overrides = {o.strip().lower() for o in overrides}
+        self.force = force
+        self._lock = threading.Lock()
+        self._conn = open_db(config.db_path)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS sent_messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    recipient TEXT NOT NULL,
+                    professor_name TEXT,
+                    subject_hash TEXT NOT NULL,
+                    message_id TEXT,
+                    sent_at REAL NOT NULL
+                )""")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS sent_messages_recipient ON sent_messages (recipient, sent_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS sent_messages_time ON sent_messages (sent_at)")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS suppressions (
+                    recipient TEXT PRIMARY KEY,
+                    reason TEXT,
+                    created_at REAL NOT NULL
+                )""")
+    
+    def record(self, msg, professor_name=None):
+        """Add a sent EmailMessage to the index"""
+        subject_hash = hashlib.sha256((msg['Subject'] or '').encode('utf-8')).hexdigest()[:16]
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO sent_messages (recipient, professor_name, subject_hash, message_id, sent_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (msg['To'].strip().lower(), professor_name, subject_hash, msg['Message-ID'], time.time()))
+    
+    def sent_since(self, timestamp):
+        """How many messages were sent at or after `timestamp`, by any run"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM sent_messages WHERE sent_at >= ?", (timestamp,)).fetchone()[0]
+    
+    def suppress(self, recipient, reason="manual"):
+        """Never contact `recipient` (until removed with unsuppress)"""
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO suppressions VALUES (?, ?, ?)",
+                               (recipient.strip().lower(), reason, time.time()))
+    
+    def unsuppress(self, recipient):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM suppressions WHERE recipient = ?", (recipient.strip().lower(),))
+    
+    def skip_reason(self, recipient):
+        """Why `recipient` must not be contacted now, or None if they may be"""
+        recipient = recipient.strip().lower()
+        if self.force or recipient in self.overrides:
+            return None
+        with self._lock:
+            suppressed = self._conn.execute(
+                "SELECT reason FROM suppressions WHERE recipient = ?", (recipient,)).fetchone()
+            last = self._conn.execute(
+                "SELECT MAX(sent_at) FROM sent_messages WHERE recipient = ?", (recipient,)).fetchone()[0]
+        if suppressed:
+            return f"suppressed ({suppressed['reason']})"
+        if last is None:
+            return None
+        if self.cooldown_days and time.time() - last > self.cooldown_days * 86400:
+            return None
+        return f"already contacted on {time.strftime('%Y-%m-%d', time.localtime(last))}"
+    
+    def close(self):
+        self._conn.close()
+
+
+class RunJournal:
+    """
+    Durable per-run checkpoint log in the run_journal table of
+    orchestrator.db. Each professor's progress is recorded after every
+    phase (researched, drafted, approved, sending, sent/send_failed) so an
+    interrupted run can be resumed with `resume <run-id>` and skip the
+    work already done.
+    
+    A 'sending' entry is written before the SMTP call. If a run dies after
+    that but before 'sent' is written, the send is never retried
+    automatically, so nobody can be emailed twice.
+    """
+    
+    def __init__(self, run_id=None, config=None):
+        config = config or Config()
+        self.run_id = run_id or time.strftime('%Y%m%d-%H%M%S-') + os.urandom(3).hex()
+        self._lock = threading.Lock()
+        self._conn = open_db(config.db_path)
+        # Checkpoints must survive a crash, so pay for a full fsync on commit
+        self._conn.execute("PRAGMA synchronous=FULL")
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    run_id TEXT PRIMARY KEY,
+                    created_at REAL NOT NULL,
+                    roster TEXT NOT NULL,
+                    options TEXT NOT NULL
+                )""")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS run_journal (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_id TEXT NOT NULL,
+                    professor_key TEXT NOT NULL,
+                    phase TEXT NOT NULL,
+                    data TEXT,
+                    recorded_at REAL NOT NULL
+                )""")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS run_journal_run ON run_journal (run_id, professor_key)")
+        self._state = self._load_state()
+    
+    def _load_state(self):
+        state = {}
+        rows = self._conn.execute(
+            "SELECT seq, professor_key, phase, data FROM run_journal WHERE run_id = ? ORDER BY seq",
+            (self.run_id,)).fetchall()
+        for row in rows:
+            data = json.loads(row['data']) if row['data'] is not None else None
+            state.setdefault(row['professor_key'], {})[row['phase']] = {'seq': row['seq'], 'data': data}
+        return state
+    
+    def start(self, roster, options):
+        """Register a new run with its roster and options so it can be resumed later"""
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO runs VALUES (?, ?, ?, ?)",
+                               (self.run_id, time.time(), json.dumps(roster), json.dumps(options)))
+    
+    def load(self):
+        """Return (roster, options) of an existing run, or None if the run id is unknown"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT roster, options FROM runs WHERE run_id = ?", (self.run_id,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row['roster']), json.loads(row['options'])
+    
+    def record(self, professor_key, phase, data=None):
+        """Durably record that `professor_key` completed `phase`"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO run_journal (run_id, professor_key, phase, data, recorded_at) VALUES (?, ?, ?, ?, ?)",
+                (self.run_id, professor_key, phase, json.dumps(data) if data is not None else None, time.time()))
+            self._state.setdefault(professor_key, {})[phase] = {'seq': cursor.lastrowid, 'data': data}
+    
+    def checkpoint(self, professor_key, phase):
+        """The last recorded {'seq', 'data'} for a phase, or None if it never completed"""
+        with self._lock:
+            return self._state.get(professor_key, {}).get(phase)
+    
+    def close(self):
+        self._conn.close()
+
+
+class ReviewQueue:
+    """
+    Persistent outbox of drafts awaiting human review, stored in the
+    review_queue table of orchestrator.db. Research and drafting add
+    'pending' items unattended. A reviewer later approves, edits or rejects
+    them in bulk, and the send stage picks up only 'approved' items.
+    Approved items the sent-mail index refuses (already contacted,
+    suppressed) end up 'skipped', with the reason in `error`.
+    """
+    
+    STATUSES = ('pending', 'approved', 'rejected', 'sent', 'skipped')
+    
+    def __init__(self, config=None):
+        config = config or Config()
+        self._lock = threading.Lock()
+        self._conn = open_db(config.db_path)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS review_queue (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    professor_name TEXT NOT NULL,
+                    email TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    research_summary TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    reviewed_at REAL,
+                    sent_at REAL
+                )""")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS review_queue_status ON review_queue (status, id)")
+    
+    def add(self, orchestrator):
+        """Queue an orchestrator's draft for review; returns the item id"""
+        with self._lock, self._conn:
+            return self.insert(self._conn, orchestrator)
+    
+    @staticmethod
+    def insert(conn, orchestrator):
+        """Queue a draft through `conn`, inside the caller's transaction; returns the item id"""
+        cursor = conn.execute(
+            "INSERT INTO review_queue (professor_name, email, subject, body, research_summary, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (orchestrator.professor_name, orchestrator.test_email,
+             orchestrator.drafted_email['subject'], orchestrator.drafted_email['body'],
+             json.dumps(orchestrator.research_summary()), time.time()))
+        return cursor.lastrowid
+    
+    def items(self, status):
+        """All items with `status`, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM review_queue WHERE status = ? ORDER BY id", (status,)).fetchall()
+        return [dict(row) for row in rows]
+    
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) AS n FROM review_queue GROUP BY status").fetchall()
+        return {row['status']: row['n'] for row in rows}
+    
+    def review(self, item_id, status, body=None):
+        """Record a reviewer's decision, optionally with an edited body"""
+        with self._lock, self._conn:
+            if body is not None:
+                self._conn.execute("UPDATE review_queue SET body = ? WHERE id = ?", (body, item_id))
+            self._conn.execute(
+                "UPDATE review_queue SET status = ?, reviewed_at = ? WHERE id = ?",
+                (status, time.time(), item_id))
+    
+    def mark_sent(self, item_id):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE review_queue SET status = 'sent', sent_at = ?, error = NULL WHERE id = ?",
+                (time.time(), item_id))
+    
+    def mark_failed(self, item_id, error):
+        """Keep a failed send approved so the next send run retries it"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE review_queue SET error = ? WHERE id = ?", (str(error), item_id))
+    
+    def mark_skipped(self, item_id, reason):
+        """Retire an item that must not be sent at all, so no later send run tries it again"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE review_queue SET status = 'skipped', error = ? WHERE id = ?",
+                               (str(reason), item_id))
+    
+    def close(self):
+        self._conn.close()
+
+
+class JobQueue:
+    """
+    Shared, lease-based queue of per-professor jobs in the jobs table of
+    orchestrator.db, so any number of worker processes (see QueueWorker)
+    can research and draft one roster. A worker leases a job for
+    `job_lease_seconds` and keeps the lease alive with heartbeats; a job
+    whose lease expired (its worker crashed or hung) is leased again, up
+    to `job_max_attempts` times. Each lease carries a fresh token, and the
+    job is marked done in the same transaction that adds its draft to the
+    review queue, so a draft is handed to the send stage exactly once even
+    if two workers end up holding the same professor.
+    """
+    
+    STATUSES = ('pending', 'leased', 'done', 'skipped', 'failed')
+    
+    def __init__(self, config=None):
+        config = config or Config()
+        self.lease_seconds = config.job_lease_seconds
+        self.max_attempts = config.job_max_attempts
+        # Completed jobs are handed straight to the review queue's table
+        ReviewQueue(config).close()
+        self._lock = threading.Lock()
+        self._conn = open_db(config.db_path)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    queue TEXT NOT NULL,
+                    email TEXT NOT NULL,
+                    entry TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker TEXT,
+                    lease_token TEXT,
+                    lease_expires REAL,
+                    review_id INTEGER,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    UNIQUE (queue, email)
+                )""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (queue, status, id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_lease ON jobs (lease_token)")
+    
+    def enqueue(self, queue_name, roster):
+        """Add a job per roster entry not already in the queue; returns how many were added"""
+        now = time.time()
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO jobs (queue, email, entry, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [(queue_name, entry['email'].strip().lower(), json.dumps(entry), now, now) for entry in roster])
+            return self._conn.total_changes - before
+    
+    def lease(self, queue_name, worker):
+        """Lease the oldest available job to `worker`; returns the job (a dict) or None"""
+        token = os.urandom(8).hex()
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'failed', lease_token = NULL, updated_at = ?, "
+                "error = 'lease expired on every attempt (worker crashed or hung)' "
+                "WHERE queue = ? AND status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, queue_name, now, self.max_attempts))
+            # One statement: concurrent workers can never lease the same job
+            self._conn.execute(
+                "UPDATE jobs SET status = 'leased', worker = ?, lease_token = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? "
+                "WHERE id = (SELECT id FROM jobs WHERE queue = ? "
+                "AND (status = 'pending' OR (status = 'leased' AND lease_expires < ?)) ORDER BY id LIMIT 1)",
+                (worker, token, now + self.lease_seconds, now, queue_name, now))
+            row = self._conn.execute("SELECT * FROM jobs WHERE lease_token = ?", (token,)).fetchone()
+        return dict(row) if row else None
+    
+    def _update(self, job, assignments, params=()):
+        """Apply `assignments` to a job only while `job`'s lease still holds it; returns whether it did"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? WHERE id = ? AND lease_token = ? AND status = 'leased'",
+                (*params, time.time(), job['id'], job['lease_token']))
+        return cursor.rowcount == 1
+    
+    def heartbeat(self, job):
+        """Extend a lease; False means it was lost to another worker"""
+        return self._update(job, "lease_expires = ?", (time.time() + self.lease_seconds,))
+    
+    def complete(self, job, orchestrator):
+        """Hand a drafted job to the review queue; returns the review item id, or None if the lease was lost"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'done', lease_token = NULL, lease_expires = NULL, error = NULL, "
+                "updated_at = ? WHERE id = ? AND lease_token = ? AND status = 'leased'",
+                (time.time(), job['id'], job['lease_token']))
+            if cursor.rowcount != 1:
+                return None
+            review_id = ReviewQueue.insert(self._conn, orchestrator)
+            self._conn.execute("UPDATE jobs SET review_id = ? WHERE id = ?", (review_id, job['id']))
+        return review_id
+    
+    def fail(self, job, error):
+        """Give a job back for another attempt, or fail it for good after job_max_attempts"""
+        return self._update(
+            job, "status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                 "lease_token = NULL, lease_expires = NULL, error = ?", (self.max_attempts, str(error)))
+    
+    def skip(self, job, reason):
+        return self._update(job, "status = 'skipped', lease_token = NULL, lease_expires = NULL, error = ?",
+                            (reason,))
+    
+    def release(self, job):
+        """Give a job back untried, e.g. when its worker is stopped"""
+        return self._update(job, "status = 'pending', attempts = attempts - 1, lease_token = NULL, "
+                                 "lease_expires = NULL")
+    
+    def retry_failed(self, queue_name):
+        """Make failed jobs pending again with fresh attempts; returns how many"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'pending', attempts = 0, updated_at = ? "
+                "WHERE queue = ? AND status = 'failed'",
+                (time.time(), queue_name))
+        return cursor.rowcount
+    
+    def counts(self, queue_name):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) AS n FROM jobs WHERE queue = ? GROUP BY status", (queue_name,)).fetchall()
+        return {row['status']: row['n'] for row in rows}
+    
+    def unfinished(self, queue_name):
+        """Whether any job is still pending or leased, so workers should keep polling"""
+        counts = self.counts(queue_name)
+        return bool(counts.get('pending') or counts.get('leased'))
+    
+    def failures(self, queue_name):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT email, attempts, error FROM jobs WHERE queue = ? AND status = 'failed' ORDER BY id",
+                (queue_name,)).fetchall()
+        return [dict(row) for row in rows]
+    
+    def close(self):
+        self._conn.close()
+
+
+def review_drafts(review_queue, tracer=None):
+    """Interactive bulk review of every pending draft in the queue"""
+    tracer = tracer or Tracer()
+    pending = review_queue.items('pending')
+    if not pending:
+        print(" No drafts waiting for review.")
+        return
+    
+    print(f" {len(pending)} draft(s) waiting for review")
+    decisions = {'approved': 0, 'rejected': 0, 'skipped': 0}
+    for i, item in enumerate(pending, 1):
+        print(f"\n[{i}/{len(pending)}] {item['professor_name']}")
+        drafted_email = {'subject': item['subject'], 'body': item['body']}
+        show_draft(json.loads(item['research_summary']), drafted_email, item['email'])
+        
+        edited_body = None
+        with tracer.span('approval.wait', professor=item['professor_name']):
+            while True:
+                choice = input("\n Approve this email? (yes/no/edit/skip/quit): ").lower().strip()
+                if choice == 'yes':
+                    review_queue.review(item['id'], 'approved', body=edited_body)
+                    decisions['approved'] += 1
+                    break
+                elif choice == 'no':
+                    review_queue.review(item['id'], 'rejected')
+                    decisions['rejected'] += 1
+                    break
+                elif choice == 'edit':
+                    edited_body = read_edited_body()
+                elif choice == 'skip':
+                    decisions['skipped'] += 1
+                    break
+                elif choice == 'quit':
+                    decisions['skipped'] += len(pending) - i + 1
+                    print(f"\n Review finished: {decisions}")
+                    return
+                else:
+                    print("  Please enter 'yes', 'no', 'edit', 'skip' or 'quit'")
+    
+    print(f"\n Review finished: {decisions}")
+
+
+def send_approved(review_queue, sender_email, app_password, sent_index=None, config=None, tracer=None):
+    """Send stage: deliver every approved draft in the queue over one SMTP session"""
+    from email.message import EmailMessage
+    from email.utils import make_msgid
+    approved = review_queue.items('approved')
+    if not approved:
+        print(" No approved drafts to send.")
+        return 0
+    
+    print(f" Sending {len(approved)} approved email(s)...")
+    sent = 0
+    with SMTPSender(sender_email, app_password, config=config, sent_index=sent_index,
+                    tracer=tracer) as sender:
+        for item in approved:
+            msg = EmailMessage()
+            msg['Subject'] = item['subject']
+            msg['From'] = sender_email
+            msg['To'] = item['email']
+            msg['Message-ID'] = make_msgid(domain=sender_email.rsplit('@', 1)[-1])
+            msg.set_content(item['body'])
+            if sender.send(msg, item['professor_name']):
+                review_queue.mark_sent(item['id'])
+                sent += 1
+                print(f"  Sent to {item['professor_name']} <{item['email']}>")
+            elif sender.failures[-1]['skip_reason']:
+                # Never sendable: retire it instead of failing it again on every run
+                reason = sender.failures[-1]['skip_reason']
+                review_queue.mark_skipped(item['id'], reason)
+                print(f"  Skipped {item['professor_name']} <{item['email']}>: {reason}")
+            else:
+                error = sender.failures[-1]['error']
+                review_queue.mark_failed(item['id'], error)
+                print(f"  Failed for {item['professor_name']} <{item['email']}>: {error}")
+    
+    print(f" {sent} of {len(approved)} approved email(s) sent")
+    return sent
+
+
+_STOP = object()
+
+
+class Pipeline:
+    """
+    Stages connected by bounded queues, each stage served by its own
+    worker threads, so different professors can be in different stages
+    at the same time (N+1 researched while N is drafted and N-1 sent).
+    Throughput is set by the slowest stage. A full queue blocks the stage
+    feeding it, which gives backpressure. If a stage raises for one item,
+    that item is marked failed and skips the remaining stages; the other
+    items carry on.
+    """
     
-    def compose_email(self, your_name, your_background):
-        """Compose a personalized email based on research findings"""
-        print("\n  Composing personalized email...")
-        
-        your_background = your_background.strip()
-        
-        interests = self.research_data.get('google_scholar', {}).get('interests', [])
-        publications = self.research_data.get('google_scholar', {}).get('recent_publications', [])
-        
-        # Debug: Show what was found
-        print(f"  DEBUG: Found {len(interests)} interests: {interests[:2] if interests else 'None'}")
-        print(f"  DEBUG: Found {len(publications)} publications: {publications[0][:50] if publications else 'None'}...")
-        
-        # If OpenAI is available, use GPT to write the email
-        if openai_client and (interests or publications):
-            print("  Using GPT to generate personalized email...")
-            try:
-                email_body = self._generate_email_with_gpt(your_name, your_background, interests, publications)
-                subject = f"PhD Opportunity - Interest in Your Research"
-                
-                self.drafted_email = {
-                    'subject': subject,
-                    'body': email_body
-                }
-                print(" GPT-generated email drafted!")
+    def __init__(self, queue_size=Config.pipeline_queue_size):
+        self.queue_size = queue_size
+        self.stages = []
+        self.stopping = threading.Event()
+    
+    def add_stage(self, name, func, workers=1):
+        """Append a stage; `func(value)` is called once per item"""
+        self.stages.append({'name': name, 'func': func, 'workers': max(1, workers)})
+        return self
+    
+    def _work(self, stage, inbox, outbox):
+        while True:
+            item = inbox.get()
+            if item is _STOP:
                 return
-            except Exception as e:
-                print(f"  GPT generation failed: {e}")
-                print("  Falling back to template-based email...")
-        
-        # Fallback: Template-based email composition
-        personalization = []
-        
-        # Filter out invalid publications (placeholders, too short, etc.)
-        valid_publications = [
-            pub for pub in publications 
-            if pub and len(pub) > 10 and pub.lower() not in ['title', 'publication', 'paper', 'article']
-        ]
-        
-        if interests:
-            interest_text = f"I am particularly drawn to your work in {', '.join(interests[:2])}"
-            if len(interests) > 2:
-                interest_text += f", and {interests[2]}"
-            interest_text += "."
-            personalization.append(interest_text)
-        
-        if valid_publications:
-            pub_text = f"Your recent publication \"{valid_publications[0]}\" especially resonates with my research interests."
-            personalization.append(pub_text)
-        
-        personalization_paragraph = "\n\n".join(personalization) if personalization else ""
-        
-        subject = f"PhD Opportunity - Interest in Your Research"
-        
-        body_parts = [
-            f"Dear Professor {self.professor_name},",
-            "",
-            f"I hope this email finds you well. My name is {your_name}, and I am writing to express my strong interest in pursuing a PhD under your supervision.",
-            "",
-            your_background
+            if item['error'] is None:
+                if self.stopping.is_set():
+                    item['error'], item['stage'] = 'cancelled', stage['name']
+                else:
+                    try:
+                        stage['func'](item['value'])
+                    except Exception as e:
+                        item['error'], item['stage'] = str(e) or type(e).__name__, stage['name']
+            outbox.put(item)
+    
+    def _run_stage(self, index, inbox, outbox):
+        """Run a stage's workers, then pass one stop marker per downstream worker"""
+        stage = self.stages[index]
+        workers = [
+            threading.Thread(target=self._work, args=(stage, inbox, outbox),
+                             name=f"{stage['name']}-{n}", daemon=True)
+            for n in range(stage['workers'])
         ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        downstream = self.stages[index + 1]['workers'] if index + 1 < len(self.stages) else 1
+        for _ in range(downstream):
+            outbox.put(_STOP)
+    
+    def _feed(self, items, inbox):
+        for value in items:
+            if self.stopping.is_set():
+                break
+            inbox.put({'value': value, 'error': None, 'stage': None})
+        for _ in range(self.stages[0]['workers']):
+            inbox.put(_STOP)
+    
+    def run(self, items, on_result=None):
+        """Push `items` through every stage; returns the finished items in completion order
         
-        if personalization_paragraph:
-            body_parts.extend(["", personalization_paragraph])
+        Each finished item is a dict with 'value', 'error' and the 'stage' that
+        failed. `on_result` is called on the calling thread as each one finishes.
+        Ctrl+C stops feeding new items and lets in-flight items drain.
+        """
+        queues = [queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+        threads = [threading.Thread(target=self._feed, args=(items, queues[0]), name='feeder', daemon=True)]
+        for index in range(len(self.stages)):
+            threads.append(threading.Thread(target=self._run_stage, args=(index, queues[index], queues[index + 1]),
+                                            name=f"{self.stages[index]['name']}-stage", daemon=True))
+        for thread in threads:
+            thread.start()
         
-        body_parts.extend([
-            "",
-            "I am excited about the possibility of contributing to your research and would greatly appreciate the opportunity to discuss potential PhD projects with you. I believe my background and research interests align well with your work, and I am eager to learn from your expertise.",
-            "",
-            "Would you be available for a brief meeting to discuss this opportunity further? I am happy to work around your schedule.",
-            "",
-            "Thank you for considering my interest. I look forward to hearing from you.",
-            "",
-            "Best regards,",
-            your_name
-        ])
+        finished = []
+        while True:
+            try:
+                item = queues[-1].get()
+            except KeyboardInterrupt:
+                if self.stopping.is_set():
+                    # Second Ctrl+C: abandon in-flight items (workers are daemon threads)
+                    print("\n Aborted.")
+                    raise
+                print("\n Stopping: finishing items already in progress (Ctrl+C again to abort)...")
+                self.stopping.set()
+                continue
+            if item is _STOP:
+                break
+            finished.append(item)
+            if on_result:
+                on_result(item)
         
-        body = "\n".join(body_parts)
+        for thread in threads:
+            thread.join()
+        return finished
 
-        self.drafted_email = {
-            'subject': subject,
-            'body': body
-        }
-        
-        print(" Email drafted!")
+
+# Accepted column names for each roster field (CSV headers or JSONL keys)
+ROSTER_FIELDS = {
+    'professor_name': ['professor_name', 'name', 'professor'],
+    'email': ['email', 'target_email'],
+    'scholar_url': ['scholar_url', 'google_scholar_url'],
+    'smu_url': ['smu_url', 'smu_profile_url', 'profile_url'],
+    'interests': ['interests', 'research_interests', 'keywords'],
+}
+
+
+def load_roster(path):
+    """Load a professor roster from a .csv or .jsonl file
     
-    def _generate_email_with_gpt(self, your_name, your_background, interests, publications):
-        """Use GPT to generate a personalized email"""
-        
-        # Build context for GPT
-        research_context = f"Professor {self.professor_name}'s research interests: {', '.join(interests) if interests else 'Not available'}.\n"
-        if publications:
-            research_context += f"Recent publications include: {publications[0]}"
-        
-        prompt = f"""You are helping a PhD applicant write a professional, personalized email to a professor.
+    Returns a list of dicts with professor_name, email, scholar_url and smu_url.
+    Rows without a name or email are skipped.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith(('.jsonl', '.json')):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+    
+    roster = []
+    for line_no, row in enumerate(rows, 1):
+        row = {(k or '').strip().lower(): (v.strip() if isinstance(v, str) else v) for k, v in row.items()}
+        entry = {}
+        for field, aliases in ROSTER_FIELDS.items():
+            entry[field] = next((row[a] for a in aliases if row.get(a)), None)
+        if not entry['professor_name'] or not entry['email']:
+            print(f"  Skipping roster row {line_no}: missing name or email")
+            continue
+        roster.append(entry)
+    return roster
 
-Applicant Information:
-- Name: {your_name}
-- Background: {your_background}
 
-Professor Information:
-- Name: Professor {self.professor_name}
-- {research_context}
+_WORD_RE = re.compile(r"[a-z][a-z0-9]+(?:-[a-z0-9]+)*")
+STOPWORDS = frozenset("""
+    a about above after all also an and any are as at be been but by can could did do does for from had has
+    have how however i in into is it its may more most my new not of on or our over such than that the their
+    them then there these they this those through to toward towards under use used using very via was we were
+    what when where which while who will with within without would you your
+    approach approaches based paper study studies towards work""".split())
 
-Write a professional PhD inquiry email that:
-1. Is warm but formal
-2. References specific research interests or publications
-3. Explains why the applicant is a good fit
-4. Requests a meeting to discuss PhD opportunities
-5. Is concise (250-300 words)
-6. Shows genuine interest in the professor's work
 
-Do not include a subject line. Start with "Dear Professor {self.professor_name}," and end with "Best regards,\n{your_name}"
-"""
-        
-        response = openai_client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert at writing professional academic emails."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=500
-        )
+def tokenize(text):
+    """Lower-cased content words and adjacent word pairs ("machine learning") from text"""
+    # map/filter keep the per-word work in C: this runs over every word of every candidate
+    words = list(filterfalse(STOPWORDS.__contains__, _WORD_RE.findall(text.lower())))
+    return words + list(map(' '.join, zip(words, words[1:])))
+
+
+# Publication titles per candidate that count towards ranking; long careers would otherwise dominate
+RANK_MAX_TITLES = 50
+
+
+def candidate_text(entry, scholar=None, smu=None, record=None):
+    """Everything cheaply known about a candidate's research, as one string
+    
+    Uses the roster's interests column plus the stored ProfessorRecord (or
+    else any cached Scholar interests and publication titles) and cached SMU
+    research sections; nothing is fetched.
+    """
+    parts = []
+    interests = entry.get('interests')
+    if interests:
+        parts.append(interests if isinstance(interests, str) else ' '.join(interests))
+    if record:
+        parts.append(record.research_text())
+    elif scholar:
+        parts.extend(scholar.get('interests') or [])
+        titles = [pub.get('title', '') for pub in scholar.get('publications') or []]
+        parts.extend((titles or scholar.get('recent_publications') or [])[:RANK_MAX_TITLES])
+    if smu:
+        parts.extend((smu.get('research_sections') or {}).values())
+        parts.append(smu.get('bio_snippet') or '')
+    return '\n'.join(part for part in parts if part)
+
+
+class RelevanceRanker:
+    """
+    TF-IDF vectors for candidate research texts, scored against a query
+    (the applicant's background) by cosine similarity. Vectors stay sparse
+    term counts; a query only looks at the terms each candidate shares with
+    it, and norms are computed with C-level map/hypot, so tens of thousands
+    of candidates are indexed and scored in a few seconds without numpy.
+    """
+    
+    def __init__(self, texts):
+        self.counts = [Counter(tokenize(text)) for text in texts]
+        document_frequency = Counter()
+        for terms in self.counts:
+            document_frequency.update(terms.keys())
+        n = len(self.counts)
+        # Smoothed IDF, so a term in every document still weighs a little
+        self.idf = {term: math.log((1 + n) / (1 + df)) + 1 for term, df in document_frequency.items()}
+        self.norms = [self._norm(terms) for terms in self.counts]
+    
+    def _weights(self, terms):
+        """TF-IDF weights of a term Counter, in its key order"""
+        idf = list(map(self.idf.__getitem__, terms.keys()))
+        # Sublinear term frequency, (1 + log tf) * idf: ten mentions are not ten times as relevant
+        return map(add, idf, map(mul, map(math.log, terms.values()), idf))
+    
+    def _norm(self, terms):
+        return math.hypot(*self._weights(terms))
+    
+    def scores(self, query):
+        """Cosine similarity of `query` with every text, in the order they were given"""
+        terms = Counter(term for term in tokenize(query) if term in self.idf)
+        query_weights = dict(zip(terms.keys(), self._weights(terms)))
+        query_norm = math.hypot(*query_weights.values())
+        if not query_norm:
+            return [0.0] * len(self.counts)
+        idf = self.idf
+        shared_terms = query_weights.keys()
+        scores = []
+        for counts, norm in zip(self.counts, self.norms):
+            dot = 0.0
+            for term in counts.keys() & shared_terms:
+                dot += query_weights[term] * (1 + math.log(counts[term])) * idf[term]
+            scores.append(dot / (norm * query_norm) if dot else 0.0)
+        return scores
+    
+    def top(self, query, k=None):
+        """Return (index, score) pairs for the best `k` matches (all of them if k is None), best first"""
+        ranked = enumerate(self.scores(query))
+        if k is None or k >= len(self.counts):
+            return sorted(ranked, key=lambda pair: pair[1], reverse=True)
+        return heapq.nlargest(k, ranked, key=lambda pair: pair[1])
+
+
+def rank_roster(roster, background, top_k=None, research_cache=None, research_store=None, tracer=None):
+    """Order a roster by research fit with `background`, keeping the best `top_k`
+    
+    Each returned entry gains a 'relevance' score. Candidates with nothing
+    known about their research score 0 and sort last; use the research
+    command (or an interests column in the roster) to give them a text.
+    """
+    tracer = tracer or Tracer()
+    start = time.perf_counter()
+    with tracer.span('rank', candidates=len(roster), top_k=top_k):
+        scholar, smu, records = {}, {}, {}
+        if research_store is not None:
+            for entry in roster:
+                record = research_store.get(entry['email'], max_publications=RANK_MAX_TITLES)
+                if record:
+                    records[entry['email']] = record
+        if research_cache:
+            # Decoding cached pages is the slow part: only fall back to them for candidates not in the store
+            scholar = research_cache.peek_many('google_scholar', (e['scholar_url'] for e in roster
+                                                                  if e['email'] not in records))
+            smu = research_cache.peek_many('smu', (e['smu_url'] for e in roster))
+        texts = [candidate_text(entry, scholar.get(entry['scholar_url']), smu.get(entry['smu_url']),
+                                records.get(entry['email']))
+                 for entry in roster]
+        ranked = RelevanceRanker(texts).top(background, top_k)
+    
+    known = sum(1 for text in texts if text)
+    print(f" Ranked {len(roster)} candidates ({known} with research text) in {time.perf_counter() - start:.2f}s")
+    if top_k is not None and top_k < len(roster):
+        print(f" Keeping the top {top_k}: relevance {ranked[-1][1]:.3f} to {ranked[0][1]:.3f}" if ranked
+              else f" Keeping the top {top_k}")
+    return [dict(roster[index], relevance=round(score, 4)) for index, score in ranked]
+
+
+class CampaignRunner:
+    """
+    Runs the orchestrator over a whole roster as a streaming pipeline:
+    research on a pool of browsers, concurrent drafting, approval (or the
+    review queue) and sending through one pooled, rate-limited SMTP
+    connection all overlap across professors. Fixed costs are paid once.
+    Results are appended to a JSONL file per professor as each finishes.
+    """
+    
+    PHASES = ('research', 'draft', 'approve', 'send')
+    # Built for every roster entry; benchmarks substitute an instrumented subclass
+    orchestrator_class = PhDEmailOrchestrator
+    
+    def __init__(self, roster, output_path, config=None, workers=None,
+                 research_cache=None, refresh_research=False, draft_cache=None, regenerate_draft=False,
+                 review_queue=None, journal=None, sent_index=None, snapshots=None, research_store=None,
+                 tracer=None):
+        self.config = config or Config()
+        self.tracer = tracer or Tracer()
+        self.roster = roster
+        self.output_path = output_path
+        self.workers = workers or self.config.browser_pool_size
+        self.research_cache = research_cache
+        self.refresh_research = refresh_research
+        self.draft_cache = draft_cache
+        self.regenerate_draft = regenerate_draft
+        # With a review queue, drafts are queued instead of approved interactively
+        self.review_queue = review_queue
+        self.journal = journal
+        # Optional SentIndex: already-contacted professors are skipped before research
+        self.sent_index = sent_index
+        # Optional ResearchSnapshots: drafts are only rewritten when research changed materially
+        self.snapshots = snapshots
+        # Optional ResearchStore: every professor's research is recorded for later ranking and queries
+        self.research_store = research_store
+        self.sender = None
+    
+    def _write_result(self, result):
+        with open(self.output_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(result) + "\n")
+    
+    def _screen(self):
+        """Split the roster into entries to process and results for skipped ones
         
-        return response.choices[0].message.content.strip()
+        Duplicate addresses and anyone the sent-mail index rules out are skipped.
+        """
+        entries, skipped, seen = [], [], set()
+        for entry in self.roster:
+            email = entry['email'].strip().lower()
+            if email in seen:
+                reason = "duplicate roster entry"
+            else:
+                reason = self.sent_index.skip_reason(email) if self.sent_index else None
+            seen.add(email)
+            if reason:
+                skipped.append({'professor_name': entry['professor_name'], 'email': entry['email'],
+                                'approved': False, 'sent': False, 'queued': False, 'skipped': reason})
+            else:
+                entries.append(entry)
+        return entries, skipped
+    
+    def _orchestrators(self, entries):
+        """Build orchestrators lazily so huge rosters are not all held in flight"""
+        for entry in entries:
+            orchestrator = self.orchestrator_class(
+                professor_name=entry['professor_name'],
+                test_email=entry['email'],
+                scholar_url=entry['scholar_url'],
+                smu_url=entry['smu_url'],
+                research_cache=self.research_cache,
+                refresh_research=self.refresh_research,
+                draft_cache=self.draft_cache,
+                regenerate_draft=self.regenerate_draft,
+                config=self.config,
+                tracer=self.tracer
+            )
+            # Research workers run in parallel and cannot prompt
+            orchestrator.interactive = False
+            orchestrator.journal = self.journal
+            orchestrator.snapshots = self.snapshots
+            orchestrator.research_store = self.research_store
+            yield orchestrator
+    
+    def _send(self, orchestrator, sender_email, app_password):
+        orchestrator.deliver(sender_email, app_password, sender=self.sender)
+        if orchestrator.approved and not orchestrator.sent:
+            raise RuntimeError(self.sender.failures[-1]['error'] if self.sender.failures else "send failed")
+    
+    def _result(self, item):
+        orchestrator = item['value']
+        result = {
+            'professor_name': orchestrator.professor_name,
+            'email': orchestrator.test_email,
+            'approved': orchestrator.approved,
+            'sent': orchestrator.sent,
+            'queued': bool(self.review_queue) and orchestrator.drafted_email is not None and item['error'] is None
+        }
+        if item['error']:
+            result['error'] = item['error']
+            result['failed_stage'] = item['stage']
+        result['research_data'] = orchestrator.research_data
+        result['page_timings'] = orchestrator.page_timings
+        result['drafted_email'] = orchestrator.drafted_email
+        result['research_changes'] = orchestrator.research_changes
+        return result
+    
+    def run(self, your_name, your_background, sender_email, app_password, until='send'):
+        """Process every roster entry and write results to the output file
         
-    def request_approval(self):
-        """Display email and request human approval (HITL)"""
-        print("\n" + "="*80)
-        print(" DRAFTED EMAIL FOR YOUR APPROVAL")
+        `until` names the last phase to run (see PHASES); 'research' only
+        fills the research cache.
+        """
+        phases = self.PHASES[:self.PHASES.index(until) + 1]
+        print(f" Starting campaign for {len(self.roster)} professor(s)")
+        print(f" Results will be written to {self.output_path}")
+        if self.journal:
+            print(f" Run ID: {self.journal.run_id} (continue it with: resume {self.journal.run_id})")
         print("="*80)
         
-        print(f"\n RESEARCH SUMMARY:")
-        print(json.dumps(self.research_data, indent=2))
+        summary = {'processed': 0, 'skipped': 0, 'queued': 0, 'sent': 0, 'errors': 0, 'unchanged': 0}
+        timings = []
         
-        print(f"\n" + "-"*80)
-        print(f"SUBJECT: {self.drafted_email['subject']}")
-        print(f"-"*80)
-        print(self.drafted_email['body'])
-        print("-"*80)
+        entries, skipped = self._screen()
+        for result in skipped:
+            self._write_result(result)
+        summary['skipped'] = len(skipped)
+        if skipped:
+            print(f" Skipping {len(skipped)} already-contacted or suppressed professor(s)")
         
-        print(f"\n This email will be sent to: {self.test_email}")
+        def record(item):
+            result = self._result(item)
+            self._write_result(result)
+            timings.extend(result['page_timings'])
+            summary['processed'] += 1
+            summary['queued'] += int(result['queued'])
+            summary['sent'] += int(result['sent'])
+            summary['errors'] += int('error' in result)
+            changes = result['research_changes']
+            summary['unchanged'] += int(bool(changes) and not changes['material'])
+            status = f"failed during {item['stage']}: {item['error']}" if item['error'] else "done"
+            print(f"\n[{summary['processed']}/{len(entries)}] {result['professor_name']} {status}")
         
-        while True:
-            approval = input("\n Do you approve sending this email? (yes/no/edit): ").lower().strip()
-            
-            if approval == 'yes':
-                print(" Email approved for sending!")
-                return True
-            elif approval == 'no':
-                print(" Email sending cancelled.")
-                return False
-            elif approval == 'edit':
-                print("\n  Enter your edited email body (type 'END' on a new line when done):")
-                lines = []
-                while True:
-                    line = input()
-                    if line == 'END':
-                        break
-                    lines.append(line)
-                self.drafted_email['body'] = '\n'.join(lines)
-                
-                print("\n" + "-"*80)
-                print("UPDATED EMAIL:")
-                print(self.drafted_email['body'])
-                print("-"*80)
-            else:
-                print("  Please enter 'yes', 'no', or 'edit'")
+        pool = BrowserPool(self.workers, config=self.config, tracer=self.tracer)
+        drafter = AsyncDrafter(self.config, tracer=self.tracer) if 'draft' in phases else None
+        if drafter:
+            drafter.start()
+        self.sender = SMTPSender(sender_email, app_password, config=self.config, sent_index=self.sent_index,
+                                 tracer=self.tracer)
+        try:
+            pipeline = Pipeline(self.config.pipeline_queue_size)
+            pipeline.add_stage('research', lambda o: o.research(pool), workers=self.workers)
+            if 'draft' in phases:
+                pipeline.add_stage('draft', lambda o: o.draft(your_name, your_background, drafter=drafter),
+                                   workers=drafter.concurrency)
+            if 'approve' in phases:
+                pipeline.add_stage('approve', lambda o: o.approve(self.review_queue))
+            if 'send' in phases:
+                pipeline.add_stage('send', lambda o: self._send(o, sender_email, app_password))
+            pipeline.run(self._orchestrators(entries), on_result=record)
+        
+        finally:
+            self.sender.close()
+            if drafter:
+                drafter.stop()
+            pool.close()
+        
+        print_page_timings(timings)
+        print_browser_startups(pool.startup_times)
+        print("\n" + "="*80)
+        print(f" Campaign finished: {summary['processed']} processed, {summary['skipped']} skipped, "
+              f"{summary['queued']} queued, {summary['sent']} sent, {summary['errors']} errors")
+        if self.snapshots:
+            print(f" Research unchanged (no material change) for {summary['unchanged']} professor(s)")
+        print("="*80)
+        return summary
+
+
+class QueueWorker:
+    """
+    Pulls professors from a JobQueue one at a time: research, draft, then
+    hand the draft to the review queue. A heartbeat thread renews the lease
+    while the job runs. If the lease is lost, e.g. after a long stall, the
+    job is dropped without being handed off: another worker owns it now.
+    Run as many workers as cores, browsers and API limits allow, in one
+    process each, on any host that shares orchestrator.db.
+    """
     
-    def send_email(self, sender_email, app_password):
-        """Send the approved email via Gmail SMTP"""
-        print("\n Sending email...")
+    def __init__(self, queue_name, config=None, worker_id=None, use_cache=True, refresh_research=False,
+                 regenerate_draft=False, tracer=None):
+        import socket
+        self.config = config or Config()
+        self.tracer = tracer or Tracer()
+        self.queue_name = queue_name
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.jobs = JobQueue(self.config)
+        self.sent_index = SentIndex(self.config)
+        self.research_cache = ResearchCache(self.config) if use_cache else None
+        self.draft_cache = DraftCache(self.config) if use_cache else None
+        self.snapshots = ResearchSnapshots(self.config) if use_cache else None
+        # Shared with every other writer through the store's own lock
+        self.research_store = ResearchStore(self.config) if use_cache else None
+        self.refresh_research = refresh_research
+        self.regenerate_draft = regenerate_draft
+        self.pool = None
+        self.outcomes = Counter()
+    
+    def _heartbeat(self, job, stop, lost):
+        while not stop.wait(self.jobs.lease_seconds / 4):
+            try:
+                alive = self.jobs.heartbeat(job)
+            except sqlite3.Error:
+                # A busy database is retried on the next beat; the lease outlasts a few misses
+                continue
+            if not alive:
+                lost.set()
+                return
+    
+    def _process(self, job, your_name, your_background):
+        """Run one leased job and return its outcome: queued, skipped, failed or lost"""
+        entry = json.loads(job['entry'])
+        reason = self.sent_index.skip_reason(entry['email'])
+        if reason:
+            self.jobs.skip(job, reason)
+            return 'skipped'
+        orchestrator = PhDEmailOrchestrator(
+            professor_name=entry['professor_name'],
+            test_email=entry['email'],
+            scholar_url=entry['scholar_url'],
+            smu_url=entry['smu_url'],
+            research_cache=self.research_cache,
+            refresh_research=self.refresh_research,
+            draft_cache=self.draft_cache,
+            regenerate_draft=self.regenerate_draft,
+            config=self.config,
+            tracer=self.tracer
+        )
+        orchestrator.interactive = False
+        orchestrator.snapshots = self.snapshots
+        orchestrator.research_store = self.research_store
         
+        stop, lost = threading.Event(), threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job, stop, lost),
+                                     name=f"heartbeat-{job['id']}", daemon=True)
+        heartbeat.start()
         try:
-            msg = EmailMessage()
-            msg['Subject'] = self.drafted_email['subject']
-            msg['From'] = sender_email
-            msg['To'] = self.test_email
-            msg.set_content(self.drafted_email['body'])
-            
-            smtp_server = "smtp.gmail.com"
-            port = 465
-            
-            context = ssl._create_unverified_context()
-            
-            with smtplib.SMTP_SSL(smtp_server, port, context=context) as server:
-                server.login(sender_email, app_password)
-                server.send_message(msg)
-            
-            print(" Email sent successfully!")
-            return True
-            
-        except smtplib.SMTPException as e:
-            print(f" SMTP Error: {e}")
-            return False
+            with self.tracer.span('job', attempt=job['attempts']) as span:
+                orchestrator.research(self.pool)
+                # Don't spend GPT tokens on a professor another worker has taken over
+                if not lost.is_set():
+                    orchestrator.draft(your_name, your_background)
+                span['lost'] = lost.is_set()
+        except KeyboardInterrupt:
+            self.jobs.release(job)
+            raise
         except Exception as e:
-            print(f" Error sending email: {e}")
-            return False
-    
-    def cleanup(self):
-        """Close browser and cleanup resources"""
-        if self.driver:
-            self.driver.quit()
-            print("\n Browser closed")
+            self.jobs.fail(job, str(e) or type(e).__name__)
+            print(f" [{self.worker_id}] {entry['professor_name']} failed: {e}")
+            return 'failed'
+        finally:
+            stop.set()
+            heartbeat.join()
+        
+        if lost.is_set():
+            print(f" [{self.worker_id}] Lost the lease on {entry['professor_name']}; another worker has it")
+            return 'lost'
+        if not orchestrator.drafted_email:
+            self.jobs.fail(job, "no draft was written")
+            return 'failed'
+        review_id = self.jobs.complete(job, orchestrator)
+        if review_id is None:
+            print(f" [{self.worker_id}] Lost the lease on {entry['professor_name']} before hand-off; not queued")
+            return 'lost'
+        print(f" [{self.worker_id}] Draft #{review_id} for {entry['professor_name']} queued for review")
+        return 'queued'
     
-    def run(self, your_name, your_background, sender_email, app_password):
-        """Main orchestration method"""
+    def run(self, your_name, your_background):
+        """Work until no job is pending or leased anywhere; returns outcome counts"""
+        print(f" [{self.worker_id}] Working on job queue '{self.queue_name}'")
+        # One job at a time, so one browser: scale with more workers instead
+        self.pool = BrowserPool(1, config=self.config, tracer=self.tracer)
         try:
-            print(" Starting PhD Email Orchestrator Agent")
-            print("="*80)
-            
-            # Phase 1: Research
-            self.setup_browser()
-            self.scrape_google_scholar()
-            self.scrape_smu_website()
-            
-            # Phase 2: Composition
-            self.compose_email(your_name, your_background)
-            
-            # Phase 3: Human Approval (HITL)
-            approved = self.request_approval()
-            
-            # Phase 4: Send Email
-            if approved:
-                self.send_email(sender_email, app_password)
-            
-            print("\n" + "="*80)
-            print(" Workflow completed!")
-            print("="*80)
-            
-        except Exception as e:
-            print(f"\n Workflow error: {e}")
-            
+            while True:
+                job = self.jobs.lease(self.queue_name, self.worker_id)
+                if job is None:
+                    if not self.jobs.unfinished(self.queue_name):
+                        break
+                    # Jobs leased elsewhere may still come back if their worker dies
+                    time.sleep(min(5.0, self.jobs.lease_seconds / 4))
+                    continue
+                self.outcomes[self._process(job, your_name, your_background)] += 1
         finally:
-            self.cleanup()
+            self.pool.close()
+            if self.research_store is not None:
+                self.research_store.close()
+        print(f" [{self.worker_id}] Finished: " + ', '.join(f"{count} {outcome}"
+                                                            for outcome, count in sorted(self.outcomes.items())))
+        return dict(self.outcomes)
+
+
+def _worker_trace_path(trace_path, n):
+    """Per-worker trace file next to `trace_path`, keeping its extension and so its format"""
+    root, ext = os.path.splitext(trace_path)
+    return f"{root}-worker-{n}{ext}"
+
+
+def _work_process(queue_name, config, options, trace_path=None):
+    """Entry point of each `work` worker process"""
+    tracer = Tracer()
+    try:
+        QueueWorker(queue_name, config, tracer=tracer, **options).run(config.your_name, config.your_background)
+    except KeyboardInterrupt:
+        # Ctrl+C reaches every process; the worker has already given its job back
+        pass
+    finally:
+        if trace_path:
+            tracer.export(trace_path)
+
+
+def run_workers(queue_name, config, processes=None, tracer=None, trace_path=None, **options):
+    """Drain a job queue with `processes` worker processes (in this process if just one)
+    
+    Processes are spawned rather than forked: Chrome, SQLite connections and
+    threads do not survive a fork. Each spawned worker traces into its own
+    Tracer and, given `trace_path`, writes it to a `-worker-N` file beside it.
+    Returns the queue's final status counts.
+    """
+    processes = processes or config.worker_processes
+    if processes <= 1:
+        try:
+            QueueWorker(queue_name, config, tracer=tracer, **options).run(config.your_name, config.your_background)
+        except KeyboardInterrupt:
+            print("\n Stopped; the job in progress went back to the queue")
+    else:
+        import multiprocessing
+        context = multiprocessing.get_context('spawn')
+        trace_paths = [_worker_trace_path(trace_path, n) if trace_path else None for n in range(processes)]
+        workers = [context.Process(target=_work_process, args=(queue_name, config, options, trace_paths[n]),
+                                   name=f"worker-{n}")
+                   for n in range(processes)]
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            print("\n Stopping workers; their jobs go back to the queue...")
+            for worker in workers:
+                worker.join()
+        if trace_path:
+            print(f" Worker traces written to {', '.join(path for path in trace_paths if os.path.exists(path))}")
+    jobs = JobQueue(config)
+    counts = jobs.counts(queue_name)
+    jobs.close()
+    return counts
+
+
+COMMANDS = {
+    'run': "Research, draft, approve and send for the professor configured in .env (the default)",
+    'campaign': "Run the whole workflow for every professor in a roster",
+    'research': "Research a roster into the research cache without drafting or sending",
+    'draft': "Research and draft for a roster, queueing every draft for review (nothing is sent)",
+    'review': "Review queued drafts: approve, edit or reject them in one session",
+    'send': "Send every approved draft in the review queue",
+    'resume': "Resume an interrupted run, skipping phases it already completed",
+    'suppress': "Never contact these addresses (or lift a suppression with --remove)",
+    'rank': "Rank a roster by fit with YOUR_BACKGROUND using cached research, without scraping",
+    'crawl': "Crawl faculty directory pages for profiles and write them out as a roster",
+    'query': "Find researched professors by interest in the research store, without scraping",
+    'enqueue': "Add a roster to the shared job queue for work processes",
+    'work': "Research and draft professors from the job queue, queueing drafts for review (nothing is sent)",
+    'jobs': "Show the job queue's progress and failed jobs",
+    'history': "Show how a professor's research changed between runs",
+}
+
+# Settings each command cannot run without
+REQUIRED_SETTINGS = {
+    'run': ('sender_email', 'gmail_app_password', 'your_name', 'target_email'),
+    'campaign': ('sender_email', 'gmail_app_password', 'your_name'),
+    'resume': ('sender_email', 'gmail_app_password', 'your_name'),
+    'draft': ('your_name',),
+    'work': ('your_name',),
+    'send': ('sender_email', 'gmail_app_password'),
+    'rank': ('your_background',),
+}
+
+
+def parse_args(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # Without a command, behave like the original single-professor script
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ('-h', '--help')):
+        argv.insert(0, 'run')
+    
+    cache_options = argparse.ArgumentParser(add_help=False)
+    cache_options.add_argument('--refresh-research', action='store_true',
+                               help="Ignore cached research and scrape again (the cache is still updated)")
+    cache_options.add_argument('--no-cache', action='store_true',
+                               help="Do not read or write the research or draft caches, snapshots or research store")
+    cache_options.add_argument('--regenerate', action='store_true',
+                               help="Ask GPT for a new draft even if one was cached or the research has not changed")
+    
+    contact_options = argparse.ArgumentParser(add_help=False)
+    contact_options.add_argument('--cooldown-days', type=float,
+                                 help="Allow re-contacting people last emailed more than this many days ago "
+                                      "(default: RECONTACT_COOLDOWN_DAYS, or never re-contact)")
+    contact_options.add_argument('--recontact', metavar='EMAIL', action='append', default=[],
+                                 help="Contact this address even if it was emailed before (repeatable)")
+    contact_options.add_argument('--force-recontact', action='store_true',
+                                 help="Ignore the sent-mail index for this run")
+    
+    roster_options = argparse.ArgumentParser(add_help=False)
+    roster_options.add_argument('roster', help="CSV or JSONL roster of professors")
+    roster_options.add_argument('--output', default='campaign_results.jsonl',
+                                help="Where to write per-professor results (default: campaign_results.jsonl)")
+    roster_options.add_argument('--workers', type=int,
+                                help="Number of parallel browsers for research (default: BROWSER_POOL_SIZE, or 4)")
+    roster_options.add_argument('--top', type=int, metavar='K',
+                                help="Only process the K candidates whose research best matches YOUR_BACKGROUND "
+                                     "(default: RANK_TOP_K, or everyone)")
+    
+    trace_option = argparse.ArgumentParser(add_help=False)
+    trace_option.add_argument('--trace', metavar='PATH',
+                              help="Write timing spans to PATH: JSON lines if it ends in .jsonl, "
+                                   "otherwise a Chrome trace (chrome://tracing, Perfetto)")
+    
+    queue_option = argparse.ArgumentParser(add_help=False)
+    queue_option.add_argument('--queue', action='store_true',
+                              help="Queue drafts for later review instead of approving them now (nothing is sent)")
+    
+    parser = argparse.ArgumentParser(description="PhD Email Orchestrator Agent")
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND')
+    commands.add_parser('run', help=COMMANDS['run'],
+                        parents=[cache_options, contact_options, queue_option, trace_option])
+    commands.add_parser('campaign', help=COMMANDS['campaign'],
+                        parents=[roster_options, cache_options, contact_options, queue_option, trace_option])
+    research = commands.add_parser('research', help=COMMANDS['research'], parents=[roster_options, trace_option])
+    research.add_argument('--refresh-research', action='store_true',
+                          help="Ignore cached research and scrape again (the cache is still updated)")
+    commands.add_parser('draft', help=COMMANDS['draft'],
+                        parents=[roster_options, cache_options, contact_options, trace_option])
+    commands.add_parser('review', help=COMMANDS['review'], parents=[trace_option])
+    commands.add_parser('send', help=COMMANDS['send'], parents=[contact_options, trace_option])
+    resume = commands.add_parser('resume', help=COMMANDS['resume'],
+                                 parents=[cache_options, contact_options, trace_option])
+    resume.add_argument('run_id', metavar='RUN_ID')
+    resume.add_argument('--workers', type=int,
+                        help="Number of parallel browsers for research (default: BROWSER_POOL_SIZE, or 4)")
+    suppress = commands.add_parser('suppress', help=COMMANDS['suppress'])
+    suppress.add_argument('emails', metavar='EMAIL', nargs='+')
+    suppress.add_argument('--remove', action='store_true', help="Remove a manual suppression instead")
+    rank = commands.add_parser('rank', help=COMMANDS['rank'], parents=[trace_option])
+    rank.add_argument('roster', help="CSV or JSONL roster of professors")
+    rank.add_argument('--top', type=int, metavar='K', help="Show (and save) only the best K (default: RANK_TOP_K)")
+    rank.add_argument('--save', metavar='PATH',
+                      help="Write the ranked roster to PATH (JSON lines if it ends in .jsonl, otherwise CSV)")
+    crawl = commands.add_parser('crawl', help=COMMANDS['crawl'], parents=[trace_option])
+    crawl.add_argument('seeds', metavar='URL', nargs='+', help="Department or faculty listing page to start from")
+    crawl.add_argument('--save', metavar='PATH', default='crawled_roster.csv',
+                       help="Where to write the roster (default: crawled_roster.csv; JSON lines if it ends in .jsonl)")
+    crawl.add_argument('--max-pages', type=int, help="Stop after this many pages (default: CRAWL_MAX_PAGES, or 2000)")
+    crawl.add_argument('--max-depth', type=int,
+                       help="How many links away from a seed to go (default: CRAWL_MAX_DEPTH, or 3)")
+    query = commands.add_parser('query', help=COMMANDS['query'], parents=[trace_option])
+    query.add_argument('--interest', metavar='INTEREST', action='append', default=[],
+                       help="Only professors listing this interest (repeatable: all must match); "
+                            "without it, list the most common interests")
+    query.add_argument('--save', metavar='PATH',
+                       help="Write the matching professors to PATH as a roster (JSON lines if it ends in .jsonl, "
+                            "otherwise CSV)")
+    
+    queue_name_option = argparse.ArgumentParser(add_help=False)
+    queue_name_option.add_argument('--queue-name', default='default', metavar='NAME',
+                                   help="Which job queue to use (default: default)")
+    enqueue = commands.add_parser('enqueue', help=COMMANDS['enqueue'], parents=[queue_name_option])
+    enqueue.add_argument('roster', help="CSV or JSONL roster of professors")
+    enqueue.add_argument('--top', type=int, metavar='K',
+                         help="Only enqueue the K candidates whose research best matches YOUR_BACKGROUND "
+                              "(default: RANK_TOP_K, or everyone)")
+    enqueue.add_argument('--retry-failed', action='store_true',
+                         help="Also give jobs that failed on every attempt another round of attempts")
+    work = commands.add_parser('work', help=COMMANDS['work'], parents=[queue_name_option, cache_options, trace_option])
+    work.add_argument('--processes', type=int,
+                      help="Worker processes to run on this host (default: WORKER_PROCESSES, or 2)")
+    commands.add_parser('jobs', help=COMMANDS['jobs'], parents=[queue_name_option])
+    history = commands.add_parser('history', help=COMMANDS['history'])
+    history.add_argument('email', metavar='EMAIL')
+    return parser.parse_args(argv)
 
 
-def main():
-    """Run orchestrator with .env file settings"""
+def main(argv=None):
+    """Run a command with settings from the environment and .env file"""
+    args = parse_args(argv)
+    config = Config.from_env()
     print("""
     
               PhD Email Orchestrator Agent                          
@@ -535,29 +4539,262 @@ def main():
     
     """)
     
-    print(f"Sender: {SENDER_EMAIL}")
-    print(f"Target: {TARGET_EMAIL}")
-    print(f"Your Name: {YOUR_NAME}")
+    missing = config.missing(*REQUIRED_SETTINGS.get(args.command, ()))
+    if missing:
+        print("ERROR: Missing required environment variables in .env file!")
+        print(f"Required for '{args.command}': {', '.join(missing)}")
+        sys.exit(1)
+    
+    tracer = Tracer()
+    try:
+        run_command(args, config, tracer)
+    finally:
+        tracer.print_summary()
+        if getattr(args, 'trace', None):
+            tracer.export(args.trace)
+            print(f" Trace written to {args.trace}")
+
+
+def ranked_roster(args, config, tracer, research_cache=None, research_store=None, use_cache=True):
+    """Load the command's roster, keeping only the best --top candidates if asked to"""
+    roster = load_roster(args.roster)
+    top_k = args.top if args.top is not None else config.rank_top_k
+    if top_k is None and args.command != 'rank':
+        return roster
+    if not config.your_background:
+        print(" Not ranking the roster: YOUR_BACKGROUND is not set")
+        return roster
+    if research_cache is None and use_cache:
+        research_cache = ResearchCache(config)
+    if research_store is None and use_cache:
+        research_store = ResearchStore(config)
+    return rank_roster(roster, config.your_background, top_k, research_cache=research_cache,
+                       research_store=research_store, tracer=tracer)
+
+
+def save_roster(roster, path):
+    """Write a roster as JSON lines or CSV; load_roster reads either back"""
+    fields = list(ROSTER_FIELDS) + ['relevance']
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        if path.lower().endswith('.jsonl'):
+            for entry in roster:
+                f.write(json.dumps({field: entry.get(field) for field in fields}) + "\n")
+            return
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        for entry in roster:
+            interests = entry.get('interests')
+            writer.writerow(dict(entry, interests=interests if isinstance(interests, str) or not interests
+                                 else '; '.join(interests)))
+
+
+def run_command(args, config, tracer):
+    """Run the parsed command, recording timing spans in `tracer`"""
+    if args.command == 'crawl':
+        roster = DirectoryCrawler(args.seeds, config=config, tracer=tracer,
+                                  max_pages=args.max_pages, max_depth=args.max_depth).crawl()
+        save_roster(roster, args.save)
+        print(f" Roster of {len(roster)} professors written to {args.save}")
+        return
+    if args.command == 'rank':
+        roster = ranked_roster(args, config, tracer)
+        print(f"\n  {'#':>5}  {'relevance':>9}  {'professor':<32}email")
+        for position, entry in enumerate(roster[:args.top or 25], 1):
+            print(f"  {position:>5}  {entry['relevance']:>9.3f}  {entry['professor_name'][:31]:<32}{entry['email']}")
+        if args.save:
+            save_roster(roster, args.save)
+            print(f"\n Ranked roster written to {args.save}")
+        return
+    if args.command == 'query':
+        research_store = ResearchStore(config)
+        if not args.interest:
+            print(f"\n  {'professors':>10}  interest")
+            for interest, count in research_store.interests()[:50]:
+                print(f"  {count:>10}  {interest}")
+            return
+        with tracer.span('query', interests=len(args.interest)) as span:
+            records = research_store.professors_with_interest(*args.interest)
+            span['matches'] = len(records)
+        print(f"\n {len(records)} of {len(research_store)} researched professors list {' and '.join(args.interest)}")
+        for record in records[:25]:
+            print(f"  {record.name[:31]:<32}{record.email:<40}{record.citations or '':>8}")
+        if args.save:
+            save_roster([{'professor_name': record.name, 'email': record.email, 'scholar_url': record.scholar_url,
+                          'smu_url': record.smu_url, 'interests': list(record.interests)} for record in records],
+                        args.save)
+            print(f"\n Roster of {len(records)} professors written to {args.save}")
+        return
+    if args.command == 'suppress':
+        sent_index = SentIndex(config)
+        for email in args.emails:
+            if args.remove:
+                sent_index.unsuppress(email)
+                print(f"Removed suppression for {email}")
+            else:
+                sent_index.suppress(email)
+                print(f"Suppressed {email}")
+        return
+    if args.command == 'review':
+        review_drafts(ReviewQueue(config), tracer=tracer)
+        return
+    if args.command == 'enqueue':
+        jobs = JobQueue(config)
+        added = jobs.enqueue(args.queue_name, ranked_roster(args, config, tracer))
+        retried = jobs.retry_failed(args.queue_name) if args.retry_failed else 0
+        print(f" Added {added} job(s) to queue '{args.queue_name}'"
+              + (f", retrying {retried} failed" if retried else ""))
+        print(f" Jobs: {jobs.counts(args.queue_name)}")
+        print(f" Start workers on any host sharing {config.db_path} with: work --queue-name {args.queue_name}")
+        return
+    if args.command == 'history':
+        snapshots = ResearchSnapshots(config)
+        changes = snapshots.history(args.email)
+        if not changes:
+            print(f" No research recorded for {args.email}")
+            return
+        print(f" Research history for {args.email} ({len(changes)} change(s)):")
+        for change in changes:
+            diff = change['diff'] or {}
+            when = time.strftime('%Y-%m-%d %H:%M', time.localtime(change['taken_at']))
+            summary = 'first snapshot' if diff.get('first') else describe_diff(diff)
+            print(f"  {when}  {summary}{'' if diff.get('first') or diff.get('material') else '  (not material)'}")
+        latest = snapshots.latest(args.email)
+        print(f" Now: {len(latest['interests'])} interests, {len(latest['publications'])} publications, "
+              f"{latest['citations'] if latest['citations'] is not None else 'unknown'} citations")
+        return
+    if args.command == 'jobs':
+        jobs = JobQueue(config)
+        counts = jobs.counts(args.queue_name)
+        print(f" Queue '{args.queue_name}': " + ', '.join(f"{counts.get(status, 0)} {status}"
+                                                        for status in JobQueue.STATUSES))
+        for failure in jobs.failures(args.queue_name):
+            print(f"  {failure['email']} failed after {failure['attempts']} attempt(s): {failure['error']}")
+        return
+    if args.command == 'work':
+        counts = run_workers(args.queue_name, config, args.processes, tracer=tracer, trace_path=args.trace,
+                             use_cache=not args.no_cache, refresh_research=args.refresh_research,
+                             regenerate_draft=args.regenerate)
+        print(f"\n Queue '{args.queue_name}': " + ', '.join(f"{counts.get(status, 0)} {status}"
+                                                           for status in JobQueue.STATUSES))
+        print(" Review the queued drafts with: review")
+        return
+    if args.command == 'research':
+        research_cache = ResearchCache(config)
+        research_store = ResearchStore(config)
+        roster = ranked_roster(args, config, tracer, research_cache, research_store)
+        print(f"Roster: {len(roster)} professors")
+        CampaignRunner(roster, args.output, config=config, workers=args.workers,
+                       research_cache=research_cache,
+                       refresh_research=args.refresh_research,
+                       snapshots=ResearchSnapshots(config),
+                       research_store=research_store,
+                       tracer=tracer).run(
+            your_name=config.your_name,
+            your_background=config.your_background,
+            sender_email=config.sender_email,
+            app_password=config.gmail_app_password,
+            until='research'
+        )
+        return
+    
+    sent_index = SentIndex(config, cooldown_days=args.cooldown_days, overrides=args.recontact,
+                           force=args.force_recontact)
+    if args.command == 'send':
+        send_approved(ReviewQueue(config), config.sender_email, config.gmail_app_password,
+                      sent_index=sent_index, config=config, tracer=tracer)
+        return
     
-    if OPENAI_API_KEY:
-        print(f"OpenAI API: Enabled (will use GPT-4 for email generation)")
+    journal = RunJournal(args.run_id if args.command == 'resume' else None, config)
+    research_store = None if args.no_cache else ResearchStore(config)
+    if args.command == 'resume':
+        loaded = journal.load()
+        if not loaded:
+            print(f"ERROR: No run with ID {args.run_id} found in {config.db_path}")
+            sys.exit(1)
+        roster, options = loaded
+        print(f"Resuming run {args.run_id}")
+    elif args.command in ('campaign', 'draft'):
+        roster = ranked_roster(args, config, tracer, research_store=research_store, use_cache=not args.no_cache)
+        options = {'mode': 'campaign', 'queue': args.command == 'draft' or args.queue, 'output': args.output}
+    else:
+        roster = [{'professor_name': config.professor_name, 'email': config.target_email,
+                   'scholar_url': config.google_scholar_url, 'smu_url': config.smu_profile_url}]
+        options = {'mode': 'single', 'queue': args.queue, 'output': None}
+    
+    if options['mode'] == 'single':
+        reason = sent_index.skip_reason(roster[0]['email'])
+        if reason:
+            print(f"Not contacting {roster[0]['email']}: {reason}")
+            print("Use --recontact or --force-recontact to override.")
+            return
+    
+    if config.sender_email:
+        print(f"Sender: {config.sender_email}")
+    if options['mode'] == 'campaign':
+        print(f"Roster: {len(roster)} professors")
+    else:
+        print(f"Target: {roster[0]['email']}")
+    print(f"Your Name: {config.your_name}")
+    
+    if config.openai_api_key:
+        print(f"OpenAI API: Enabled (will use {config.gpt_model} for email generation)")
     else:
         print(f"OpenAI API: Not configured (will use template-based email)")
     
     print("\nPress Enter to start, or Ctrl+C to cancel...")
     input()
     
+    if args.command != 'resume':
+        journal.start(roster, options)
+    research_cache = None if args.no_cache else ResearchCache(config)
+    draft_cache = None if args.no_cache else DraftCache(config)
+    snapshots = None if args.no_cache else ResearchSnapshots(config)
+    review_queue = ReviewQueue(config) if options['queue'] else None
+    
+    if options['mode'] == 'campaign':
+        CampaignRunner(roster, options['output'], config=config, workers=args.workers,
+                       research_cache=research_cache,
+                       refresh_research=args.refresh_research,
+                       draft_cache=draft_cache,
+                       regenerate_draft=args.regenerate,
+                       review_queue=review_queue,
+                       journal=journal,
+                       sent_index=sent_index,
+                       snapshots=snapshots,
+                       research_store=research_store,
+                       tracer=tracer).run(
+            your_name=config.your_name,
+            your_background=config.your_background,
+            sender_email=config.sender_email,
+            app_password=config.gmail_app_password
+        )
+        return
+    
     # Create and run orchestrator
+    entry = roster[0]
     orchestrator = PhDEmailOrchestrator(
-        professor_name=PROFESSOR_NAME,
-        test_email=TARGET_EMAIL
+        professor_name=entry['professor_name'],
+        test_email=entry['email'],
+        scholar_url=entry['scholar_url'],
+        smu_url=entry['smu_url'],
+        research_cache=research_cache,
+        refresh_research=args.refresh_research,
+        draft_cache=draft_cache,
+        regenerate_draft=args.regenerate,
+        config=config,
+        tracer=tracer
     )
+    orchestrator.sent_index = sent_index
+    orchestrator.snapshots = snapshots
+    orchestrator.research_store = research_store
     
     orchestrator.run(
-        your_name=YOUR_NAME,
-        your_background=YOUR_BACKGROUND,
-        sender_email=SENDER_EMAIL,
-        app_password=GMAIL_APP_PASSWORD
+        your_name=config.your_name,
+        your_background=config.your_background,
+        sender_email=config.sender_email,
+        app_password=config.gmail_app_password,
+        review_queue=review_queue,
+        journal=journal
     )
 
 
@@ -0,0 +1,78 @@
+"""
+AsyncDrafter against the benchmark chat completions stub with injected
+failures: 429s and 5xx errors are retried (honoring Retry-After), other
+4xx errors are not, and a draft that keeps failing falls back to the
+template email.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import phd_email_orchestrator as orchestrator  # noqa: E402
+import servers  # noqa: E402
+
+
+class AsyncDrafterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.llm = servers.start(servers.LLMServer(latency=0))
+        self.addCleanup(self.llm.shutdown)
+        self.config = orchestrator.Config(openai_api_key='test', openai_base_url=self.llm.url,
+                                          draft_max_retries=2, draft_max_backoff=0.05, draft_timeout=5)
+
+    def draft(self):
+        professor = orchestrator.PhDEmailOrchestrator(
+            professor_name="Professor A", test_email='a@test.invalid', config=self.config)
+        professor.research_data = {'google_scholar': servers.scholar_research('a', None)}
+        drafter = orchestrator.AsyncDrafter(self.config)
+        drafter.start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                drafter.draft(professor, "Test Applicant", "I study machine learning.")
+        finally:
+            drafter.stop()
+        return professor
+
+    def test_retries_rate_limit_after_retry_after(self):
+        self.llm.fail_next = 2
+        self.llm.retry_after = 0.2
+        start = time.monotonic()
+        professor = self.draft()
+        self.assertEqual(professor.drafted_by, 'gpt')
+        self.assertIn("Benchmark Applicant", professor.drafted_email['body'])
+        self.assertEqual(self.llm.requests, 3)
+        self.assertGreaterEqual(time.monotonic() - start, 0.4)
+
+    def test_retries_server_errors_with_backoff(self):
+        self.llm.fail_next = 1
+        self.llm.fail_status = 503
+        professor = self.draft()
+        self.assertEqual(professor.drafted_by, 'gpt')
+        self.assertEqual(self.llm.requests, 2)
+
+    def test_falls_back_to_template_after_max_retries(self):
+        self.llm.fail_next = 3
+        self.llm.fail_status = 500
+        professor = self.draft()
+        self.assertEqual(professor.drafted_by, 'template')
+        self.assertTrue(professor.drafted_email['body'])
+        self.assertEqual(self.llm.requests, 3)
+
+    def test_does_not_retry_client_errors(self):
+        self.llm.fail_next = 1
+        self.llm.fail_status = 400
+        professor = self.draft()
+        self.assertEqual(professor.drafted_by, 'template')
+        self.assertEqual(self.llm.requests, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
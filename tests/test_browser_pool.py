@@ -0,0 +1,131 @@
+"""
+BrowserPool.scrape with a browser that crashes mid-research: the crashed
+driver is discarded, a fresh one is started and the professor is retried
+without losing the research. Pages come from the benchmark fixture
+server; the stand-in driver fetches them over HTTP and answers the
+scraper's scripts from the fixture data, so no Chrome is needed.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import unittest
+import urllib.request
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import phd_email_orchestrator as orchestrator  # noqa: E402
+import servers  # noqa: E402
+
+
+class BrowserCrashed(Exception):
+    pass
+
+
+class FakeDriver:
+    """Just enough of a WebDriver for scrape_google_scholar, crashing on its first page if told to"""
+
+    startup_seconds = 0.0
+
+    def __init__(self, crash):
+        self.crash = crash
+        self.crashed = False
+        self.quit_called = False
+        self.url = None
+
+    @property
+    def current_url(self):
+        if self.crashed:
+            raise BrowserCrashed("chrome not reachable")
+        return self.url
+
+    def get(self, url):
+        self.current_url
+        if self.crash:
+            self.crashed = True
+            raise BrowserCrashed("tab crashed")
+        with urllib.request.urlopen(url) as response:
+            response.read()
+        self.url = url
+
+    def set_script_timeout(self, seconds):
+        self.current_url
+
+    def execute_async_script(self, script, *args):
+        self.current_url
+        return 20
+
+    def execute_script(self, script, *args):
+        self.current_url
+        if script is orchestrator.SCHOLAR_EXTRACT_SCRIPT:
+            user = parse_qs(urlsplit(self.url).query)['user'][0]
+            return servers.scholar_research(user, self.url)
+        if script is orchestrator.PAGE_READY_SCRIPT:
+            return 'ready'
+        return None
+
+    def quit(self):
+        self.quit_called = True
+
+
+class BrowserPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fixtures = servers.start(servers.FixtureServer())
+        self.addCleanup(self.fixtures.shutdown)
+        self.config = orchestrator.Config(scholar_base_url=self.fixtures.url)
+        self.drivers = []
+        self.crashes = 0
+
+    def create_driver(self, config=None):
+        driver = FakeDriver(crash=self.crashes > 0)
+        self.crashes -= 1
+        self.drivers.append(driver)
+        return driver
+
+    def scrape(self, pool, user):
+        professor = orchestrator.PhDEmailOrchestrator(
+            professor_name=f"Professor {user.upper()}", test_email=f"{user}@test.invalid",
+            scholar_url=f"{self.fixtures.url}/citations?user={user}&hl=en",
+            smu_url=f"{self.fixtures.url}/profiles/{user}", config=self.config)
+        professor.interactive = False
+        with mock.patch.object(orchestrator, 'create_driver', self.create_driver), \
+                contextlib.redirect_stdout(io.StringIO()):
+            pool.scrape(professor)
+        return professor
+
+    def test_crashed_browser_is_recycled_and_professor_retried(self):
+        pool = orchestrator.BrowserPool(1, config=self.config)
+        self.addCleanup(pool.close)
+        self.crashes = 1
+        professor = self.scrape(pool, 'a')
+        scholar = professor.research_data['google_scholar']
+        self.assertNotIn('error', scholar)
+        self.assertEqual(scholar['interests'], servers.professor('a')['interests'])
+        self.assertEqual(professor.research_data['smu']['fetched_via'], 'http')
+        self.assertEqual(len(self.drivers), 2)
+        self.assertTrue(self.drivers[0].quit_called)
+        self.assertFalse(self.drivers[1].quit_called)
+        # The healthy replacement is kept for the next professor
+        self.scrape(pool, 'b')
+        self.assertEqual(len(self.drivers), 2)
+
+    def test_gives_up_after_every_attempt_crashes(self):
+        pool = orchestrator.BrowserPool(1, config=self.config)
+        self.addCleanup(pool.close)
+        self.crashes = 2
+        professor = self.scrape(pool, 'a')
+        self.assertIn('error', professor.research_data['google_scholar'])
+        self.assertTrue(all(driver.quit_called for driver in self.drivers))
+        # Both crashed drivers were discarded, so the pool can start a new one
+        self.scrape(pool, 'b')
+        self.assertEqual(len(self.drivers), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
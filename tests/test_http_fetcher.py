@@ -0,0 +1,59 @@
+"""
+HTTPFetcher against the benchmark fixture server: retrying a kept-alive
+connection the server closed, and never reusing a connection after a
+request failed part-way.
+"""
+
+import os
+import socket
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import phd_email_orchestrator as orchestrator  # noqa: E402
+import servers  # noqa: E402
+
+
+class HTTPFetcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fixtures = servers.start(servers.FixtureServer())
+        self.addCleanup(self.fixtures.shutdown)
+        self.fetcher = orchestrator.HTTPFetcher(orchestrator.Config(http_timeout=0.3))
+        self.addCleanup(self.fetcher.close)
+
+    def fetch(self, user):
+        return self.fetcher.fetch(f"{self.fixtures.url}/profiles/{user}")
+
+    def test_retries_dropped_keepalive_connection(self):
+        self.assertEqual(self.fetch('a')['status'], 200)
+        self.fixtures.drop_next = 1
+        page = self.fetch('b')
+        self.assertEqual(page['status'], 200)
+        self.assertIn("Professor B", page['body'])
+        self.assertEqual(self.fixtures.requests, 3)
+
+    def test_gives_up_when_the_fresh_connection_drops_too(self):
+        self.assertEqual(self.fetch('a')['status'], 200)
+        self.fixtures.drop_next = 2
+        with self.assertRaises(ConnectionError):
+            self.fetch('b')
+        self.assertEqual(self.fetch('c')['status'], 200)
+
+    def test_timed_out_connection_is_not_reused(self):
+        self.fixtures.latency = 0.6
+        with self.assertRaises(socket.timeout):
+            self.fetch('a')
+        self.assertEqual(self.fetcher._connections, {})
+        self.fixtures.latency = 0
+        # The late response to the first request must not be read as this one's
+        page = self.fetch('b')
+        self.assertIn("Professor B", page['body'])
+        self.assertNotIn("Professor A", page['body'])
+
+
+if __name__ == '__main__':
+    unittest.main()
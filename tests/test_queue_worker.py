@@ -0,0 +1,72 @@
+"""
+run_workers draining a job queue against the benchmark servers: every
+professor is researched, drafted and queued for review, and added to the
+research store so queries and ranking see them. Scholar research comes
+from a pre-seeded research cache, so no Chrome is needed.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import phd_email_orchestrator as orchestrator  # noqa: E402
+import servers  # noqa: E402
+
+USERS = ['qa', 'qb', 'qc']
+
+
+class QueueWorkerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fixtures = servers.start(servers.FixtureServer())
+        self.addCleanup(self.fixtures.shutdown)
+        self.llm = servers.start(servers.LLMServer(latency=0))
+        self.addCleanup(self.llm.shutdown)
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.config = orchestrator.Config(
+            db_path=os.path.join(workdir.name, 'test.db'),
+            research_store_path=os.path.join(workdir.name, 'research_store'),
+            your_name="Test Applicant", your_background="I study machine learning.",
+            openai_api_key='test', openai_base_url=self.llm.url,
+        )
+        self.roster = []
+        research_cache = orchestrator.ResearchCache(self.config)
+        for user in USERS:
+            entry = {
+                'professor_name': f"Professor {user.upper()}",
+                'email': f"{user}@test.invalid",
+                'scholar_url': f"{self.fixtures.url}/citations?user={user}&hl=en",
+                'smu_url': f"{self.fixtures.url}/profiles/{user}",
+            }
+            research_cache.put('google_scholar', entry['scholar_url'],
+                               servers.scholar_research(user, entry['scholar_url']))
+            self.roster.append(entry)
+        research_cache.close()
+
+    def test_worked_professors_reach_the_research_store(self):
+        jobs = orchestrator.JobQueue(self.config)
+        jobs.enqueue('test', self.roster)
+        jobs.close()
+        with contextlib.redirect_stdout(io.StringIO()):
+            counts = orchestrator.run_workers('test', self.config, processes=1)
+        self.assertEqual(counts.get('done'), len(USERS))
+
+        store = orchestrator.ResearchStore(self.config)
+        self.addCleanup(store.close)
+        self.assertEqual(len(store), len(USERS))
+        for user in USERS:
+            interest = servers.professor(user)['interests'][0]
+            emails = [record.email for record in store.professors_with_interest(interest)]
+            self.assertIn(f"{user}@test.invalid", emails)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+"""
+SMTPSender against the benchmark SMTP sink: reconnecting after a dropped
+connection, giving up without a final backoff, retrying a refused
+connection only when the refusal is temporary, and the daily limit
+counted across runs through the sent-mail index. Also the send stage
+retiring approved drafts the sent-mail index refuses.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import unittest
+from email.message import EmailMessage
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import phd_email_orchestrator as orchestrator  # noqa: E402
+import servers  # noqa: E402
+
+
+def message(to):
+    msg = EmailMessage()
+    msg['Subject'] = "PhD Opportunity"
+    msg['From'] = 'me@test.invalid'
+    msg['To'] = to
+    msg.set_content("Dear Professor,")
+    return msg
+
+
+class SMTPSenderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sink = servers.start(servers.SMTPSink())
+        self.addCleanup(self.sink.shutdown)
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.config = orchestrator.Config(
+            db_path=os.path.join(workdir.name, 'test.db'),
+            smtp_host='127.0.0.1', smtp_port=self.sink.port, smtp_ssl=False,
+            send_rate_per_minute=1e9, send_max_attempts=3,
+        )
+
+    def sender(self, sent_index=None):
+        return orchestrator.SMTPSender('me@test.invalid', 'unused', config=self.config, sent_index=sent_index)
+
+    def test_reconnects_after_dropped_connection(self):
+        with self.sender() as sender:
+            self.assertTrue(sender.send(message('a@test.invalid')))
+            self.sink.drop_next = 1
+            self.assertTrue(sender.send(message('b@test.invalid')))
+        self.assertEqual(self.sink.messages, 2)
+        self.assertEqual(sender.connects, 2)
+        self.assertEqual(sender.failures, [])
+
+    def test_gives_up_after_max_attempts_without_final_backoff(self):
+        self.sink.drop_next = 2
+        self.config.send_max_attempts = 2
+        start = time.monotonic()
+        with self.sender() as sender:
+            self.assertFalse(sender.send(message('a@test.invalid')))
+        # Two attempts: an immediate reconnect and no sleep after the last one
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(self.sink.messages, 0)
+        self.assertEqual(len(sender.failures), 1)
+
+    def test_retries_temporarily_refused_connection(self):
+        self.sink.refuse_next = 1
+        with self.sender() as sender:
+            self.assertTrue(sender.send(message('a@test.invalid')))
+        self.assertEqual(self.sink.connections, 2)
+        self.assertEqual(self.sink.messages, 1)
+
+    def test_does_not_retry_permanently_refused_connection(self):
+        self.sink.refuse_next = 1
+        self.sink.refuse_code = 554
+        with self.sender() as sender:
+            self.assertFalse(sender.send(message('a@test.invalid')))
+        self.assertEqual(self.sink.connections, 1)
+        self.assertIn("554", sender.failures[-1]['error'])
+
+    def test_daily_limit_counts_earlier_runs(self):
+        self.config.send_daily_limit = 2
+        sent_index = orchestrator.SentIndex(self.config)
+        self.addCleanup(sent_index.close)
+        with self.sender(sent_index) as sender:
+            self.assertTrue(sender.send(message('a@test.invalid')))
+            self.assertTrue(sender.send(message('b@test.invalid')))
+        # A later run (a new sender) must not start the count again
+        with self.sender(sent_index) as sender:
+            self.assertFalse(sender.send(message('c@test.invalid')))
+        self.assertIn("daily send limit", sender.failures[-1]['error'])
+        self.assertEqual(self.sink.messages, 2)
+
+    def approve(self, review_queue, name, email):
+        professor = orchestrator.PhDEmailOrchestrator(professor_name=name, test_email=email, config=self.config)
+        professor.drafted_email = {'subject': "PhD Opportunity", 'body': "Dear Professor,"}
+        item_id = review_queue.add(professor)
+        review_queue.review(item_id, 'approved')
+        return item_id
+
+    def test_suppressed_approved_draft_is_skipped_not_retried(self):
+        review_queue = orchestrator.ReviewQueue(self.config)
+        self.addCleanup(review_queue.close)
+        sent_index = orchestrator.SentIndex(self.config)
+        self.addCleanup(sent_index.close)
+        sent_index.suppress('a@test.invalid', reason="asked not to be contacted")
+        skipped = self.approve(review_queue, "Professor A", 'a@test.invalid')
+        self.approve(review_queue, "Professor B", 'b@test.invalid')
+
+        send = lambda: orchestrator.send_approved(review_queue, 'me@test.invalid', 'unused',
+                                                  sent_index=sent_index, config=self.config)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(send(), 1)
+        items = {item['id']: item for item in review_queue.items('skipped')}
+        self.assertEqual(list(items), [skipped])
+        self.assertIn("suppressed", items[skipped]['error'])
+        self.assertEqual(review_queue.items('approved'), [])
+        # A later send run has nothing left to try
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(send(), 0)
+        self.assertEqual(self.sink.messages, 1)
+
+    def test_delivery_failure_stays_approved(self):
+        review_queue = orchestrator.ReviewQueue(self.config)
+        self.addCleanup(review_queue.close)
+        item_id = self.approve(review_queue, "Professor A", 'a@test.invalid')
+        self.config.send_max_attempts = 2
+        self.sink.drop_next = 2
+        with contextlib.redirect_stdout(io.StringIO()):
+            orchestrator.send_approved(review_queue, 'me@test.invalid', 'unused', config=self.config)
+        self.assertEqual([item['id'] for item in review_queue.items('approved')], [item_id])
+        self.assertTrue(review_queue.items('approved')[0]['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()